@@ -1,15 +1,26 @@
+from array import array
+
 try:
     # Cuando se ejecuta desde la carpeta raíz del proyecto
-    from descompresor.Rms_lector import LectorXLSXCSV,LectorXLSXCSVError
+    from descompresor.ingesta import (
+        detectar_separador, leer_matriz, leer_muestra_lineas, leer_texto_paralelo,
+        es_sqlite, listar_tablas, leer_sqlite_matriz, parsear_filtro,
+        es_jsonl, leer_jsonl_tabla,
+    )
+    from descompresor.tabla import TablaColumnar
 except ImportError:
     # Posible ejecución como módulo dentro de un paquete
-    from ..descompresor.Rms_lector import LectorXLSXCSVError
+    from ..descompresor.ingesta import (
+        detectar_separador, leer_matriz, leer_muestra_lineas, leer_texto_paralelo,
+        es_sqlite, listar_tablas, leer_sqlite_matriz, parsear_filtro,
+        es_jsonl, leer_jsonl_tabla,
+    )
+    from ..descompresor.tabla import TablaColumnar
 
 MAX_FILAS = 20000
 MAX_COLUMNAS = 3000
 MAX_PARES = 1_500_000
-
-SEPARADORES_POSIBLES = [",", ";", "\t", "|", " "]
+FALTANTES = {"", "na", "nan", "null", "none"}  # se usa .strip().lower()
 
 # -------- Utilidades generales --------
 
@@ -36,7 +47,7 @@ def es_faltante(v):
     if t == "":
         return True
     t_low = t.lower()
-    return t_low in ("na", "nan", "null", "none")
+    return t_low in FALTANTES
 
 def to_lower(v):
     try:
@@ -57,12 +68,6 @@ def intentar_float(v):
     except Exception:
         return None
 
-def suma(valores):
-    total = 0.0
-    for v in valores:
-        total += v
-    return total
-
 def minimo(valores):
     if not valores:
         return 0.0
@@ -83,12 +88,12 @@ def maximo(valores):
 
 # -------- Lectura de archivos usando el descompresor --------
 
-def leer_con_descompresor(ruta):
+def leer_con_descompresor(ruta, filtro=None):
     """
-    Usa XLSXtoCSV para leer .xlsx y .csv y devolver una lista de filas (lista de listas de str).
+    Lee .xlsx y .csv con el motor común de ingesta y devuelve una lista de filas
+    (lista de listas de str). El filtro de filas se aplica dentro del lector.
     """
-    lector = leer_con_descompresor(ruta)
-    filas = lector.procesar()
+    filas, _ = leer_matriz(ruta, filtro=filtro)
     # Aseguramos que todo sea str
     tabla = []
     for fila in filas:
@@ -103,103 +108,131 @@ def leer_con_descompresor(ruta):
 
 # -------- Lectura de texto plano --------
 
-def detectar_separador(lineas_muestra):
+def leer_texto_a_tabla(ruta, filtro=None):
     """
-    Intenta determinar el mejor separador entre varios candidatos.
+    Detecta el separador con una muestra y parsea el archivo en paralelo
+    (por rangos de bytes). Las celdas quedan como texto (el encabezado tal cual;
+    la conversión la hace después la tabla columnar). Con filtro solo se arman
+    las filas que lo cumplen.
     """
-    mejor_sep = ","
-    mejor_cols = 1
-    mejor_consistencia = -1.0
-
-    for sep in SEPARADORES_POSIBLES:
-        conteos = []
-        for ln in lineas_muestra:
-            if sep == " ":
-                partes = ln.strip().split()
-            else:
-                partes = ln.split(sep)
-            if partes and any(p.strip() != "" for p in partes):
-                conteos.append(len(partes))
-
-        if not conteos:
-            continue
+    muestra = leer_muestra_lineas(ruta, 30)
+    if not muestra:
+        raise Exception("El archivo de texto está vacío.")
+    sep = detectar_separador(muestra)
+    tabla = leer_texto_paralelo(ruta, sep, filtro=filtro)
+    return tabla
 
-        prom = suma(conteos) / float(len(conteos))
-        var = 0.0
-        for c in conteos:
-            diff = c - prom
-            var += diff * diff
-        var = var / float(len(conteos))
+# -------- Lectura de bases SQLite --------
 
-        consistencia = 1.0 / (1.0 + var)
-        cols_prom = prom
+def leer_sqlite_desde_ruta(ruta):
+    """
+    Pregunta tabla (o consulta SELECT), columnas y filtro, y los manda a SQLite:
+    solo llegan a Python las columnas y filas pedidas. Devuelve la lista de filas
+    con el encabezado como primera fila.
+    """
+    tablas = listar_tablas(ruta)
+    print("  Base SQLite. Tablas disponibles:")
+    for k, nombre in enumerate(tablas, start=1):
+        print("    {}) {}".format(k, nombre))
+    resp = seguro_input("  Elige tabla (número, Enter = 1) o escribe una consulta SELECT: ",
+                        defecto="1").strip()
+    tabla = None
+    consulta = None
+    if resp.lower().startswith("select"):
+        consulta = resp
+    else:
+        try:
+            tabla = tablas[int(resp) - 1]
+        except (ValueError, IndexError):
+            raise ValueError("Tabla inválida: {}".format(resp))
 
-        if (consistencia > mejor_consistencia) or (
-            abs(consistencia - mejor_consistencia) < 1e-9 and cols_prom > mejor_cols
-        ):
-            mejor_consistencia = consistencia
-            mejor_cols = cols_prom
-            mejor_sep = sep
+    cols_txt = seguro_input("  Columnas separadas por coma (Enter = todas): ", defecto="")
+    columnas = [c.strip() for c in cols_txt.split(",") if c.strip()] or None
+    filtro_txt = seguro_input("  Filtro de filas, ej. 'region = Norte; anio >= 2020' (Enter = ninguno): ",
+                              defecto="")
+    filtro = parsear_filtro(filtro_txt)
+    return leer_sqlite_matriz(ruta, tabla=tabla, consulta=consulta,
+                              columnas=columnas, filtro=filtro)
 
-    return mejor_sep
+# -------- Lectura de JSON Lines --------
 
-def partir_linea(linea, sep):
-    if sep == " ":
-        partes = linea.strip().split()
-    else:
-        partes = linea.split(sep)
-    limpiado = []
-    for p in partes:
-        limpiado.append(p.strip())
-    return limpiado
-
-def lineas_a_tabla(lineas, sep):
-    filas = []
-    for l in lineas:
-        if l.strip() == "":
-            continue
-        fila = partir_linea(l, sep)
-        filas.append(fila)
-    return filas
-
-def leer_texto_a_tabla(ruta):
-    with open(ruta, "r", encoding="utf-8", errors="ignore") as f:
-        lineas = [ln.rstrip("\n\r") for ln in f if ln.strip() != ""]
-    if not lineas:
-        raise Exception("El archivo de texto está vacío.")
-    muestra = lineas[: min(30, len(lineas))]
-    sep = detectar_separador(muestra)
-    tabla = lineas_a_tabla(lineas, sep)
+def leer_jsonl_desde_ruta(ruta):
+    """
+    Pregunta qué claves usar y lee el JSON Lines por lotes directo a una
+    TablaColumnar (sin lista de filas intermedia), respetando MAX_FILAS.
+    """
+    claves_txt = seguro_input("  Claves a usar, separadas por coma; 'a.b' para anidadas (Enter = todas): ",
+                              defecto="")
+    claves = [c.strip() for c in claves_txt.split(",") if c.strip()] or None
+    tabla = leer_jsonl_tabla(ruta, claves, umbral_numerico=0.8, max_filas=MAX_FILAS,
+                             faltantes=FALTANTES)
+    if tabla.n_columnas > MAX_COLUMNAS:
+        print("  Aviso: se recortan las columnas de {} a {} para evitar problemas.".format(
+            tabla.n_columnas, MAX_COLUMNAS))
+        tabla = tabla.seleccionar_columnas(list(range(MAX_COLUMNAS)))
     return tabla
 
 # -------- Lectura genérica de cualquier archivo tabular --------
 
 def leer_tabla_desde_ruta():
     """
-    Pide la ruta al usuario e intenta leer con el descompresor (.xlsx/.csv)
-    o como texto plano, devolviendo (encabezado, datos).
+    Pide la ruta al usuario e intenta leer con el descompresor (.xlsx/.csv),
+    como base SQLite o como texto plano, devolviendo (encabezado, datos).
+    Para JSON Lines 'datos' ya es una TablaColumnar.
     """
     while True:
-        ruta = seguro_input("Ruta del archivo (.xlsx, .csv, .txt, etc.): ", defecto="")
+        ruta = seguro_input("Ruta del archivo (.xlsx, .csv, .txt, .db, .jsonl, etc.): ", defecto="")
         if not ruta:
             print("  No se proporcionó ruta.")
             continue
 
         ruta = ruta.strip()
 
-        # Intento 1: descompresor
         tabla = None
         error_1 = None
-        if ruta.lower().endswith(".xlsx") or ruta.lower().endswith(".csv"):
+        filtro = None
+        # JSON Lines: por lotes a la tabla columnar; no pasa por la lista de filas
+        if es_jsonl(ruta):
             try:
-                tabla = leer_con_descompresor(ruta)
+                tabla_jsonl = leer_jsonl_desde_ruta(ruta)
+            except Exception as e:
+                print("  No se pudo leer el archivo JSON Lines:", e)
+                continue
+            if tabla_jsonl.n_filas == 0 or tabla_jsonl.n_columnas == 0:
+                print("  El archivo no contiene datos válidos.")
+                continue
+            print("  Datos cargados: {} filas x {} columnas.".format(
+                tabla_jsonl.n_filas, tabla_jsonl.n_columnas))
+            return tabla_jsonl.encabezado, tabla_jsonl
+
+        # Base SQLite: columnas y filtro se resuelven en SQL
+        if es_sqlite(ruta):
+            try:
+                tabla = leer_sqlite_desde_ruta(ruta)
+            except Exception as e:
+                print("  No se pudo leer la base SQLite:", e)
+                continue
+        else:
+            filtro_txt = seguro_input("  Filtro de filas por nombre de columna (1ª fila) o posición,"
+                                      " ej. 'region = Norte; mes in 1,2' (Enter = ninguno): ",
+                                      defecto="")
+            try:
+                filtro = parsear_filtro(filtro_txt)
+            except ValueError as e:
+                print("  Filtro inválido:", e)
+                continue
+
+        # Intento 1: descompresor
+        if tabla is None and (ruta.lower().endswith(".xlsx") or ruta.lower().endswith(".csv")):
+            try:
+                tabla = leer_con_descompresor(ruta, filtro)
             except Exception as e:
                 error_1 = e
 
         # Si no termina en .xlsx/.csv o falló el descompresor, probamos texto
         if tabla is None:
             try:
-                tabla = leer_texto_a_tabla(ruta)
+                tabla = leer_texto_a_tabla(ruta, filtro)
             except Exception as e:
                 if error_1 is not None:
                     print("  Error usando el descompresor:", error_1)
@@ -235,7 +268,7 @@ def leer_tabla_desde_ruta():
         else:
             encabezado = []
             for cel in tabla[0]:
-                cel_txt = str(cel).strip()
+                cel_txt = "" if cel is None else str(cel).strip()
                 if cel_txt == "":
                     encabezado.append("Col{}".format(len(encabezado) + 1))
                 else:
@@ -410,6 +443,119 @@ def matriz_completa(datos, tipos, rangos):
 
     return S, D
 
+# -------- Gower sobre tabla columnar --------
+
+def preparar_gower_tabla(tabla, binarias_texto=()):
+    """
+    Precalcula, por columna de una TablaColumnar, lo que necesita el núcleo:
+    (tipo, valores, faltantes, rango). Para categóricas 'valores' son códigos
+    enteros ya unificados sin distinguir mayúsculas (-1 = faltante), así la
+    comparación por par es un simple == entre enteros.
+    binarias_texto: índices de columnas 'binario_numerico' guardadas como
+    categóricas; se comparan por texto, como en similitud_gower_registro (un
+    texto suelto cuenta como no coincidencia, no como faltante).
+    Devuelve (tipos, preparado).
+    """
+    tipos = []
+    preparado = []
+    for j, col in enumerate(tabla.columnas):
+        if col.tipo == "numerico" and col.n_faltantes < len(col):
+            unicos = set(v for _, v in col.validos())
+            tipo = "binario_numerico" if len(unicos) == 2 else "numerico"
+            mn, mx = col.minimo_maximo()
+            faltantes = col.faltantes if col.n_faltantes else None
+            preparado.append((tipo, col.valores, faltantes, (mn, mx)))
+        elif col.tipo == "numerico":
+            # Sin información: lo tratamos como categórico (todo faltante)
+            tipo = "categorico"
+            preparado.append((tipo, None, None, (0.0, 0.0)))
+        else:
+            canon = {}
+            mapa = []
+            for cat in col.categorias:
+                mapa.append(canon.setdefault(to_lower(cat), len(canon)))
+            codigos = array("i", [mapa[c] if c >= 0 else -1 for c in col.codigos])
+            faltantes = None
+            if j in binarias_texto:
+                tipo = "binario_numerico"
+                faltantes = bytearray((len(codigos) + 7) // 8)
+                for i, c in enumerate(codigos):
+                    if c < 0:
+                        faltantes[i >> 3] |= 1 << (i & 7)
+            elif not canon:
+                tipo = "categorico"
+            else:
+                tipo = "binario_categorico" if len(canon) == 2 else "categorico"
+            preparado.append((tipo, codigos, faltantes, (0.0, 0.0)))
+        tipos.append(tipo)
+    return tipos, preparado
+
+def similitud_gower_tabla(preparado, i, j):
+    """
+    Igual que similitud_gower_registro, pero entre las filas i y j de una tabla
+    preparada con preparar_gower_tabla (sin parsear texto en cada par).
+    """
+    num = 0.0
+    den = 0.0
+    bi = i >> 3
+    mi = 1 << (i & 7)
+    bj = j >> 3
+    mj = 1 << (j & 7)
+
+    for tipo, valores, faltantes, rango in preparado:
+        if valores is None:
+            continue
+        if faltantes is not None and ((faltantes[bi] & mi) or (faltantes[bj] & mj)):
+            continue
+        xa = valores[i]
+        xb = valores[j]
+        if tipo == "numerico":
+            mn, mx = rango
+            if mx > mn:
+                s_ijk = 1.0 - abs(xa - xb) / float(mx - mn)
+            else:
+                s_ijk = 1.0
+        elif tipo == "binario_numerico":
+            s_ijk = 1.0 if xa == xb else 0.0
+        else:
+            if xa < 0 or xb < 0:
+                continue
+            s_ijk = 1.0 if xa == xb else 0.0
+        num += s_ijk
+        den += 1.0
+
+    if den == 0.0:
+        return 0.0, 1.0, 0
+
+    s = num / den
+    return s, 1.0 - s, int(den)
+
+def matriz_completa_tabla(preparado, n):
+    """Matriz de similitud y distancia entre TODAS las filas de una tabla preparada."""
+    if n <= 1:
+        return [], []
+
+    pares = n * (n - 1) // 2
+    if pares > MAX_PARES:
+        print("  Aviso: hay demasiados pares ({}). Se calcularán solo los primeros {}.".format(pares, MAX_PARES))
+
+    S = [[1.0 if i == j else 0.0 for j in range(n)] for i in range(n)]
+    D = [[0.0 if i == j else 1.0 for j in range(n)] for i in range(n)]
+
+    cuenta = 0
+    for i in range(n):
+        for j in range(i + 1, n):
+            if cuenta >= MAX_PARES:
+                break
+            s, d, _ = similitud_gower_tabla(preparado, i, j)
+            S[i][j] = S[j][i] = s
+            D[i][j] = D[j][i] = d
+            cuenta += 1
+        if cuenta >= MAX_PARES:
+            break
+
+    return S, D
+
 # -------- Utilidades de impresión --------
 
 def formato_float(x, ancho=7, decimales=4):
@@ -484,9 +630,19 @@ def main():
     # 1) Leer datos
     encabezado, datos = leer_tabla_desde_ruta()
 
-    # 2) Tipificar columnas y calcular rangos
-    tipos = tipificar_columnas(datos)
-    rangos = rangos_numericos(datos, tipos)
+    # 2) Parsear una sola vez a tabla columnar, tipificar columnas y calcular rangos
+    if isinstance(datos, TablaColumnar):
+        tabla = datos
+        binarias_texto = ()
+    else:
+        # Tipos con la regla de siempre (tipificar_columnas) y los faltantes de Gower;
+        # las binarias numéricas quedan como texto para compararlas igual que antes
+        tipificados = tipificar_columnas(datos)
+        tipos_tabla = ["numerico" if t == "numerico" else "categorico" for t in tipificados]
+        binarias_texto = {j for j, t in enumerate(tipificados) if t == "binario_numerico"}
+        tabla = TablaColumnar.desde_filas(datos, encabezado, tipos=tipos_tabla,
+                                          faltantes=FALTANTES)
+    tipos, preparado = preparar_gower_tabla(tabla, binarias_texto)
 
     print("")
     print("Tipos de columnas detectados:")
@@ -508,14 +664,14 @@ def main():
         print("")
         print("Se calculará Gower para un par de filas (registros).")
         i, j = pedir_par(nfilas, "fila")
-        s, d, k = similitud_gower_registro(datos[i], datos[j], tipos, rangos)
+        s, d, k = similitud_gower_tabla(preparado, i, j)
         et_i = "Fila {}".format(i + 1)
         et_j = "Fila {}".format(j + 1)
         imprimir_par_s_d(s, d, et_i, et_j, k)
     else:
         print("")
         print("Se calculará la matriz completa entre todas las filas.")
-        S, D = matriz_completa(datos, tipos, rangos)
+        S, D = matriz_completa_tabla(preparado, nfilas)
         imprimir_matriz(S, "Matriz de SIMILITUD entre FILAS (s)")
         imprimir_matriz(D, "Matriz de DISTANCIA entre FILAS (d = 1 - s)")
 
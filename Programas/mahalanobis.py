@@ -1,4 +1,15 @@
-from descompresor.lee import XLSXtoCSV   # <-- AJUSTA ESTE NOMBRE
+try:
+    # Cuando se ejecuta desde la carpeta raíz del proyecto
+    from descompresor.Rms_lector import LectorXLSXCSV as XLSXtoCSV
+    from descompresor.tabla import TablaColumnar
+    from descompresor.lector_jsonl import es_jsonl, leer_jsonl_tabla
+    from descompresor.vistas import transponer
+except ImportError:
+    # Posible ejecución como módulo dentro de un paquete
+    from ..descompresor.Rms_lector import LectorXLSXCSV as XLSXtoCSV
+    from ..descompresor.tabla import TablaColumnar
+    from ..descompresor.lector_jsonl import es_jsonl, leer_jsonl_tabla
+    from ..descompresor.vistas import transponer
 
 # FUNCIONES DE ÁLGEBRA
 def a_float_seguro(cadena):
@@ -152,7 +163,8 @@ def distancia_mahalanobis(punto, media, cov_inv):
 def cargar_filas_desde_archivo(ruta):
     """
      XLSXtoCSV para leer .csv, .txt, .xlsx, etc.
-    Luego TRASPONE lo que devuelve para que queden filas normales:
+    Lo que devuelve viene por columnas; se reorienta con transponer(), que no
+    copia: para CSV devuelve las filas originales y para XLSX una vista por filas.
       - cada fila = una observación
       - cada columna = una variable
     """
@@ -169,37 +181,44 @@ def cargar_filas_desde_archivo(ruta):
     except Exception as e:
         raise Exception(f"Error al procesar el archivo con XLSXtoCSV: {e}")
 
-    if not columnas or not isinstance(columnas, list):
+    if not columnas or len(columnas) == 0:
         raise ValueError("El archivo no contiene datos válidos.")
 
-    # Asegurar que cada "columna" sea lista
-    cols_limpias = []
-    for col in columnas:
-        if col is None:
-            continue
-        if isinstance(col, list):
-            cols_limpias.append([("" if c is None else str(c)) for c in col])
-        else:
-            cols_limpias.append([str(col)])
-
-    if not cols_limpias:
-        raise ValueError("No se obtuvieron columnas válidas del archivo.")
-
-    # Trasponer: columnas -> filas
-    n_cols = len(cols_limpias)
-    n_rows = len(cols_limpias[0])
-    for c in cols_limpias:
-        if len(c) != n_rows:
+    n_rows = len(columnas[0])
+    for c in columnas:
+        if c is None or len(c) != n_rows:
             raise ValueError("Las columnas tienen longitudes distintas; archivo inconsistente.")
 
-    filas = []
-    for i in range(n_rows):
-        fila = []
-        for j in range(n_cols):
-            fila.append(cols_limpias[j][i])
-        filas.append(fila)
+    # Columnas -> filas sin copiar la matriz
+    return transponer(columnas)
+
 
-    return filas
+def cargar_tabla_desde_archivo(ruta, usar_encabezado, umbral_numerico=0.0):
+    """
+    Lee el archivo directo a una TablaColumnar (columnas numéricas como array('d')
+    con mapa de faltantes), sin pasar por la lista de filas de texto.
+    Con umbral_numerico=0.0 toda columna con algún número es numérica y sus celdas
+    de texto cuentan como faltantes (la fila se descarta, como en la versión de texto).
+    """
+    if not isinstance(ruta, str) or ruta.strip() == "":
+        raise ValueError("Ruta de archivo vacía o inválida.")
+    if es_jsonl(ruta):
+        # JSON Lines: por lotes directo a la tabla. En JSON el tipo viene del propio
+        # valor, así que las claves de texto quedan categóricas y no se usan.
+        tabla = leer_jsonl_tabla(ruta, umbral_numerico=1.0)
+        if tabla.n_filas == 0:
+            raise ValueError("El archivo no contiene datos válidos.")
+        return tabla
+    try:
+        tabla = XLSXtoCSV(ruta).procesar_tabla(encabezado=usar_encabezado,
+                                               umbral_numerico=umbral_numerico)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"No se encontró el archivo: {ruta}")
+    except Exception as e:
+        raise Exception(f"Error al procesar el archivo con XLSXtoCSV: {e}")
+    if tabla.n_filas == 0:
+        raise ValueError("El archivo no contiene datos válidos.")
+    return tabla
 
 
 def seleccionar_columnas(filas):
@@ -242,7 +261,39 @@ def seleccionar_columnas(filas):
         return indices
 
 
+def construir_matriz_numerica_tabla(tabla, indices_columnas):
+    """
+    Versión sobre TablaColumnar: una fila es válida si no tiene faltantes en
+    ninguna de las columnas elegidas (todas deben ser numéricas).
+    """
+    cols = []
+    for j in indices_columnas:
+        if j >= tabla.n_columnas:
+            raise ValueError(f"Índice de columna fuera de rango: {j + 1}")
+        col = tabla.columna(j)
+        if col.tipo != "numerico":
+            raise ValueError(f"La columna {j + 1} ({col.nombre}) no es numérica.")
+        cols.append(col)
+
+    total_entrada = tabla.n_filas
+    con_faltantes = [c for c in cols if c.n_faltantes]
+    datos = []
+    for i in range(total_entrada):
+        if con_faltantes and any(c.es_faltante(i) for c in con_faltantes):
+            continue
+        datos.append([c.valores[i] for c in cols])
+
+    filas_invalidas = total_entrada - len(datos)
+    if not datos:
+        raise ValueError("Todas las filas fueron inválidas; no hay datos numéricos suficientes.")
+    if len(datos) < 2:
+        raise ValueError("Solo se obtuvo 1 fila válida; se requieren al menos 2 para covarianza.")
+    return datos, filas_invalidas, total_entrada
+
+
 def construir_matriz_numerica(filas, usar_encabezado, indices_columnas):
+    if isinstance(filas, TablaColumnar):
+        return construir_matriz_numerica_tabla(filas, indices_columnas)
     if not filas:
         raise ValueError("No hay filas para construir la matriz numérica.")
 
@@ -293,15 +344,13 @@ def simple():
       - Calcula la distancia de Mahalanobis de cada fila válida
     """
     print("=== Distancia de Mahalanobis (versión simple) ===")
-    ruta = input("Ruta del archivo (.csv/.txt/.xlsx): ").strip()
-
-    filas = cargar_filas_desde_archivo(ruta)
+    ruta = input("Ruta del archivo (.csv/.txt/.xlsx/.jsonl): ").strip()
 
-    max_cols = max(len(f) for f in filas)
-    indices_columnas = list(range(max_cols))  # todas las columnas
+    tabla = cargar_tabla_desde_archivo(ruta, usar_encabezado=False)
+    indices_columnas = tabla.indices_numericos()  # todas las columnas numéricas
 
     datos, filas_invalidas, total_entrada = construir_matriz_numerica(
-        filas,
+        tabla,
         usar_encabezado=False,
         indices_columnas=indices_columnas
     )
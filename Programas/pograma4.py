@@ -1,9 +1,11 @@
 # -*- coding: utf-8 -*-
 """
 Gower PURO con soporte XLSX (sin librerías externas).
-- Solo usa biblioteca estándar: zipfile, xml.etree.ElementTree (sin os, sin sys).
+- Solo usa biblioteca estándar; la lectura (XLSX y texto) la hace el motor
+  común descompresor.ingesta.
 - Lee .xlsx (Excel): toma la HOJA 1 por defecto (o de 1..N a elección).
-- Lee texto: .txt, .csv, .tsv, .pipe, etc. (auto-detección de separador).
+- Lee texto: .txt, .csv, .tsv, .pipe, etc. (auto-detección de separador),
+  también comprimido en .gz/.bz2/.xz (se descomprime al vuelo).
 - Calcula similitud (s) y distancia (d = 1 - s) de Gower:
     * Por FILAS (individuos) o por COLUMNAS (variables).
     * Para un PAR de índices o MATRIZ COMPLETA (con límites).
@@ -15,8 +17,20 @@ Límites (para no colgar la compu):
 - Máx. pares matriz: 1_500_000
 """
 
-from zipfile import ZipFile
-from xml.etree import ElementTree
+try:
+    # Cuando se ejecuta desde la carpeta raíz del proyecto
+    from descompresor.ingesta import (
+        es_xlsx, detectar_separador, leer_xlsx_a_matriz, normalizar_ancho,
+        leer_muestra_lineas, leer_texto_paralelo,
+    )
+    from descompresor.vistas import transponer
+except ImportError:
+    # Posible ejecución como módulo dentro de un paquete
+    from ..descompresor.ingesta import (
+        es_xlsx, detectar_separador, leer_xlsx_a_matriz, normalizar_ancho,
+        leer_muestra_lineas, leer_texto_paralelo,
+    )
+    from ..descompresor.vistas import transponer
 
 # ----------------- Parámetros de seguridad -----------------
 MAX_FILAS = 20000
@@ -24,7 +38,6 @@ MAX_COLUMNAS = 3000
 MAX_PARES_MATRIZ = 1_500_000
 
 FALTANTES = {"", "na", "nan", "null", "none"}  # se usa .strip().lower()
-SEPARADORES_POSIBLES = [",", ";", "\t", "|", " "]
 
 # ----------------- Utilidades de entrada -------------------
 
@@ -49,18 +62,11 @@ def leer_ruta_y_tipo():
             print("  No se proporcionó ruta.")
             continue
         # ¿Es XLSX?
-        try:
-            with ZipFile(ruta, "r") as z:
-                # Validación mínima de XLSX
-                if "[Content_Types].xml" in z.namelist():
-                    return ruta, "xlsx"
-        except Exception:
-            pass
+        if es_xlsx(ruta):
+            return ruta, "xlsx"
         # Si no es XLSX, intentamos abrir como texto
         try:
-            with open(ruta, "r", encoding="utf-8", errors="ignore") as f:
-                lineas = [ln.rstrip("\n\r") for ln in f if ln.strip() != ""]
-            if not lineas:
+            if not leer_muestra_lineas(ruta, 1):
                 print(" El archivo está vacío o no es válido como texto.")
                 continue
             return ruta, "texto"
@@ -70,27 +76,6 @@ def leer_ruta_y_tipo():
 
 # --------------- Lectura TEXTO (CSV/TSV/etc.) ---------------
 
-def detectar_separador(lineas_muestra):
-    mejor_sep = ","
-    mejor_cols = 1
-    mejor_consistencia = -1.0
-    for sep in SEPARADORES_POSIBLES:
-        conteos = []
-        for ln in lineas_muestra:
-            cols = partir_linea(ln, sep)
-            conteos.append(len(cols))
-        if not conteos:
-            continue
-        promedio = suma(conteos) / len(conteos)
-        var = suma([(c - promedio) * (c - promedio) for c in conteos]) / len(conteos)
-        consistencia = -var
-        max_cols = maximo(conteos)
-        if (max_cols > mejor_cols) or (max_cols == mejor_cols and consistencia > mejor_consistencia):
-            mejor_cols = max_cols
-            mejor_consistencia = consistencia
-            mejor_sep = sep
-    return mejor_sep
-
 def pedir_separador(defecto):
     nombre = "tabulador" if defecto == "\t" else ("espacio" if defecto == " " else defecto)
     print("\nSeparador sugerido:", repr(nombre))
@@ -104,200 +89,20 @@ def pedir_separador(defecto):
     print("  Entrada no válida; usando el sugerido.")
     return defecto
 
-def partir_linea(linea, sep):
-    if sep == " ":
-        partes = linea.strip().split()
-    else:
-        partes = linea.split(sep)
-    limpiado = []
-    for p in partes:
-        limpiado.append(p.strip())
-    return limpiado
-
-def lineas_a_tabla(lineas, sep):
-    filas = []
-    for l in lineas:
-        if l.strip() == "":
-            continue
-        fila = partir_linea(l, sep)
-        filas.append(fila)
-    return filas
-
 # ----------- Lectura XLSX (sin dependencias externas) -----------
 
-def leer_xlsx_a_matriz(ruta, sheet_index=None):
-    """
-    Convierte un .xlsx a una matriz de strings (lista de filas).
-    - sheet_index: índice 1..N (por defecto toma 1).
-    - Convierte strings compartidas (sharedStrings). Otras celdas como texto del <v>.
-    - Fechas/estilos: se dejan en crudo (número de Excel) para mantener pureza sin mapear estilos.
-    """
-    with ZipFile(ruta, "r") as z:
-        names = z.namelist()
-
-        # Shared Strings (opcional)
-        shared = []
-        if "xl/sharedStrings.xml" in names:
-            try:
-                sst = ElementTree.fromstring(z.read("xl/sharedStrings.xml"))
-                # namespace no siempre declarado; usamos búsqueda genérica
-                for si in sst.iter():
-                    if si.tag.endswith("si"):
-                        # concatenamos todos los textos dentro de si
-                        txt = ""
-                        for tnode in si.iter():
-                            if tnode.tag.endswith("t") and tnode.text is not None:
-                                txt += tnode.text
-                        shared.append(txt)
-            except Exception:
-                shared = []
-
-        # Workbook para conocer hojas
-        sheets = []
-        try:
-            wb = ElementTree.fromstring(z.read("xl/workbook.xml"))
-            for node in wb.iter():
-                if node.tag.endswith("sheet"):
-                    # nombre y r:id (no lo usamos aquí)
-                    nm = node.attrib.get("name", "")
-                    sheets.append(nm)
-        except Exception:
-            pass
-
-        # Determinar hoja
-        total = len([n for n in names if n.startswith("xl/worksheets/sheet") and n.endswith(".xml")])
-        if total == 0:
-            raise ValueError("XLSX no contiene hojas legibles.")
-        if sheet_index is None:
-            # preguntamos si hay más de una
-            if total > 1 and sheets:
-                print("\nHojas detectadas (1..{}):".format(total))
-                for idx, nm in enumerate(sheets, start=1):
-                    print("  {}: {}".format(idx, nm))
-                ans = seguro_input("Elige hoja (Enter = 1): ", default="1")
-                try:
-                    sel = int(ans)
-                except Exception:
-                    sel = 1
-            else:
-                sel = 1
-        else:
-            sel = int(sheet_index)
-
-        if sel < 1 or sel > total:
-            sel = 1
-        sheet_path = "xl/worksheets/sheet{}.xml".format(sel)
-        if sheet_path not in names:
-            # fallback por si el orden físico difiere
-            # intentamos el primero disponible
-            cand = [n for n in names if n.startswith("xl/worksheets/sheet") and n.endswith(".xml")]
-            cand.sort()
-            sheet_path = cand[0]
-
-        # Parsear celdas
-        xml = ElementTree.fromstring(z.read(sheet_path))
-        # Construiremos un dict por fila -> dict col_index -> valor
-        filas_dict = {}
-        max_col_index = 0
-
-        for c in xml.iter():
-            if not c.tag.endswith("c"):
-                continue
-            r = c.attrib.get("r", "")  # ej. "C5"
-            t = c.attrib.get("t", "")  # tipo (s = shared string, b = bool, etc.)
-            v_node = None
-            for sub in c.iter():
-                if sub.tag.endswith("v"):
-                    v_node = sub
-                    break
-            if not r:
-                continue
-            fila_idx, col_idx = ref_a_indices(r)  # 1-based -> (row, col)
-            if col_idx > max_col_index:
-                max_col_index = col_idx
-            val = ""
-            if v_node is not None and v_node.text is not None:
-                raw = v_node.text
-                if t == "s":
-                    # shared string
-                    try:
-                        si = int(raw)
-                        if 0 <= si < len(shared):
-                            val = shared[si]
-                        else:
-                            val = raw
-                    except Exception:
-                        val = raw
-                elif t == "b":
-                    # boolean
-                    val = "1" if raw.strip() == "1" else "0"
-                else:
-                    # numérico o texto directo
-                    val = raw
-            else:
-                # celdas sin <v> se pueden considerar vacías
-                val = ""
-
-            if fila_idx not in filas_dict:
-                filas_dict[fila_idx] = {}
-            filas_dict[fila_idx][col_idx] = val
-
-        # Convertir dict disperso a matriz compacta (sin filas vacías al final)
-        if not filas_dict:
-            return []
-
-        max_row = max(filas_dict.keys())
-        matriz = []
-        for r_i in range(1, max_row + 1):
-            fila_vals = []
-            row_dict = filas_dict.get(r_i, {})
-            # si la fila está totalmente vacía (sin claves), podemos colocar []
-            if not row_dict:
-                # Aun así mantenemos la estructura: fila vacía
-                # Si no deseas filas vacías, podrías "continue"
-                fila_vals = ["" for _ in range(max_col_index)]
-            else:
-                for c_j in range(1, max_col_index + 1):
-                    fila_vals.append(row_dict.get(c_j, ""))
-            matriz.append(fila_vals)
-
-        return matriz
-
-# ----------- Helpers XLSX: referencias y letras de columna -----------
-
-def ref_a_indices(ref):
-    """
-    Convierte una referencia tipo "C5" a (row=5, col=3), ambos 1-based.
-    """
-    letras = ""
-    numeros = ""
-    for ch in ref:
-        if "A" <= ch <= "Z" or "a" <= ch <= "z":
-            letras += ch
-        elif "0" <= ch <= "9":
-            numeros += ch
-    col = letras_a_indice(letras)
-    row = int(numeros) if numeros else 1
-    return row, col
-
-def letras_a_indice(letters):
-    """
-    'A'->1, 'B'->2, ..., 'Z'->26, 'AA'->27, etc.
-    """
-    letters = letters.upper()
-    n = 0
-    for ch in letters:
-        n = n * 26 + (ord(ch) - ord('A') + 1)
-    return n
+def pedir_hoja(nombres):
+    print("\nHojas detectadas (1..{}):".format(len(nombres)))
+    for idx, nm in enumerate(nombres, start=1):
+        print("  {}: {}".format(idx, nm))
+    ans = seguro_input("Elige hoja (Enter = 1): ", default="1")
+    try:
+        return int(ans)
+    except Exception:
+        return 1
 
 # ----------------- Utilidades numéricas puras -----------------
 
-def suma(valores):
-    total = 0.0
-    for v in valores:
-        total += v
-    return total
-
 def maximo(valores):
     if not valores:
         return 0
@@ -334,29 +139,6 @@ def intentar_float(txt):
     except Exception:
         return None
 
-def normalizar_ancho(filas):
-    """
-    Ajusta todas las filas al ancho modal (la cantidad de columnas más repetida).
-    """
-    conteo_por_long = {}
-    for fila in filas:
-        n = len(fila)
-        conteo_por_long[n] = conteo_por_long.get(n, 0) + 1
-    ncols_obj = None
-    mejor_freq = -1
-    for k, freq in conteo_por_long.items():
-        if freq > mejor_freq:
-            mejor_freq = freq
-            ncols_obj = k
-    filas_norm = []
-    for fila in filas:
-        if len(fila) < ncols_obj:
-            fila = fila + [""] * (ncols_obj - len(fila))
-        elif len(fila) > ncols_obj:
-            fila = fila[:ncols_obj]
-        filas_norm.append(fila)
-    return filas_norm, ncols_obj
-
 # ----------------- Tipificación y rangos -----------------
 
 def tipificar_columnas(datos):
@@ -477,23 +259,6 @@ def matriz_completa(datos, tipos, rangos):
         i += 1
     return S, D
 
-def transponer(matriz):
-    if not matriz:
-        return []
-    nfil = len(matriz)
-    ncol = len(matriz[0])
-    T = []
-    j = 0
-    while j < ncol:
-        fila = []
-        i = 0
-        while i < nfil:
-            fila.append(matriz[i][j])
-            i += 1
-        T.append(fila)
-        j += 1
-    return T
-
 # ----------------- Impresión -----------------
 
 def imprimir_par_s_d(s, d, etiqueta_a, etiqueta_b, k_usables):
@@ -556,7 +321,7 @@ def main():
 
     if tipo == "xlsx":
         try:
-            matriz = leer_xlsx_a_matriz(ruta, sheet_index=None)
+            matriz = leer_xlsx_a_matriz(ruta, sheet_index=None, elegir_hoja=pedir_hoja)
         except Exception:
             print(" No se pudo leer el XLSX. Verifica que no esté corrupto.")
             return
@@ -583,17 +348,19 @@ def main():
     else:
         # TEXTO
         try:
-            with open(ruta, "r", encoding="utf-8", errors="ignore") as f:
-                lineas = [ln.rstrip("\n\r") for ln in f if ln.strip() != ""]
+            muestra = leer_muestra_lineas(ruta, 50)
         except Exception:
             print(" No se pudo abrir/leer el archivo de texto.")
             return
-        muestra = lineas[:50]
         sep_detectado = detectar_separador(muestra)
         sep = pedir_separador(sep_detectado)
         ans = seguro_input("¿La primera fila es encabezado? [s/n] (Enter = 's'): ", default="s")
         tiene_encabezado = (str(ans).strip().lower() != "n")
-        filas = lineas_a_tabla(lineas, sep)
+        try:
+            filas = leer_texto_paralelo(ruta, sep)
+        except Exception:
+            print(" No se pudo abrir/leer el archivo de texto.")
+            return
         filas_norm, ncols_obj = normalizar_ancho(filas)
         if tiene_encabezado:
             encabezado = filas_norm[0]
@@ -646,6 +413,7 @@ def main():
             imprimir_matriz(S, "Matriz de SIMILITUD (s)")
             imprimir_matriz(D, "Matriz de DISTANCIA (d = 1 - s)")
     else:
+        # Vista por columnas de las mismas filas (no se copia la matriz)
         T = transponer(datos)
         tipos_col = tipificar_columnas(T)
         rangos_col = rangos_numericos(T, tipos_col)
@@ -1,396 +1,66 @@
-class XLSXtoCSV:
-
-    def __init__(self, input_file, output_file):
-        self.input_file = input_file
-        self.output_file = output_file
-
-
-    def leer_archivo(self):
-        with open(self.input_file, 'rb') as f:
-            return f.read()
-
-
-# ----------- Funciones para manejar ZIP ------------
-
-def es_zip(self, data):
-    # Los archivos ZIP comienzan con 0x50 0x4b 0x03 0x04
-    return data[0:4] == b'\x50\x4b\x03\x04'
-
-
-def parsear_cabeceras_zip(self, data):
-    archivos = {}
-    pos = 0
-    while pos < len(data):
-        if data[pos:pos + 4] != b'\x50\x4b\x03\x04':
-            break
-        header = data[pos:pos + 30]
-        if len(header) < 30:
-            break
-        comp_method = int.from_bytes(header[8:10], 'little')
-        comp_size = int.from_bytes(header[18:22], 'little')
-        uncomp_size = int.from_bytes(header[22:26], 'little')
-        fname_len = int.from_bytes(header[26:28], 'little')
-        extra_len = int.from_bytes(header[28:30], 'little')
-        name_start = pos + 30
-        name_end = name_start + fname_len
-        filename = data[name_start:name_end].decode('utf-8', errors='ignore')
-        data_start = name_end + extra_len
-        data_end = data_start + comp_size
-        filedata = data[data_start:data_end]
-
-        archivos[filename] = {
-            'compression_method': comp_method,
-            'compressed_data': filedata,
-            'uncompressed_size': uncomp_size
-        }
-        pos = data_end
-    return archivos
-
-
-# ----------- BitStream para DEFLATE ------------
-
-class BitStream:
-    def __init__(self, data):
-        self.data = data
-        self.bitpos = 0
-        self.bytepos = 0
-
-    def leer_bit(self):
-        if self.bytepos >= len(self.data):
-            return None
-        b = self.data[self.bytepos]
-        bit = (b >> self.bitpos) & 1
-        self.bitpos += 1
-        if self.bitpos == 8:
-            self.bitpos = 0
-            self.bytepos += 1
-        return bit
-
-    def leer_bits(self, n):
-        val = 0
-        for i in range(n):
-            bit = self.leer_bit()
-            if bit is None:
-                raise Exception("Fin inesperado de datos al leer bits")
-            val |= (bit << i)
-        return val
-
-
-# ----------- Funciones Huffman ------------
-
-def construir_tabla_huffman(self, longitudes):
-    max_len = max(longitudes) if longitudes else 0
-    bl_count = [0] * (max_len + 1)
-    for l in longitudes:
-        if l > 0:
-            bl_count[l] += 1
-    code = 0
-    next_code = [0] * (max_len + 1)
-    for bits in range(1, max_len + 1):
-        code = (code + bl_count[bits - 1]) << 1
-        next_code[bits] = code
-    table = {}
-    for n, length in enumerate(longitudes):
-        if length != 0:
-            code = next_code[length]
-            next_code[length] += 1
-            inv_code = 0
-            for i in range(length):
-                inv_code |= ((code >> i) & 1) << (length - 1 - i)
-            table[(inv_code, length)] = n
-    return table, max_len
-
-
-def leer_codigo_huffman(self, bs, tabla, max_len):
-    codigo = 0
-    for longitud in range(1, max_len + 1):
-        bit = bs.leer_bit()
-        if bit is None:
-            raise Exception("Fin inesperado en lectura huffman")
-        codigo |= (bit << (longitud - 1))
-        if (codigo, longitud) in tabla:
-            return tabla[(codigo, longitud)]
-    raise Exception("Codigo Huffman invalido")
-
-
-# ----------- DEFLATE ------------
-
-def descomprimir_deflate(self, data):
-    bs = self.BitStream(data)
-    salida = bytearray()
-    final = False
-
-    while not final:
-        final = bs.leer_bit()
-        tipo_bloque = bs.leer_bits(2)
-        if tipo_bloque == 0:
-            while bs.bitpos != 0:
-                bs.leer_bit()
-            len_bloque = bs.leer_bits(16)
-            nlen_bloque = bs.leer_bits(16)
-            if (len_bloque ^ 0xFFFF) != nlen_bloque:
-                raise Exception("LEN y NLEN no coinciden")
-            for _ in range(len_bloque):
-                b = bs.leer_bits(8)
-                salida.append(b)
-        elif tipo_bloque == 1:
-            salida.extend(self.descomprimir_huffman_fijo(bs))
-        elif tipo_bloque == 2:
-            salida.extend(self.descomprimir_huffman_dinamico(bs))
-        else:
-            raise Exception("Tipo de bloque desconocido")
-    return bytes(salida)
-
-
-def descomprimir_huffman_fijo(self, bs):
-    salida = bytearray()
-    long_lit = []
-    for i in range(288):
-        if i <= 143:
-            long_lit.append(8)
-        elif i <= 255:
-            long_lit.append(9)
-        elif i <= 279:
-            long_lit.append(7)
-        else:
-            long_lit.append(8)
-    tabla_lit, max_lit = self.construir_tabla_huffman(long_lit)
-    long_dist = [5] * 32
-    tabla_dist, max_dist = self.construir_tabla_huffman(long_dist)
-
-    while True:
-        simbolo = self.leer_codigo_huffman(bs, tabla_lit, max_lit)
-        if simbolo == 256:
-            break
-        elif simbolo < 256:
-            salida.append(simbolo)
-        else:
-            longitud = self.calcular_longitud(simbolo, bs)
-            distancia = self.calcular_distancia(bs, tabla_dist, max_dist)
-            for _ in range(longitud):
-                salida.append(salida[-distancia])
-    return salida
-
-
-def descomprimir_huffman_dinamico(self, bs):
-    salida = bytearray()
-    HLIT = bs.leer_bits(5) + 257
-    HDIST = bs.leer_bits(5) + 1
-    HCLEN = bs.leer_bits(4) + 4
-    orden_codigos_codigo = [16, 17, 18, 0, 8, 7, 9, 6, 10, 5, 11, 4, 12, 3, 13, 2, 14, 1, 15]
-    codigos_codigo_longitudes = [0] * 19
-    for i in range(HCLEN):
-        codigos_codigo_longitudes[orden_codigos_codigo[i]] = bs.leer_bits(3)
-    tabla_codigo_codigo, max_codigo_codigo = self.construir_tabla_huffman(codigos_codigo_longitudes)
-
-    def leer_codigo_codigo():
-        return self.leer_codigo_huffman(bs, tabla_codigo_codigo, max_codigo_codigo)
-
-    longitudes_ll = []
-    while len(longitudes_ll) < HLIT + HDIST:
-        c = leer_codigo_codigo()
-        if c <= 15:
-            longitudes_ll.append(c)
-        elif c == 16:
-            if not longitudes_ll: raise Exception("Error al repetir longitud")
-            rep = bs.leer_bits(2) + 3
-            longitudes_ll.extend([longitudes_ll[-1]] * rep)
-        elif c == 17:
-            rep = bs.leer_bits(3) + 3
-            longitudes_ll.extend([0] * rep)
-        elif c == 18:
-            rep = bs.leer_bits(7) + 11
-            longitudes_ll.extend([0] * rep)
-        else:
-            raise Exception("Codigo invalido en longitud huffman dinamico")
-
-    long_lit = longitudes_ll[:HLIT]
-    long_dist = longitudes_ll[HLIT:]
-    tabla_lit, max_lit = self.construir_tabla_huffman(long_lit)
-    tabla_dist, max_dist = self.construir_tabla_huffman(long_dist)
-
-    while True:
-        simbolo = self.leer_codigo_huffman(bs, tabla_lit, max_lit)
-        if simbolo == 256:
-            break
-        elif simbolo < 256:
-            salida.append(simbolo)
-        else:
-            longitud = self.calcular_longitud(simbolo, bs)
-            distancia = self.calcular_distancia(bs, tabla_dist, max_dist)
-            for _ in range(longitud):
-                salida.append(salida[-distancia])
-    return salida
-
-
-# ----------- Cálculos longitud y distancia ------------
-
-def calcular_longitud(self, simbolo, bs):
-    long_tabla = [3, 4, 5, 6, 7, 8, 9, 10, 11, 13, 15, 17, 19, 23, 27, 31, 35, 43, 51, 59, 67, 83, 99, 115, 131, 163,
-                  195, 227, 258]
-    extra_tabla = [0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 1, 1, 2, 2, 2, 2, 3, 3, 3, 3, 4, 4, 4, 4, 5, 5, 5, 5, 0]
-    index = simbolo - 257
-    if index < 0 or index >= len(long_tabla): raise Exception("Simbolo longitud invalido")
-    base = long_tabla[index]
-    extra = extra_tabla[index]
-    return base if extra == 0 else base + bs.leer_bits(extra)
-
-
-def calcular_distancia(self, bs, tabla_dist, max_dist):
-    dist_simbolo = self.leer_codigo_huffman(bs, tabla_dist, max_dist)
-    dist_tabla = [1, 2, 3, 4, 5, 7, 9, 13, 17, 25, 33, 49, 65, 97, 129, 193, 257, 385, 513, 769, 1025, 1537, 2049, 3073,
-                  4097, 6145, 8193, 12289, 16385, 24577]
-    dist_extra = [0, 0, 0, 0, 1, 1, 2, 2, 3, 3, 4, 4, 5, 5, 6, 6, 7, 7, 8, 8, 9, 9, 10, 10, 11, 11, 12, 12, 13, 13]
-    if dist_simbolo < 0 or dist_simbolo >= len(dist_tabla): raise Exception("Simbolo distancia invalido")
-    base = dist_tabla[dist_simbolo]
-    extra = dist_extra[dist_simbolo]
-    return base if extra == 0 else base + bs.leer_bits(extra)
-
-
-# ----------- Parseo XML minimalista ------------
-
-def parsear_sharedStrings(self, data):
-    strings = []
-    texto = data.decode('utf-8', errors='ignore')
-    pos = 0
-    while True:
-        start = texto.find("<t>", pos)
-        if start == -1: break
-        end = texto.find("</t>", start)
-        if end == -1: break
-        s = texto[start + 3:end]
-        strings.append(s)
-        pos = end + 4
-    return strings
-
-
-def parsear_sheet(self, data, shared_strings):
-    texto = data.decode('utf-8', errors='ignore')
-    filas = {}
-    pos = 0
-    while True:
-        start_c = texto.find("<c ", pos)
-        if start_c == -1: break
-        end_c = texto.find(">", start_c)
-        if end_c == -1: break
-        c_tag = texto[start_c:end_c + 1]
-        r_pos = c_tag.find("r=\"")
-        if r_pos == -1:
-            pos = end_c + 1
-            continue
-        r_start = r_pos + 3
-        r_end = c_tag.find("\"", r_start)
-        celda_ref = c_tag[r_start:r_end]
-        t_pos = c_tag.find("t=\"")
-        tipo = None
-        if t_pos != -1:
-            t_start = t_pos + 3
-            t_end = c_tag.find("\"", t_start)
-            tipo = c_tag[t_start:t_end]
-        v_start = texto.find("<v>", end_c)
-        if v_start == -1:
-            pos = end_c + 1
-            continue
-        v_end = texto.find("</v>", v_start)
-        if v_end == -1:
-            pos = end_c + 1
-            continue
-        valor = texto[v_start + 3:v_end]
-        if tipo == "s":
-            try:
-                valor = shared_strings[int(valor)]
-            except:
-                pass
-        fila, col = 0, 0
-        i_num = -1
-        for i, ch in enumerate(celda_ref):
-            if ch.isdigit():
-                i_num = i
-                break
-        if i_num != -1:
-            fila = int(celda_ref[i_num:])
-            col_ref = celda_ref[:i_num]
-        else:
-            fila = 1
-            col_ref = celda_ref
-        col = 0
-        for c in col_ref:
-            col = col * 26 + (ord(c.upper()) - ord('A') + 1)
-        if fila not in filas:
-            filas[fila] = {}
-        filas[fila][col] = valor
-        pos = v_end + 4
-
-    max_col = 0
-    for f in filas.values():
-        if f: max_col = max(max_col, max(f.keys()))
-
-    lineas = []
-    for f_num in sorted(filas.keys()):
-        fila_data = filas[f_num]
-        linea = [fila_data.get(c, "") for c in range(1, max_col + 1)]
-        lineas.append(linea)
-    return lineas
-
-
-# ----------- Método para guardar CSV ------------
-
-def guardar_csv(self, filas):
-    with open(self.output_file, 'w', encoding='utf-8') as f:
-        for fila in filas:
-            linea = ','.join(['"{}"'.format(str(x).replace('"', '""')) for x in fila])
-            f.write(linea + '\n')
-
-
-# ----------- Método principal ------------
-
-def procesar(self):
-    datos = self.leer_archivo()
-    if not self.es_zip(datos):
-        raise Exception("Archivo no es ZIP (xlsx)")
-
-    archivos = self.parsear_cabeceras_zip(datos)
-    shared_strings = []
-    if 'xl/sharedStrings.xml' in archivos:
-        ss_info = archivos['xl/sharedStrings.xml']
-        if ss_info['compression_method'] == 8:
-            shared_strings_bytes = self.descomprimir_deflate(ss_info['compressed_data'])
-        else:
-            shared_strings_bytes = ss_info['compressed_data']
-        shared_strings = self.parsear_sharedStrings(shared_strings_bytes)
-
-    if 'xl/worksheets/sheet1.xml' not in archivos:
-        raise Exception("No se encontró sheet1.xml en el XLSX")
-
-    sheet_info = archivos['xl/worksheets/sheet1.xml']
-    if sheet_info['compression_method'] == 8:
-        sheet_bytes = self.descomprimir_deflate(sheet_info['compressed_data'])
-    else:
-        sheet_bytes = sheet_info['compressed_data']
-
-    filas = self.parsear_sheet(sheet_bytes, shared_strings)
-    self.guardar_csv(filas)
+import csv
+import glob
+import io
+import json
+import os
+import sys
+import time
+from array import array
+
+try:
+    # Cuando se ejecuta desde la carpeta raíz del proyecto
+    from descompresor.ingesta import (
+        es_xlsx, detectar_separador, leer_xlsx_a_matriz, leer_muestra_lineas, leer_texto_lotes,
+        leer_texto_paralelo, partir_linea, FlujoConPrefijo, leer_flujo_lotes, ultimo_corte,
+    )
+    from descompresor.tabla import TablaColumnar, ColumnaNumerica
+    from descompresor.instantanea import EXTENSION, guardar_instantanea, leer_con_instantanea
+    from descompresor.momentos import (
+        MomentosColumna, AcumuladorMomentos, MomentosPorGrupo, momentos_archivos,
+    )
+    from descompresor.cuantiles import ESCALA_MAD, SketchKLL, mediana_y_mad
+    from descompresor.codificacion import TAM_PREFIJO, admite_cortes, detectar_en_prefijo, decodificar
+    from descompresor.modelo import ModeloEstandarizacion
+    from descompresor.indice_espacial import IndiceEspacial, indice_desde_lotes
+    from descompresor.Rms_lector import LectorXLSXCSVError
+except ImportError:
+    # Posible ejecución como módulo dentro de un paquete
+    from ..descompresor.ingesta import (
+        es_xlsx, detectar_separador, leer_xlsx_a_matriz, leer_muestra_lineas, leer_texto_lotes,
+        leer_texto_paralelo, partir_linea, FlujoConPrefijo, leer_flujo_lotes, ultimo_corte,
+    )
+    from ..descompresor.tabla import TablaColumnar, ColumnaNumerica
+    from ..descompresor.instantanea import EXTENSION, guardar_instantanea, leer_con_instantanea
+    from ..descompresor.momentos import (
+        MomentosColumna, AcumuladorMomentos, MomentosPorGrupo, momentos_archivos,
+    )
+    from ..descompresor.cuantiles import ESCALA_MAD, SketchKLL, mediana_y_mad
+    from ..descompresor.codificacion import TAM_PREFIJO, admite_cortes, detectar_en_prefijo, decodificar
+    from ..descompresor.modelo import ModeloEstandarizacion
+    from ..descompresor.indice_espacial import IndiceEspacial, indice_desde_lotes
+    from ..descompresor.Rms_lector import LectorXLSXCSVError
 
 
 # ==============================================================================
-#  PARTE 2: LÓGICA DE PROCESAMIENTO DE DATOS
-#
+#  LÓGICA DE PROCESAMIENTO DE DATOS
+#  (la lectura de XLSX y texto la hace el motor común descompresor.ingesta)
 # ==============================================================================
 
 # --- Constantes para la limpieza y lectura de datos ---
-POSIBLES_EXTENSIONES = ['', '.txt', '.csv', '.data', '.dat', '.xlsx']
-DELIMITADORES_COMUNES = [',', ';', '\t']
+POSIBLES_EXTENSIONES = ['', '.txt', '.csv', '.data', '.dat', '.xlsx',
+                        '.csv.gz', '.txt.gz', '.gz', '.bz2', '.xz']  # comprimidos: se leen como flujo
 VALORES_NULOS = ['na', 'null', 'none', 'n/a', 'vacio']
-
-# --- Gestión de archivos temporales (sin librerías) ---
-_contador_temporal_global = 0
-
-
-def generar_nombre_temporal():
-    """Genera un nombre de archivo temporal único usando un contador global."""
-    global _contador_temporal_global
-    _contador_temporal_global += 1
-    return "temp_xlsx_convert_{}.csv".format(_contador_temporal_global)
+EXTENSIONES_BINARIAS = ('.bin', '.f64')  # salida del modo por flujo en float64
+TAM_LOTE_XLSX = 50000
+# Nombres del centro y la escala al mostrar estadísticas
+ETIQUETAS_CLASICAS = ("Media", "Desv. Estándar")
+ETIQUETAS_ROBUSTAS = ("Mediana", "MAD escalado")
+# Filas que se muestran en la terminal; el resto va a archivo con guardar_resultados
+FILAS_PREVISTA = 10
+TAM_BLOQUE_SALIDA = 10000
+# Modo seguimiento: bytes leídos por vez y sufijo del archivo de estado
+TAM_BLOQUE_SEGUIMIENTO = 4 * 1024 * 1024
+EXTENSION_SEGUIMIENTO = ".seguimiento.json"
 
 
 def archivo_existe(nombre_archivo):
@@ -405,16 +75,6 @@ def archivo_existe(nombre_archivo):
         return True
 
 
-def eliminar_archivo_seguro(nombre_archivo):
-    """Intenta eliminar un archivo. Falla silenciosamente si no es posible."""
-    try:
-        # Vaciar el archivo es una forma de "eliminar" su contenido.
-        with open(nombre_archivo, 'w') as f:
-            f.write('')
-    except IOError:
-        pass  # Ignorar errores si el archivo no se puede escribir/encontrar.
-
-
 # --- Lógica de lectura y limpieza de datos ---
 
 def _intentar_convertir_a_numero(valor_str):
@@ -453,243 +113,1127 @@ def _procesar_valor_individual(valor_str):
     return _intentar_convertir_a_numero(valor_limpio)
 
 
-def leer_datos(nombre_archivo_base):
-    """
-    Lee datos de un archivo, manejando varias extensiones, delimitadores y convirtiendo XLSX.
-    """
-    # 1. Encontrar el archivo real
-    archivo_encontrado = None
+def encontrar_archivo(nombre_archivo_base):
+    """Prueba las extensiones comunes y devuelve el primer archivo que exista."""
     for ext in POSIBLES_EXTENSIONES:
         nombre_completo = nombre_archivo_base + ext
         if archivo_existe(nombre_completo):
-            archivo_encontrado = nombre_completo
-            break
-
-    if not archivo_encontrado:
-        raise FileNotFoundError(
-            "No se pudo encontrar el archivo '{}' con ninguna de las extensiones: {}".format(nombre_archivo_base,
-                                                                                             POSIBLES_EXTENSIONES))
-
-    # 2. Convertir XLSX a un CSV temporal si es necesario
-    archivo_temporal_csv = None
-    if archivo_encontrado.lower().endswith('.xlsx'):
-        archivo_temporal_csv = generar_nombre_temporal()
+            return nombre_completo
+
+    raise FileNotFoundError(
+        "No se pudo encontrar el archivo '{}' con ninguna de las extensiones: {}".format(nombre_archivo_base,
+                                                                                         POSIBLES_EXTENSIONES))
+
+
+def _es_fila_encabezado(valores):
+    """La primera fila es encabezado si ninguno de sus valores es un número."""
+    for v in valores:
+        if v is None:
+            continue
         try:
-            print("Detectado archivo XLSX. Convirtiendo '{}' a CSV...".format(archivo_encontrado))
-            convertidor = XLSXtoCSV(archivo_encontrado, archivo_temporal_csv)
-            convertidor.procesar()
-            print("Conversión exitosa. Procesando datos...")
-            archivo_a_leer = archivo_temporal_csv
-        except Exception as e:
-            if archivo_temporal_csv:
-                eliminar_archivo_seguro(archivo_temporal_csv)
-            raise Exception("Error al convertir archivo XLSX: {}".format(str(e)))
-    else:
-        archivo_a_leer = archivo_encontrado
+            float(v)
+            return False  # Si al menos uno es número, no es encabezado
+        except (ValueError, TypeError):
+            continue
+    return True
+
+
+def leer_datos(nombre_archivo_base):
+    """
+    Lee datos de un archivo, manejando varias extensiones, delimitadores y XLSX.
+    """
+    return _leer_datos_y_encabezado(nombre_archivo_base)[1]
 
-    # 3. Leer y procesar el archivo de texto (CSV, TXT, etc.)
-    try:
-        with open(archivo_a_leer, 'r', encoding='utf-8') as f:
-            lineas = f.readlines()
 
-        if not lineas:
+def _leer_datos_y_encabezado(nombre_archivo_base):
+    """Como leer_datos, pero devuelve (encabezado o None, datos)."""
+    # 1. Encontrar el archivo real
+    archivo_encontrado = encontrar_archivo(nombre_archivo_base)
+
+    # 2. Leer filas crudas con el motor común (XLSX directo, sin CSV temporal)
+    if es_xlsx(archivo_encontrado):
+        print("Detectado archivo XLSX '{}'. Procesando datos...".format(archivo_encontrado))
+        filas_crudas = leer_xlsx_a_matriz(archivo_encontrado, sheet_index=1)
+        if not filas_crudas:
+            raise ValueError("El archivo está vacío.")
+        es_encabezado = _es_fila_encabezado([v for v in filas_crudas[0] if str(v).strip()])
+    else:
+        muestra = leer_muestra_lineas(archivo_encontrado, 50)
+        if not muestra:
             raise ValueError("El archivo está vacío.")
+        sep = detectar_separador(muestra)
+        filas_crudas = leer_texto_paralelo(archivo_encontrado, sep)
+        # 3. Detección de encabezado (misma lógica original para mantener el resultado)
+        primera_linea_valores = muestra[0].strip().replace(',', ' ').replace(';', ' ').replace('\t', ' ').split()
+        es_encabezado = _es_fila_encabezado(primera_linea_valores)
+
+    encabezado = [str(v).strip() for v in filas_crudas[0]] if es_encabezado else None
+    datos_crudos = filas_crudas[1:] if es_encabezado else filas_crudas
+
+    # 4. Procesar cada fila y normalizar datos
+    datos_procesados = []
+    for fila in datos_crudos:
+        if not any(str(v).strip() for v in fila):
+            continue
+        datos_procesados.append([_procesar_valor_individual(v) for v in fila])
 
-        # 4. Detección de encabezado (misma lógica original para mantener el resultado)
-        primera_linea_valores = lineas[0].strip().replace(',', ' ').replace(';', ' ').replace('\t', ' ').split()
-        es_encabezado = True
-        for v in primera_linea_valores:
-            try:
-                float(v)
-                es_encabezado = False  # Si al menos uno es número, no es encabezado
-                break
-            except ValueError:
-                continue
-
-        datos_crudos = lineas[1:] if es_encabezado else lineas
-
-        # 5. Procesar cada fila y normalizar datos
-        datos_procesados = []
-        for linea in datos_crudos:
-            linea = linea.strip()
-            if not linea: continue
-
-            # Detección de delimitador
-            datos_fila = None
-            for delim in DELIMITADORES_COMUNES:
-                if delim in linea:
-                    datos_fila = linea.split(delim)
-                    break
-            if datos_fila is None:
-                datos_fila = linea.split()  # Espacio como último recurso
+    if not datos_procesados:
+        raise ValueError("No se encontraron datos válidos en el archivo.")
 
-            fila_limpia = [_procesar_valor_individual(v) for v in datos_fila]
-            datos_procesados.append(fila_limpia)
+    # 5. Normalizar la longitud de las filas
+    max_cols = 0
+    for fila in datos_procesados:
+        if len(fila) > max_cols:
+            max_cols = len(fila)
 
-        if not datos_procesados:
-            raise ValueError("No se encontraron datos válidos en el archivo.")
+    for fila in datos_procesados:
+        diferencia = max_cols - len(fila)
+        if diferencia > 0:
+            fila.extend([None] * diferencia)
 
-        # 6. Normalizar la longitud de las filas
-        max_cols = 0
-        for fila in datos_procesados:
-            if len(fila) > max_cols:
-                max_cols = len(fila)
+    return encabezado, datos_procesados
 
-        datos_normalizados = []
-        for fila in datos_procesados:
-            diferencia = max_cols - len(fila)
-            if diferencia > 0:
-                fila.extend([None] * diferencia)
-            datos_normalizados.append(fila)
 
-        return datos_normalizados
+def leer_datos_tabla(nombre_archivo_base):
+    """
+    Igual que leer_datos, pero devuelve una TablaColumnar tipada.
+    Una columna es numérica si al menos la mitad de sus valores lo son; el texto
+    suelto en una columna numérica queda como faltante (igual que antes, no
+    participaba en la media ni en la desviación).
+    Las columnas llevan los nombres del encabezado del archivo (col_1.. si no
+    tiene), así se pueden elegir por nombre, igual que en el modo por flujo.
+    Si el archivo no cambió desde la última lectura se usa su instantánea .tcol.
+    """
+    archivo = encontrar_archivo(nombre_archivo_base)
 
-    finally:
-        # 7. Limpiar archivo temporal si se creó
-        if archivo_temporal_csv:
-            eliminar_archivo_seguro(archivo_temporal_csv)
+    def construir():
+        encabezado, datos = _leer_datos_y_encabezado(archivo)
+        if encabezado is not None:
+            n = len(datos[0])
+            encabezado = [nm or "col_" + str(j + 1)
+                          for j, nm in enumerate((encabezado + [""] * n)[:n])]
+        return TablaColumnar.desde_filas(datos, encabezado, umbral_numerico=0.5)
 
+    return leer_con_instantanea(
+        archivo, {"lector": "programa1", "umbral_numerico": 0.5, "encabezado": True},
+        construir,
+    )
 
-# --- Funciones de cálculo estadístico ---
 
-def raiz_cuadrada_manual(numero):
-    """Calcula la raíz cuadrada usando el método de Newton (requerido por no usar librerías)."""
-    if numero < 0:
-        raise ValueError("No se puede calcular la raíz cuadrada de un número negativo.")
-    if numero == 0:
-        return 0
+def _encabezado_propio(tabla):
+    """Nombres de la tabla, o None si son los col_1.. que se inventan sin encabezado."""
+    if tabla.encabezado == ["col_" + str(j + 1) for j in range(tabla.n_columnas)]:
+        return None
+    return tabla.encabezado
 
-    x = numero
-    precision = 1e-10
-    while True:
-        raiz = 0.5 * (x + numero / x)
-        if abs(raiz - x) < precision:
-            break
-        x = raiz
-    return raiz
 
+# --- Funciones de cálculo estadístico ---
 
 def calcular_media(columna):
     """Calcula la media de una lista, ignorando valores no numéricos."""
-    numeros = [v for v in columna if isinstance(v, (int, float))]
-    if not numeros: return None
-    return sum(numeros) / len(numeros)
+    mom = MomentosColumna()
+    mom.agregar_valores(columna)
+    return mom.obtener_media()
 
 
-def calcular_desviacion_estandar(columna, media):
-    """Calcula la desviación estándar poblacional."""
-    numeros = [v for v in columna if isinstance(v, (int, float))]
-    if not numeros or media is None or len(numeros) < 2:
-        return 0.0 if len(numeros) == 1 else None
-
-    suma_dif_cuadrado = sum((valor - media) ** 2 for valor in numeros)
-    varianza = suma_dif_cuadrado / len(numeros)
-    return raiz_cuadrada_manual(varianza)
+def calcular_desviacion_estandar(columna, media=None):
+    """
+    Calcula la desviación estándar poblacional (una pasada, Welford).
+    'media' se acepta por compatibilidad; ya no hace falta calcularla antes.
+    """
+    mom = MomentosColumna()
+    mom.agregar_valores(columna)
+    return mom.desviacion()
 
 
-def calcular_puntaje_z(datos):
-    """Calcula los puntajes Z para cada columna numérica de la matriz de datos."""
-    if not datos or not datos[0]:
-        raise ValueError("Datos de entrada inválidos para el cálculo de puntaje Z.")
+def centro_y_escala_robustos(numeros):
+    """
+    Mediana y MAD escalado (ESCALA_MAD * MAD, comparable a la desviación estándar)
+    de una lista de números, con selección en tiempo lineal; (None, None) si está vacía.
+    """
+    centro, mad = mediana_y_mad(numeros)
+    if centro is None:
+        return None, None
+    return centro, ESCALA_MAD * mad
 
-    num_filas = len(datos)
-    num_cols = len(datos[0])
 
-    # 1. Transponer datos para trabajar por columnas
-    columnas = []
-    for i_col in range(num_cols):
-        columna = [datos[i_fila][i_col] for i_fila in range(num_filas)]
-        columnas.append(columna)
+def calcular_puntaje_z_tabla(tabla, robusto=False):
+    """
+    Puntajes Z sobre una TablaColumnar: trabaja directo con los array('d') de las
+    columnas numéricas (sin transponer ni filtrar con isinstance). Devuelve una
+    tabla nueva con las columnas estandarizadas; las categóricas se comparten.
+    Con robusto=True se usan mediana y MAD escalado en lugar de media y desviación.
+    """
+    if tabla.n_filas == 0 or tabla.n_columnas == 0:
+        raise ValueError("Datos de entrada inválidos para el cálculo de puntaje Z.")
 
-    # 2. Calcular media y desviación estándar para cada columna
     medias = []
     desv_est = []
-    for columna in columnas:
-        media = calcular_media(columna)
-        desviacion = calcular_desviacion_estandar(columna, media)
+    columnas_z = []
+    for col in tabla.columnas:
+        if col.tipo != "numerico":
+            medias.append(None)
+            desv_est.append(None)
+            columnas_z.append(col)
+            continue
+
+        if robusto:
+            media, desviacion = centro_y_escala_robustos([v for _, v in col.validos()])
+        else:
+            mom = MomentosColumna()
+            mom.agregar_valores(v for _, v in col.validos())
+            media = mom.obtener_media()
+            desviacion = mom.desviacion()
         medias.append(media)
         desv_est.append(desviacion)
 
-    # 3. Calcular puntajes Z
+        if media is not None and desviacion is not None and desviacion > 0:
+            col_z = ColumnaNumerica(col.nombre)
+            col_z.valores = array("d", [(v - media) / desviacion for v in col.valores])
+            col_z.faltantes = bytearray(col.faltantes)
+            col_z.n_faltantes = col.n_faltantes
+            columnas_z.append(col_z)
+        else:
+            columnas_z.append(col)  # Columnas sin varianza se mantienen
+
+    return TablaColumnar(tabla.encabezado, columnas_z), medias, desv_est
+
+
+def calcular_puntaje_z(datos, robusto=False, agrupar_por=None):
+    """
+    Calcula los puntajes Z para cada columna numérica de la matriz de datos.
+    Con robusto=True el centro es la mediana y la escala el MAD escalado, que no
+    se dejan arrastrar por valores atípicos (se devuelven en lugar de medias y
+    desviaciones).
+    agrupar_por: columna (índice 0-based, o nombre en una TablaColumnar) cuyos
+    valores definen grupos; cada grupo se estandariza con sus propias
+    estadísticas (ver calcular_puntaje_z_por_grupo).
+    """
+    if agrupar_por is not None:
+        return calcular_puntaje_z_por_grupo(datos, agrupar_por, robusto)
+    if isinstance(datos, TablaColumnar):
+        return calcular_puntaje_z_tabla(datos, robusto)
+    if not datos or not datos[0]:
+        raise ValueError("Datos de entrada inválidos para el cálculo de puntaje Z.")
+
+    num_cols = len(datos[0])
+
+    if robusto:
+        # 1. Mediana y MAD de cada columna (selección lineal, sin ordenar)
+        numeros = [[] for _ in range(num_cols)]
+        for fila in datos:
+            for lista, valor in zip(numeros, fila):
+                if isinstance(valor, (int, float)):
+                    lista.append(valor)
+        estadisticos = [centro_y_escala_robustos(lista) for lista in numeros]
+        medias = [c for c, _ in estadisticos]
+        desv_est = [e for _, e in estadisticos]
+    else:
+        # 1. Media y desviación estándar de cada columna en una sola pasada por filas
+        #    (Welford), sin transponer la matriz
+        acumulador = AcumuladorMomentos(num_cols)
+        acumulador.agregar_lote(datos)
+        medias = acumulador.medias()
+        desv_est = acumulador.desviaciones()
+
+    # 2. Calcular puntajes Z
+    matriz_z = [_fila_puntaje_z(fila, medias, desv_est) for fila in datos]
+
+    return matriz_z, medias, desv_est
+
+
+def calcular_puntaje_z_por_grupo(datos, agrupar_por, robusto=False):
+    """
+    Puntajes Z dentro de cada grupo (por tienda, por sensor...), sin partir el archivo:
+    1. Una pasada acumula las estadísticas de cada grupo en una tabla hash
+       (clave = valor de la columna de grupo; la memoria crece con los grupos).
+    2. Otra pasada estandariza cada fila con las estadísticas de su grupo.
+    La columna de grupo se deja tal cual. Devuelve (matriz_z, medias, desv_est),
+    donde medias y desv_est son dict {grupo: lista por columna}.
+    """
+    if isinstance(datos, TablaColumnar):
+        return _puntaje_z_tabla_por_grupo(datos, agrupar_por, robusto)
+    if not datos or not datos[0]:
+        raise ValueError("Datos de entrada inválidos para el cálculo de puntaje Z.")
+
+    num_cols = len(datos[0])
+    g = agrupar_por
+    if not isinstance(g, int) or not 0 <= g < num_cols:
+        raise ValueError("La columna de grupo no existe: {}".format(agrupar_por))
+
+    # 1. Estadísticas por grupo
+    if robusto:
+        numeros = {}
+        for fila in datos:
+            listas = numeros.get(fila[g])
+            if listas is None:
+                listas = [[] for _ in range(num_cols)]
+                numeros[fila[g]] = listas
+            for lista, valor in zip(listas, fila):
+                if isinstance(valor, (int, float)):
+                    lista.append(valor)
+        estadisticos = {}
+        for clave, listas in numeros.items():
+            pares = [centro_y_escala_robustos(lista) for lista in listas]
+            pares[g] = (None, None)
+            estadisticos[clave] = ([c for c, _ in pares], [e for _, e in pares])
+    else:
+        acumulador = MomentosPorGrupo(g, num_cols)
+        acumulador.agregar_lote(datos)
+        estadisticos = acumulador.estadisticos(num_cols)
+
+    # 2. Puntajes Z con las estadísticas del grupo de cada fila
     matriz_z = []
     for fila in datos:
-        fila_z = []
-        for i_col, valor in enumerate(fila):
-            media_col = medias[i_col]
-            desv_col = desv_est[i_col]
-
-            if isinstance(valor, (int, float)) and media_col is not None and desv_col is not None and desv_col > 0:
-                puntaje_z = (valor - media_col) / desv_col
-                fila_z.append(puntaje_z)
-            else:
-                fila_z.append(valor)  # Mantener valores no numéricos o de columnas sin varianza
-        matriz_z.append(fila_z)
+        medias_g, desv_g = estadisticos[fila[g]]
+        matriz_z.append(_fila_puntaje_z(fila, medias_g, desv_g))
 
+    medias = {clave: par[0] for clave, par in estadisticos.items()}
+    desv_est = {clave: par[1] for clave, par in estadisticos.items()}
     return matriz_z, medias, desv_est
 
 
+def _puntaje_z_tabla_por_grupo(tabla, agrupar_por, robusto):
+    """Versión columnar de calcular_puntaje_z_por_grupo: recorre cada array('d') dos veces."""
+    if tabla.n_filas == 0 or tabla.n_columnas == 0:
+        raise ValueError("Datos de entrada inválidos para el cálculo de puntaje Z.")
+    g = agrupar_por if isinstance(agrupar_por, int) else tabla.indice(agrupar_por)
+    if g is None or not 0 <= g < tabla.n_columnas:
+        raise ValueError("La columna de grupo no existe: {}".format(agrupar_por))
+
+    col_grupo = tabla.columna(g)
+    claves = [col_grupo.valor(i) for i in range(tabla.n_filas)]
+    medias = {}
+    desv_est = {}
+    for clave in claves:
+        if clave not in medias:
+            medias[clave] = [None] * tabla.n_columnas
+            desv_est[clave] = [None] * tabla.n_columnas
+
+    columnas_z = []
+    for j, col in enumerate(tabla.columnas):
+        if col.tipo != "numerico" or j == g:
+            columnas_z.append(col)
+            continue
+
+        # 1. Estadísticas de la columna en cada grupo
+        if robusto:
+            numeros = {}
+            for i, v in col.validos():
+                lista = numeros.get(claves[i])
+                if lista is None:
+                    lista = numeros[claves[i]] = []
+                lista.append(v)
+            for clave, lista in numeros.items():
+                medias[clave][j], desv_est[clave][j] = centro_y_escala_robustos(lista)
+        else:
+            momentos = {}
+            for i, v in col.validos():
+                mom = momentos.get(claves[i])
+                if mom is None:
+                    mom = momentos[claves[i]] = MomentosColumna()
+                mom.agregar(v)
+            for clave, mom in momentos.items():
+                medias[clave][j] = mom.obtener_media()
+                desv_est[clave][j] = mom.desviacion()
+
+        # 2. Estandarizar con las del grupo de cada fila (sin varianza: se mantiene)
+        valores = array("d", col.valores)
+        for i, clave in enumerate(claves):
+            media = medias[clave][j]
+            desviacion = desv_est[clave][j]
+            if media is not None and desviacion is not None and desviacion > 0:
+                valores[i] = (valores[i] - media) / desviacion
+        col_z = ColumnaNumerica(col.nombre)
+        col_z.valores = valores
+        col_z.faltantes = bytearray(col.faltantes)
+        col_z.n_faltantes = col.n_faltantes
+        columnas_z.append(col_z)
+
+    return TablaColumnar(tabla.encabezado, columnas_z), medias, desv_est
+
+
+def _fila_puntaje_z(fila, medias, desv_est):
+    """Puntajes Z de una fila con las medias y desviaciones ya calculadas."""
+    fila_z = []
+    for i_col, valor in enumerate(fila):
+        media_col = medias[i_col]
+        desv_col = desv_est[i_col]
+
+        if isinstance(valor, (int, float)) and media_col is not None and desv_col is not None and desv_col > 0:
+            puntaje_z = (valor - media_col) / desv_col
+            fila_z.append(puntaje_z)
+        else:
+            fila_z.append(valor)  # Mantener valores no numéricos o de columnas sin varianza
+    return fila_z
+
+# --- Modo por flujo (archivos que no caben en memoria) ---
+
+def _preparar_fila(fila):
+    """Celdas limpias de una fila cruda, o None si la fila está vacía."""
+    if not any(str(v).strip() for v in fila):
+        return None
+    return [_procesar_valor_individual(v) for v in fila]
+
+
+def _archivos_de_patron(nombre_archivo_base):
+    """Un patrón con comodines ('extractos/*.csv') da todos sus archivos, en orden."""
+    if any(c in nombre_archivo_base for c in "*?["):
+        archivos = sorted(glob.glob(nombre_archivo_base))
+        if not archivos:
+            raise FileNotFoundError("Ningún archivo coincide con '{}'".format(nombre_archivo_base))
+        return archivos
+    return [encontrar_archivo(nombre_archivo_base)]
+
+
+def _detectar_formato_texto(archivo):
+    """(separador, encabezado o None) de un archivo de texto, con la misma lógica que leer_datos."""
+    return _formato_de_muestra(leer_muestra_lineas(archivo, 50))
+
+
+def _formato_de_muestra(muestra):
+    """(separador, encabezado o None) a partir de las primeras líneas de una entrada."""
+    if not muestra:
+        raise ValueError("El archivo está vacío.")
+    sep = detectar_separador(muestra)
+    primera_linea_valores = muestra[0].strip().replace(',', ' ').replace(';', ' ').replace('\t', ' ').split()
+    if not _es_fila_encabezado(primera_linea_valores):
+        return sep, None
+    return sep, [str(v).strip() for v in partir_linea(muestra[0].strip(), sep)]
+
+
+def _lotes_datos(archivo):
+    """
+    Prepara la lectura por lotes de un archivo para el modo por flujo.
+    Devuelve (encabezado o None, generador de lotes de filas ya procesadas), con
+    la misma detección de encabezado y limpieza de celdas que leer_datos.
+    Los XLSX se leen enteros (su tamaño ya está acotado por Excel) y se recorren
+    por lotes; el texto y los comprimidos se leen por trozos del archivo.
+    """
+    if es_xlsx(archivo):
+        filas_crudas = leer_xlsx_a_matriz(archivo, sheet_index=1)
+        if not filas_crudas:
+            raise ValueError("El archivo está vacío.")
+        primera = filas_crudas[0]
+        encabezado = None
+        if _es_fila_encabezado([v for v in primera if str(v).strip()]):
+            encabezado = [str(v).strip() for v in primera]
+        inicio = 1 if encabezado else 0
+        lotes_crudos = (filas_crudas[i:i + TAM_LOTE_XLSX]
+                        for i in range(inicio, len(filas_crudas), TAM_LOTE_XLSX))
+        saltar = 0
+    else:
+        sep, encabezado = _detectar_formato_texto(archivo)
+        lotes_crudos = leer_texto_lotes(archivo, sep)
+        saltar = 1 if encabezado else 0
+
+    def lotes():
+        pendientes = saltar
+        for lote in lotes_crudos:
+            if pendientes:
+                lote = lote[pendientes:]
+                pendientes = 0
+            filas = [f for f in map(_preparar_fila, lote) if f is not None]
+            if filas:
+                yield filas
+
+    return encabezado, lotes()
+
+
+def calcular_estadisticas_archivos(archivos, procesos=None):
+    """
+    Medias y desviaciones por columna de uno o varios archivos sin cargarlos.
+    Los de texto se resumen en paralelo (trozos de archivo o archivos enteros) y
+    los parciales se combinan exactamente; los XLSX se recorren por lotes aquí.
+    Devuelve (encabezado del primer archivo o None, AcumuladorMomentos).
+    """
+    encabezado = None
+    acumulador = AcumuladorMomentos(0)
+    de_texto = []
+    for k, archivo in enumerate(archivos):
+        if es_xlsx(archivo):
+            enc, lotes = _lotes_datos(archivo)
+            for filas in lotes:
+                acumulador.ampliar(max(len(fila) for fila in filas))
+                acumulador.agregar_lote(filas)
+        else:
+            sep, enc = _detectar_formato_texto(archivo)
+            de_texto.append((archivo, sep, enc is not None))
+        if k == 0:
+            encabezado = enc
+    if de_texto:
+        acumulador.combinar(momentos_archivos(de_texto, procesos, preparar=_preparar_fila))
+    if encabezado:
+        acumulador.ampliar(len(encabezado))
+    return encabezado, acumulador
+
+
+def _cuantiles_columnas(lotes, centros=None):
+    """
+    Una pasada por los lotes con un SketchKLL (mediana aproximada) por columna.
+    Con 'centros' se estima la mediana de |x - centro| (el MAD) en lugar de la de x.
+    """
+    cuantiles = []
+    for filas in lotes:
+        ancho = max(len(fila) for fila in filas)
+        while len(cuantiles) < ancho:
+            cuantiles.append(SketchKLL())
+        for fila in filas:
+            for j, valor in enumerate(fila):
+                if isinstance(valor, (int, float)):
+                    cuantiles[j].agregar(valor if centros is None else abs(valor - centros[j]))
+    return cuantiles
+
+
+def ajustar_modelo(nombre_archivo_base, robusto=False, procesos=None):
+    """
+    Recorre el archivo (o patrón de archivos) sin cargarlo y devuelve un
+    ModeloEstandarizacion con el centro y la escala de cada columna:
+    - clásico: media y desviación; los trozos se resumen en paralelo y los
+      parciales se combinan (calcular_estadisticas_archivos).
+    - robusto: mediana y MAD escalado aproximados con SketchKLL (memoria acotada);
+      hacen falta dos pasadas en lugar de una y no se paralelizan.
+    """
+    archivos = _archivos_de_patron(nombre_archivo_base)
+    if not robusto:
+        encabezado, acumulador = calcular_estadisticas_archivos(archivos, procesos)
+        if not len(acumulador):
+            raise ValueError("No se encontraron datos válidos en el archivo.")
+        return ModeloEstandarizacion(acumulador.medias(), acumulador.desviaciones(),
+                                     encabezado, acumulador.conteos(), "clasico")
+
+    def lotes():
+        for archivo in archivos:
+            yield from _lotes_datos(archivo)[1]
+
+    encabezado = _lotes_datos(archivos[0])[0]
+    medianas = _cuantiles_columnas(lotes())
+    centros = [c.valor() for c in medianas]
+    mads = [c.valor() for c in _cuantiles_columnas(lotes(), centros)]
+    escalas = [None if m is None else ESCALA_MAD * m for m in mads]
+    conteos = [c.n for c in medianas]
+    faltan = (len(encabezado) if encabezado else 0) - len(medianas)
+    if faltan > 0:
+        centros += [None] * faltan
+        escalas += [None] * faltan
+        conteos += [0] * faltan
+    if not centros:
+        raise ValueError("No se encontraron datos válidos en el archivo.")
+    return ModeloEstandarizacion(centros, escalas, encabezado, conteos, "robusto")
+
+
+def _formato_salida(ruta_salida, formato):
+    if formato is None:
+        formato = "bin" if ruta_salida.lower().endswith(EXTENSIONES_BINARIAS) else "csv"
+    if formato not in ("csv", "bin"):
+        raise ValueError("Formato de salida no soportado: {}".format(formato))
+    if formato == "bin" and ruta_salida == "-":
+        raise ValueError("La salida binaria necesita un archivo, no la salida estándar.")
+    return formato
+
+
+def _escribir_puntajes(lotes_z, ruta_salida, formato, encabezado=None):
+    """
+    Escribe lotes de filas de puntajes Z a medida que llegan y devuelve cuántas
+    filas escribió. ruta_salida "-" es la salida estándar (solo CSV).
+    formato: "csv" (celdas de texto tal cual y faltantes vacías) o "bin"
+    (float64 en el orden nativo de la máquina, fila por fila, NaN en faltantes y texto).
+    """
+    n_filas = 0
+    if formato == "csv":
+        if ruta_salida == "-":
+            salida = sys.stdout
+        else:
+            salida = open(ruta_salida, "w", newline="", encoding="utf-8")
+        try:
+            escritor = csv.writer(salida)
+            if encabezado:
+                escritor.writerow(encabezado)
+            for filas_z in lotes_z:
+                escritor.writerows(filas_z)
+                n_filas += len(filas_z)
+        finally:
+            if salida is not sys.stdout:
+                salida.close()
+    else:
+        nan = float("nan")
+        with open(ruta_salida, "wb") as salida:
+            for filas_z in lotes_z:
+                valores = array("d")
+                for fila_z in filas_z:
+                    valores.extend(float(v) if isinstance(v, (int, float)) else nan for v in fila_z)
+                valores.tofile(salida)
+                n_filas += len(filas_z)
+    return n_filas
+
+
+def calcular_puntaje_z_a_archivo(nombre_archivo_base, ruta_salida, formato=None, procesos=None,
+                                 robusto=False, ruta_modelo=None, agrupar_por=None):
+    """
+    Puntajes Z sin cargar el archivo en memoria, en dos pasadas:
+    1. Ajusta el modelo (centro y escala por columna, ver ajustar_modelo).
+    2. Vuelve a recorrer el archivo y escribe cada lote estandarizado en 'ruta_salida'.
+    La memoria queda acotada por el tamaño del lote, no por el del archivo.
+    nombre_archivo_base puede ser un patrón ('extractos/*.csv'): las estadísticas
+    son las de todos los archivos juntos y la salida los concatena en orden.
+    formato: "csv" o "bin" (ver _escribir_puntajes); None = según la extensión.
+    ruta_modelo: si se da, el modelo ajustado se guarda ahí para puntuar datos nuevos.
+    agrupar_por: columna de grupo (índice 0-based o nombre del encabezado); ver
+    _puntaje_z_a_archivo_por_grupo.
+    Devuelve (n_filas, n_columnas, medias, desv_est, conteos).
+    """
+    formato = _formato_salida(ruta_salida, formato)
+    archivos = _archivos_de_patron(nombre_archivo_base)
+    if agrupar_por is not None:
+        if robusto or ruta_modelo:
+            raise ValueError("Por flujo, los grupos solo admiten el puntaje Z clásico y sin modelo guardado.")
+        return _puntaje_z_a_archivo_por_grupo(archivos, ruta_salida, formato, agrupar_por)
+    modelo = ajustar_modelo(nombre_archivo_base, robusto, procesos)
+    if ruta_modelo:
+        modelo.guardar(ruta_modelo)
+    num_cols = modelo.n_columnas
+    medias, desv_est = modelo.centros, modelo.escalas
+
+    def lotes_z():
+        for archivo in archivos:
+            for filas in _lotes_datos(archivo)[1]:
+                yield list(_lote_puntaje_z(filas, num_cols, medias, desv_est))
+
+    encabezado = None
+    if modelo.encabezado:
+        encabezado = modelo.encabezado + [""] * (num_cols - len(modelo.encabezado))
+    n_filas = _escribir_puntajes(lotes_z(), ruta_salida, formato, encabezado)
+    if n_filas == 0:
+        raise ValueError("No se encontraron datos válidos en el archivo.")
+
+    return n_filas, num_cols, medias, desv_est, modelo.conteos
+
+
+def _puntaje_z_a_archivo_por_grupo(archivos, ruta_salida, formato, agrupar_por):
+    """
+    Puntajes Z por grupo en dos pasadas por flujo: la primera acumula un
+    AcumuladorMomentos por grupo (MomentosPorGrupo), la segunda estandariza cada
+    fila con el de su grupo. La memoria depende de la cantidad de grupos.
+    Devuelve lo mismo que calcular_puntaje_z_a_archivo, con medias, desv_est y
+    conteos como dict {grupo: lista por columna}.
+    """
+    encabezado = _lotes_datos(archivos[0])[0]
+    g = agrupar_por
+    if not isinstance(g, int):
+        nombres = [str(nm).lower() for nm in encabezado or []]
+        if str(agrupar_por).lower() not in nombres:
+            raise ValueError("La columna de grupo no existe: {}".format(agrupar_por))
+        g = nombres.index(str(agrupar_por).lower())
+
+    def lotes():
+        for archivo in archivos:
+            yield from _lotes_datos(archivo)[1]
+
+    # 1. Primera pasada: momentos por grupo
+    acumulador = MomentosPorGrupo(g)
+    for filas in lotes():
+        acumulador.agregar_lote(filas)
+    if not len(acumulador):
+        raise ValueError("No se encontraron datos válidos en el archivo.")
+    num_cols = max(len(acc) for acc in acumulador.grupos.values())
+    num_cols = max(num_cols, len(encabezado) if encabezado else 0)
+    estadisticos = acumulador.estadisticos(num_cols)
+
+    # 2. Segunda pasada: cada fila con las estadísticas de su grupo
+    def lotes_z():
+        for filas in lotes():
+            filas_z = []
+            for fila in filas:
+                if len(fila) < num_cols:
+                    fila.extend([None] * (num_cols - len(fila)))
+                medias_g, desv_g = estadisticos[fila[g]]
+                filas_z.append(_fila_puntaje_z(fila, medias_g, desv_g))
+            yield filas_z
+
+    if encabezado:
+        encabezado = encabezado + [""] * (num_cols - len(encabezado))
+    n_filas = _escribir_puntajes(lotes_z(), ruta_salida, formato, encabezado)
+    medias = {clave: par[0] for clave, par in estadisticos.items()}
+    desv_est = {clave: par[1] for clave, par in estadisticos.items()}
+    conteos = {clave: acc.conteos() for clave, acc in acumulador.grupos.items()}
+    return n_filas, num_cols, medias, desv_est, conteos
+
+# --- Puntuar datos nuevos con un modelo guardado ---
+
+def _lotes_entrada_estandar(flujo=None):
+    """
+    (encabezado o None, lotes de filas procesadas) leyendo la entrada estándar
+    por trozos. El separador, el encabezado y la codificación se detectan con un
+    prefijo que después se vuelve a entregar al parser.
+    """
+    if flujo is None:
+        flujo = sys.stdin.buffer
+    prefijo = flujo.read(TAM_PREFIJO)
+    codificacion = detectar_en_prefijo(prefijo)
+    lineas = decodificar(prefijo, codificacion).splitlines()
+    if len(prefijo) == TAM_PREFIJO and len(lineas) > 1:
+        lineas = lineas[:-1]  # la última puede estar cortada
+    sep, encabezado = _formato_de_muestra([l for l in lineas if l.strip()][:50])
+    lotes_crudos = leer_flujo_lotes(FlujoConPrefijo(prefijo, flujo), sep, codificacion)
+
+    def lotes():
+        pendientes = 1 if encabezado else 0
+        for lote in lotes_crudos:
+            if pendientes:
+                lote = lote[pendientes:]
+                pendientes = 0
+            filas = [f for f in map(_preparar_fila, lote) if f is not None]
+            if filas:
+                yield filas
+
+    return encabezado, lotes()
+
+
+def puntuar_con_modelo(modelo, entrada, ruta_salida="-", formato=None):
+    """
+    Estandariza datos nuevos con un modelo ya ajustado, lote a lote y sin
+    recalcular estadísticas.
+    - modelo: ModeloEstandarizacion o ruta de su archivo.
+    - entrada: archivo, patrón ('diarios/*.csv') o "-" para la entrada estándar.
+    - ruta_salida: archivo .csv / .bin o "-" para la salida estándar (CSV).
+    Las columnas se emparejan con las del modelo por nombre si ambos tienen
+    encabezado y si no por posición. Devuelve el número de filas puntuadas.
+    """
+    if not isinstance(modelo, ModeloEstandarizacion):
+        modelo = ModeloEstandarizacion.cargar(modelo)
+    formato = _formato_salida(ruta_salida, formato)
+    if entrada == "-":
+        fuentes = [_lotes_entrada_estandar()]
+    else:
+        fuentes = (_lotes_datos(archivo) for archivo in _archivos_de_patron(entrada))
+
+    encabezado_salida = []
+
+    def lotes_z():
+        for encabezado, lotes in fuentes:
+            if encabezado and not encabezado_salida:
+                encabezado_salida.extend(encabezado)
+            centros, escalas = modelo.estadisticos_para(encabezado)
+            for filas in lotes:
+                ancho = max(len(fila) for fila in filas)
+                if ancho > len(centros):
+                    centros = centros + [None] * (ancho - len(centros))
+                    escalas = escalas + [None] * (ancho - len(escalas))
+                yield list(_lote_puntaje_z(filas, len(centros), centros, escalas))
+
+    lotes = lotes_z()
+    primero = next(lotes, None)  # fija el encabezado de la salida antes de escribir
+    if primero is None:
+        raise ValueError("No se encontraron datos válidos en la entrada.")
+    return _escribir_puntajes(_encadenar_lotes(primero, lotes), ruta_salida, formato,
+                              encabezado_salida or None)
+
+
+def _encadenar_lotes(primero, resto):
+    yield primero
+    yield from resto
+
+
+def _lote_puntaje_z(filas, num_cols, medias, desv_est):
+    for fila in filas:
+        diferencia = num_cols - len(fila)
+        if diferencia > 0:
+            fila.extend([None] * diferencia)
+        yield _fila_puntaje_z(fila, medias, desv_est)
+
+
+# --- Modo seguimiento (archivos que crecen) ---
+
+class SeguimientoCSV:
+    """
+    Sigue un archivo de texto al que se le agregan filas al final (p. ej. un
+    sensor que escribe todo el día). Recuerda hasta qué byte leyó y los momentos
+    acumulados de cada columna, así que cada actualización solo parsea las
+    líneas nuevas y cuesta en proporción a ellas. El último registro, si todavía
+    no termina en salto de línea (fuera de comillas), se deja para la próxima vez.
+    El estado se guarda en un JSON pequeño para continuar en otra ejecución.
+    Si el archivo se truncó o se reemplazó, se empieza de nuevo desde el inicio.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self.offset = 0
+        self.inodo = None
+        self.sep = None
+        self.codificacion = None
+        self.encabezado = None
+        self.acumulador = AcumuladorMomentos(0)
+
+    # ----------- Estado en disco ------------
+
+    def a_dict(self):
+        return {
+            "version": 1,
+            "ruta": self.ruta,
+            "offset": self.offset,
+            "inodo": self.inodo,
+            "sep": self.sep,
+            "codificacion": self.codificacion,
+            "encabezado": self.encabezado,
+            "momentos": [[m.n, m.media, m.m2] for m in self.acumulador.columnas],
+        }
+
+    def guardar(self, ruta_estado):
+        temporal = ruta_estado + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(self.a_dict(), f)
+        os.replace(temporal, ruta_estado)
+
+    @classmethod
+    def cargar(cls, ruta, ruta_estado):
+        """Estado guardado de 'ruta', o uno nuevo si no hay (o es de otro archivo)."""
+        seguimiento = cls(ruta)
+        try:
+            with open(ruta_estado, "r", encoding="utf-8") as f:
+                datos = json.load(f)
+        except (OSError, ValueError):
+            return seguimiento
+        if datos.get("version") != 1 or datos.get("ruta") != ruta:
+            return seguimiento
+        seguimiento.offset = datos["offset"]
+        seguimiento.inodo = datos["inodo"]
+        seguimiento.sep = datos["sep"]
+        seguimiento.codificacion = datos["codificacion"]
+        seguimiento.encabezado = datos["encabezado"]
+        seguimiento.acumulador.columnas = [MomentosColumna(*m) for m in datos["momentos"]]
+        return seguimiento
+
+    # ----------- Actualización ------------
+
+    def _preparar_inicio(self):
+        """Separador, encabezado y codificación, mirando el comienzo del archivo."""
+        with open(self.ruta, "rb") as f:
+            prefijo = f.read(TAM_PREFIJO)
+        if b"\n" not in prefijo:
+            return False  # Todavía no hay una línea completa
+        codificacion = detectar_en_prefijo(prefijo)
+        if not admite_cortes(codificacion):
+            raise ValueError("El modo seguimiento no admite archivos UTF-16.")
+        self.sep, self.encabezado = _detectar_formato_texto(self.ruta)
+        self.codificacion = codificacion
+        return True
+
+    def actualizar(self):
+        """
+        Lee lo agregado desde la última vez, actualiza los momentos y devuelve
+        los puntajes Z de las filas nuevas (con las estadísticas ya actualizadas).
+        """
+        estado = os.stat(self.ruta)
+        if (self.inodo is not None and estado.st_ino != self.inodo) or estado.st_size < self.offset:
+            self._reiniciar()  # Rotado o truncado
+        self.inodo = estado.st_ino
+        if estado.st_size == self.offset:
+            return []
+        if self.sep is None and not self._preparar_inicio():
+            return []
+
+        filas_nuevas = []
+        saltar_encabezado = self.offset == 0 and self.encabezado is not None
+        with open(self.ruta, "rb") as f:
+            f.seek(self.offset)
+            resto = b""
+            while True:
+                bloque = f.read(TAM_BLOQUE_SEGUIMIENTO)
+                if not bloque:
+                    break
+                datos = resto + bloque if resto else bloque
+                # Un salto dentro de un campo entrecomillado no cierra el registro
+                corte = ultimo_corte(datos)
+                if corte == 0:
+                    resto = datos
+                    continue
+                for lote in leer_flujo_lotes(io.BytesIO(datos[:corte]), self.sep, self.codificacion):
+                    if saltar_encabezado:
+                        lote = lote[1:]
+                        saltar_encabezado = False
+                    filas_nuevas.extend(f for f in map(_preparar_fila, lote) if f is not None)
+                self.offset += corte
+                resto = datos[corte:]
+
+        if not filas_nuevas:
+            return []
+        self.acumulador.ampliar(max(len(fila) for fila in filas_nuevas))
+        self.acumulador.agregar_lote(filas_nuevas)
+        num_cols = len(self.acumulador)
+        return list(_lote_puntaje_z(filas_nuevas, num_cols, self.acumulador.medias(),
+                                    self.acumulador.desviaciones()))
+
+
+def seguir_archivo(nombre_archivo, ruta_salida=None, intervalo=None, ruta_estado=None):
+    """
+    Modo seguimiento: estandariza solo las filas agregadas desde la última vez.
+    - ruta_salida: CSV al que se agregan los puntajes Z nuevos (None = terminal,
+      con la misma vista previa acotada que mostrar_resultados).
+    - intervalo: segundos entre revisiones; None = una sola actualización (para
+      llamarlo periódicamente desde fuera, p. ej. cron).
+    - ruta_estado: dónde se guarda el estado (por defecto <archivo>.seguimiento.json).
+    """
+    archivo = encontrar_archivo(nombre_archivo)
+    if ruta_estado is None:
+        ruta_estado = archivo + EXTENSION_SEGUIMIENTO
+    seguimiento = SeguimientoCSV.cargar(archivo, ruta_estado)
+    while True:
+        filas_z = seguimiento.actualizar()
+        if filas_z:
+            if ruta_salida:
+                nuevo = not archivo_existe(ruta_salida)
+                with open(ruta_salida, "a", newline="", encoding="utf-8") as salida:
+                    escritor = csv.writer(salida)
+                    if nuevo and seguimiento.encabezado:
+                        escritor.writerow(seguimiento.encabezado)
+                    escritor.writerows(filas_z)
+            else:
+                sys.stdout.write("\n".join(_bloque_prevista(
+                    "PUNTAJES Z DE LAS FILAS NUEVAS:", filas_z[:FILAS_PREVISTA], len(filas_z),
+                    _formatear_z)) + "\n")
+            medias = seguimiento.acumulador.medias()
+            desv_est = seguimiento.acumulador.desviaciones()
+            mostrar_estadisticas(medias, desv_est, seguimiento.acumulador.conteos())
+        # El estado se guarda recién con las filas ya escritas: si la escritura
+        # falla, la próxima ejecución vuelve a leerlas
+        seguimiento.guardar(ruta_estado)
+        if intervalo is None:
+            return len(filas_z)
+        time.sleep(intervalo)
+
+
+# --- Índice de vecinos más cercanos ---
+
+def construir_indice(nombre_archivo_base, ruta_modelo=None, robusto=False, tipo=None):
+    """
+    IndiceEspacial (KD o de bolas, ver descompresor.indice_espacial) sobre las
+    columnas numéricas estandarizadas del archivo o patrón. Usa el modelo
+    guardado si se indica; si no, lo ajusta con ajustar_modelo. Las filas se
+    leen por lotes; los ids son los números de fila (0-based) de los datos.
+    """
+    if ruta_modelo:
+        modelo = ModeloEstandarizacion.cargar(ruta_modelo)
+    else:
+        modelo = ajustar_modelo(nombre_archivo_base, robusto=robusto)
+    archivos = _archivos_de_patron(nombre_archivo_base)
+    encabezado = _lotes_datos(archivos[0])[0]
+    centros, escalas = modelo.estadisticos_para(encabezado)
+
+    def lotes():
+        for archivo in archivos:
+            yield from _lotes_datos(archivo)[1]
+
+    return indice_desde_lotes(lotes(), centros, escalas, encabezado, tipo)
+
+
+def buscar_vecinos(indice, entrada, ruta_salida="-", k=5, radio=None):
+    """
+    Vecinos de cada fila de 'entrada' (archivo, patrón o "-" para la entrada
+    estándar) en un índice ya construido (o la ruta de su archivo .tidx).
+    Con radio se devuelven todos los que están a esa distancia o menos; si no,
+    los k más cercanos. Escribe CSV (fila_consulta, fila_vecina, distancia), una
+    línea por vecino y con filas numeradas desde 1. Devuelve las filas consultadas.
+    """
+    if not isinstance(indice, IndiceEspacial):
+        indice = IndiceEspacial.cargar(indice)
+    if entrada == "-":
+        fuentes = [_lotes_entrada_estandar()]
+    else:
+        fuentes = (_lotes_datos(archivo) for archivo in _archivos_de_patron(entrada))
+
+    salida = sys.stdout if ruta_salida == "-" else open(ruta_salida, "w", newline="", encoding="utf-8")
+    n_consulta = 0
+    try:
+        escritor = csv.writer(salida)
+        escritor.writerow(["fila_consulta", "fila_vecina", "distancia"])
+        for encabezado, lotes in fuentes:
+            posiciones = indice.alinear(encabezado)
+            for filas in lotes:
+                for fila in filas:
+                    n_consulta += 1
+                    q = indice.vector_consulta(fila, posiciones)
+                    if q is None:
+                        continue  # le falta alguna columna del índice
+                    if radio is not None:
+                        vecinos = indice.en_radio(q, radio)
+                    else:
+                        vecinos = indice.vecinos(q, k)
+                    escritor.writerows([n_consulta, i + 1, d] for i, d in vecinos)
+    finally:
+        if salida is not sys.stdout:
+            salida.close()
+    return n_consulta
+
 # --- Presentación de resultados ---
 
-def mostrar_resultados(datos_originales, matriz_z, medias, desv_est):
-    """Muestra los resultados de forma clara y formateada, idéntica al original."""
-    num_cols = len(datos_originales[0]) if datos_originales else 0
+def _formatear_original(valor):
+    if valor is None:
+        return "    N/A "
+    if isinstance(valor, (int, float)):
+        return "{:8.3f}".format(valor)
+    return "{:>8s}".format(str(valor))
+
+
+def _formatear_z(valor):
+    if valor is None:
+        return "    N/A "
+    if isinstance(valor, (int, float)):
+        # Lógica de formato idéntica a la original
+        if abs(valor) < 10:
+            return "{:8.3f}".format(valor)
+        return "{:8.1f}".format(valor)
+    return "{:>8s}".format(str(valor))
+
+
+def _filas_prevista(datos, n):
+    """Primeras n filas de una lista de filas o de una TablaColumnar (sin recorrer el resto)."""
+    if isinstance(datos, TablaColumnar):
+        return [datos.fila(i) for i in range(min(n, datos.n_filas))]
+    return datos[:n]
+
+
+def _bloque_prevista(titulo, filas, total, formatear):
+    """Líneas de una vista previa acotada, para escribirlas de una sola vez."""
+    lineas = ["\n" + titulo]
+    for i, fila in enumerate(filas):
+        lineas.append("Fila {:2d}: {}".format(i + 1, ' '.join(formatear(v) for v in fila)))
+    if total > len(filas):
+        lineas.append("... ({} filas más)".format(total - len(filas)))
+    return lineas
+
+
+def mostrar_resultados(datos_originales, matriz_z, medias, desv_est, etiquetas=ETIQUETAS_CLASICAS,
+                       max_filas=FILAS_PREVISTA):
+    """
+    Muestra una vista previa de los resultados (como mucho max_filas filas de los
+    datos y de los puntajes Z, con el formato original) y las estadísticas por
+    columna. Las matrices completas se escriben a archivo con guardar_resultados.
+    'etiquetas' nombra el centro y la escala (ETIQUETAS_ROBUSTAS en modo robusto).
+    """
+    tabla_original = datos_originales if isinstance(datos_originales, TablaColumnar) else None
     num_filas = len(datos_originales)
+    if tabla_original is not None:
+        num_cols = tabla_original.n_columnas
+    else:
+        num_cols = len(datos_originales[0]) if datos_originales else 0
 
-    print("=" * 60)
-    print("RESULTADOS DEL CÁLCULO DE PUNTAJE Z")
-    print("=" * 60)
-
-    print("\nDATOS ORIGINALES:")
-    for i, fila in enumerate(datos_originales):
-        fila_formateada = []
-        for valor in fila:
-            if valor is None:
-                fila_formateada.append("    N/A ")
-            elif isinstance(valor, (int, float)):
-                fila_formateada.append("{:8.3f}".format(valor))
-            else:
-                fila_formateada.append("{:>8s}".format(str(valor)))
-        print("Fila {:2d}: {}".format(i + 1, ' '.join(fila_formateada)))
+    salida = sys.stdout
+    lineas = ["=" * 60, "RESULTADOS DEL CÁLCULO DE PUNTAJE Z", "=" * 60]
+    lineas += _bloque_prevista("DATOS ORIGINALES:", _filas_prevista(datos_originales, max_filas),
+                               num_filas, _formatear_original)
+    salida.write("\n".join(lineas) + "\n")
 
-    print("\nESTADÍSTICAS POR COLUMNA:")
+    if isinstance(medias, dict):
+        mostrar_estadisticas(medias, desv_est, etiquetas=etiquetas)
+        num_cols = 0  # Por grupos no se repite el conteo por columna
+    else:
+        print("\nESTADÍSTICAS POR COLUMNA:")
     for i_col in range(num_cols):
         media = medias[i_col]
         desviacion = desv_est[i_col]
 
-        # Conteo de tipos (más eficiente que en el original)
-        num_numericos = 0
-        num_no_numericos = 0
-        for i_fila in range(num_filas):
-            valor = datos_originales[i_fila][i_col]
-            if isinstance(valor, (int, float)):
-                num_numericos += 1
-            else:
-                num_no_numericos += 1
+        # Conteo de tipos: con la tabla sale de sus columnas, sin recorrer filas
+        col = tabla_original.columna(i_col) if tabla_original is not None else None
+        if col is not None and col.tipo == "numerico":
+            num_numericos = num_filas - col.n_faltantes
+            num_no_numericos = col.n_faltantes
+        elif col is not None:
+            num_numericos = 0
+            num_no_numericos = num_filas
+        else:
+            num_numericos = 0
+            num_no_numericos = 0
+            for fila in datos_originales:
+                if isinstance(fila[i_col], (int, float)):
+                    num_numericos += 1
+                else:
+                    num_no_numericos += 1
 
         if media is not None and desviacion is not None:
-            print("Columna {:2d}: Media = {:10.6f}, Desv. Estándar = {:10.6f}".format(i_col + 1, media, desviacion))
+            print("Columna {:2d}: {} = {:10.6f}, {} = {:10.6f}".format(
+                i_col + 1, etiquetas[0], media, etiquetas[1], desviacion))
             print("            ({} valores numéricos, {} valores de texto)".format(num_numericos, num_no_numericos))
         else:
             print("Columna {:2d}: Sin datos numéricos para calcular estadísticas".format(i_col + 1))
             print("            ({} valores numéricos, {} valores de texto)".format(num_numericos, num_no_numericos))
 
-    print("\nMATRIZ DE PUNTAJES Z:")
-    for i, fila in enumerate(matriz_z):
-        fila_formateada = []
-        for valor in fila:
-            if valor is None:
-                fila_formateada.append("    N/A ")
-            elif isinstance(valor, (int, float)):
-                # Lógica de formato idéntica a la original
-                if abs(valor) < 10:
-                    fila_formateada.append("{:8.3f}".format(valor))
-                else:
-                    fila_formateada.append("{:8.1f}".format(valor))
+    lineas = _bloque_prevista("MATRIZ DE PUNTAJES Z:", _filas_prevista(matriz_z, max_filas),
+                              len(matriz_z), _formatear_z)
+    lineas.append("\n" + "=" * 60)
+    salida.write("\n".join(lineas) + "\n")
+
+
+def _bloques_tabla(tabla, tam_bloque=TAM_BLOQUE_SALIDA):
+    """Lotes de filas (tuplas) de una TablaColumnar, armados columna a columna."""
+    for inicio in range(0, tabla.n_filas, tam_bloque):
+        fin = min(inicio + tam_bloque, tabla.n_filas)
+        columnas = []
+        for col in tabla.columnas:
+            if col.tipo == "numerico":
+                valores = col.valores[inicio:fin].tolist()
+                if col.n_faltantes:
+                    for i in range(inicio, fin):
+                        if col.es_faltante(i):
+                            valores[i - inicio] = None
             else:
-                fila_formateada.append("{:>8s}".format(str(valor)))
-        print("Fila {:2d}: {}".format(i + 1, ' '.join(fila_formateada)))
+                categorias = col.categorias
+                valores = [categorias[c] if c >= 0 else None for c in col.codigos[inicio:fin]]
+            columnas.append(valores)
+        yield list(zip(*columnas))
+
+
+def guardar_resultados(matriz_z, ruta_salida, formato=None):
+    """
+    Escribe la matriz de puntajes Z completa en bloques grandes, sin pasar por
+    la terminal. Formato según la extensión (o 'formato'):
+    - .tcol: tabla columnar binaria (la misma instantánea que usa la caché;
+      se vuelve a abrir con descompresor.instantanea.cargar_instantanea).
+    - .bin / .f64: float64 fila por fila (ver _escribir_puntajes).
+    - otro: CSV.
+    Devuelve el número de filas escritas.
+    """
+    if formato is None and ruta_salida.lower().endswith(EXTENSION):
+        formato = "tcol"
+    if formato == "tcol":
+        tabla = matriz_z
+        if not isinstance(tabla, TablaColumnar):
+            tabla = TablaColumnar.desde_filas(matriz_z, umbral_numerico=0.5)
+        guardar_instantanea(tabla, ruta_salida, {"contenido": "puntajes_z"})
+        return tabla.n_filas
+
+    formato = _formato_salida(ruta_salida, formato)
+    if isinstance(matriz_z, TablaColumnar):
+        return _escribir_puntajes(_bloques_tabla(matriz_z), ruta_salida, formato, matriz_z.encabezado)
+    bloques = (matriz_z[i:i + TAM_BLOQUE_SALIDA] for i in range(0, len(matriz_z), TAM_BLOQUE_SALIDA))
+    return _escribir_puntajes(bloques, ruta_salida, formato)
+
+
+def _mostrar_lineas_estadisticas(medias, desv_est, conteos, etiquetas, sangria=""):
+    for i_col in range(len(medias)):
+        if medias[i_col] is not None and desv_est[i_col] is not None:
+            texto = "{}Columna {:2d}: {} = {:10.6f}, {} = {:10.6f}".format(
+                sangria, i_col + 1, etiquetas[0], medias[i_col], etiquetas[1], desv_est[i_col])
+            if conteos is not None:
+                texto += " ({} valores numéricos)".format(conteos[i_col])
+            print(texto)
+        else:
+            print("{}Columna {:2d}: Sin datos numéricos para calcular estadísticas".format(sangria, i_col + 1))
 
-    print("\n" + "=" * 60)
+
+def mostrar_estadisticas(medias, desv_est, conteos=None, etiquetas=ETIQUETAS_CLASICAS):
+    """Estadísticas por columna; con grupos (dict por grupo) un bloque por cada uno."""
+    print("\nESTADÍSTICAS POR COLUMNA:")
+    if not isinstance(medias, dict):
+        _mostrar_lineas_estadisticas(medias, desv_est, conteos, etiquetas)
+        return
+    for clave in medias:
+        print("Grupo {}:".format("N/A" if clave is None else clave))
+        _mostrar_lineas_estadisticas(medias[clave], desv_est[clave],
+                                     conteos[clave] if conteos is not None else None,
+                                     etiquetas, "  ")
 
 
 # --- Función principal ---
@@ -700,19 +1244,58 @@ def main():
     print("=" * 40)
     print("\nNota: Puedes escribir solo 'iris' y el programa buscará automáticamente")
     print("archivos con extensiones comunes (.txt, .csv, .data, .dat, .xlsx)")
+    print("Al procesar por flujo se acepta un patrón ('extractos/*.csv') para varios archivos.")
 
     nombre_archivo = input("\nIngrese el nombre del archivo de datos: ").strip()
+    ruta_salida = input("Archivo de salida para procesar por flujo (.csv o .bin; Enter = mostrar en pantalla): ").strip()
+    robusto = input("¿Puntaje Z robusto con mediana y MAD? (s/N): ").strip().lower() in ("s", "si", "sí")
+    ruta_modelo = input("Guardar el modelo (centros y escalas) para puntuar datos nuevos en (Enter = no): ").strip()
+    grupo = input("Columna para calcular por grupos (número o nombre; Enter = sin grupos): ").strip()
+    agrupar_por = None
+    if grupo:
+        agrupar_por = int(grupo) - 1 if grupo.isdigit() else grupo
+    etiquetas = ETIQUETAS_ROBUSTAS if robusto else ETIQUETAS_CLASICAS
 
     try:
+        if ruta_salida:
+            print("\nProcesando '{}' por lotes (dos pasadas)...".format(nombre_archivo))
+            n_filas, num_cols, medias, desv_est, conteos = calcular_puntaje_z_a_archivo(
+                nombre_archivo, ruta_salida, robusto=robusto, ruta_modelo=ruta_modelo or None,
+                agrupar_por=agrupar_por)
+            print("Se procesaron {} filas con {} columnas.".format(n_filas, num_cols))
+            mostrar_estadisticas(medias, desv_est, conteos, etiquetas)
+            print("\nPuntajes Z guardados en '{}'.".format(ruta_salida))
+            if ruta_modelo:
+                print("Modelo guardado en '{}'.".format(ruta_modelo))
+            return
+
         print("\nBuscando archivo '{}'...".format(nombre_archivo))
-        datos = leer_datos(nombre_archivo)
-        print("Se cargaron exitosamente {} filas con {} columnas.".format(len(datos), len(datos[0])))
+        datos = leer_datos_tabla(nombre_archivo)
+        print("Se cargaron exitosamente {} filas con {} columnas.".format(datos.n_filas, datos.n_columnas))
 
         print("\nCalculando puntajes Z...")
-        matriz_z, medias, desv_est = calcular_puntaje_z(datos)
+        matriz_z, medias, desv_est = calcular_puntaje_z(datos, robusto, agrupar_por)
 
         print("\nMostrando resultados...")
-        mostrar_resultados(datos, matriz_z, medias, desv_est)
+        mostrar_resultados(datos, matriz_z, medias, desv_est, etiquetas)
+
+        if datos.n_filas > FILAS_PREVISTA:
+            ruta_resultados = input("\nGuardar todos los puntajes Z en (.csv, .bin o .tcol; Enter = no): ").strip()
+            if ruta_resultados:
+                n = guardar_resultados(matriz_z, ruta_resultados)
+                print("Se guardaron {} filas en '{}'.".format(n, ruta_resultados))
+
+        if ruta_modelo and agrupar_por is not None:
+            print("El modelo guardado no admite grupos; no se guardó.")
+        elif ruta_modelo:
+            # Mismos nombres y conteos que ajustar_modelo; sin encabezado en el
+            # archivo se empareja por posición al puntuar
+            conteos = [datos.n_filas - col.n_faltantes if col.tipo == "numerico" else 0
+                       for col in datos.columnas]
+            modelo = ModeloEstandarizacion(medias, desv_est, _encabezado_propio(datos),
+                                           conteos, "robusto" if robusto else "clasico")
+            modelo.guardar(ruta_modelo)
+            print("Modelo guardado en '{}'.".format(ruta_modelo))
 
     except FileNotFoundError as e:
         print("Error: {}".format(e))
@@ -722,5 +1305,73 @@ def main():
         print("Error Inesperado: {}".format(e))
 
 
+def main_linea_comandos(argumentos):
+    """
+    Uso sin preguntas (para lotes diarios y tuberías):
+        python -m Programas.programa1 ajustar <datos|patrón> <modelo.json> [--robusto]
+        python -m Programas.programa1 puntuar <modelo.json> <entrada|patrón|-> [salida.csv|salida.bin|-]
+        python -m Programas.programa1 seguir <archivo> [salida.csv] [--intervalo SEGUNDOS]
+        python -m Programas.programa1 indexar <datos|patrón> <indice.tidx> [--modelo modelo.json]
+                                      [--robusto] [--tipo kd|bolas]
+        python -m Programas.programa1 vecinos <indice.tidx> <consulta|patrón|-> [salida.csv|-]
+                                      [--k K | --radio R]
+    """
+    accion = argumentos[0]
+    if accion == "ajustar" and len(argumentos) >= 3:
+        modelo = ajustar_modelo(argumentos[1], robusto="--robusto" in argumentos[3:])
+        modelo.guardar(argumentos[2])
+        print("Modelo de {} columnas guardado en '{}'.".format(modelo.n_columnas, argumentos[2]),
+              file=sys.stderr)
+    elif accion == "puntuar" and len(argumentos) >= 3:
+        salida = argumentos[3] if len(argumentos) > 3 else "-"
+        n_filas = puntuar_con_modelo(argumentos[1], argumentos[2], salida)
+        print("Se puntuaron {} filas.".format(n_filas), file=sys.stderr)
+    elif accion == "seguir" and len(argumentos) >= 2:
+        intervalo = None
+        resto = list(argumentos[2:])
+        if "--intervalo" in resto:
+            k = resto.index("--intervalo")
+            intervalo = float(resto[k + 1])
+            del resto[k:k + 2]
+        try:
+            seguir_archivo(argumentos[1], resto[0] if resto else None, intervalo)
+        except KeyboardInterrupt:
+            pass
+    elif accion in ("indexar", "vecinos") and len(argumentos) >= 3:
+        resto = list(argumentos[3:])
+        opciones = {}
+        for nombre in ("--modelo", "--tipo", "--k", "--radio"):
+            if nombre in resto:
+                k = resto.index(nombre)
+                opciones[nombre] = resto[k + 1]
+                del resto[k:k + 2]
+        if accion == "indexar":
+            indice = construir_indice(argumentos[1], opciones.get("--modelo"),
+                                      "--robusto" in resto, opciones.get("--tipo"))
+            indice.guardar(argumentos[2])
+            print("Índice {} de {} filas y {} columnas guardado en '{}'.".format(
+                indice.tipo, len(indice), indice.dimension, argumentos[2]), file=sys.stderr)
+        else:
+            radio = float(opciones["--radio"]) if "--radio" in opciones else None
+            n_filas = buscar_vecinos(argumentos[1], argumentos[2], resto[0] if resto else "-",
+                                     int(opciones.get("--k", 5)), radio)
+            print("Se consultaron {} filas.".format(n_filas), file=sys.stderr)
+    else:
+        print(main_linea_comandos.__doc__, file=sys.stderr)
+        return 2
+    return 0
+
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        try:
+            sys.exit(main_linea_comandos(sys.argv[1:]))
+        except BrokenPipeError:
+            # El lector de la tubería (p. ej. head) cerró antes de tiempo: salir
+            # sin traceback; stdout pasa a devnull para que el vaciado final no falle
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            sys.exit(1)
+        except (FileNotFoundError, ValueError, LectorXLSXCSVError) as e:
+            print("Error: {}".format(e), file=sys.stderr)
+            sys.exit(1)
     main()
\ No newline at end of file
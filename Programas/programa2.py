@@ -1,8 +1,43 @@
-from zipfile import ZipFile
-from xml.etree import ElementTree
+import csv
+import math
+
+try:
+    # Cuando se ejecuta desde la carpeta raíz del proyecto
+    from descompresor.ingesta import (
+        es_xlsx, detectar_separador, leer_xlsx_a_matriz, normalizar_ancho,
+        leer_muestra_lineas, leer_texto_paralelo, es_jsonl, leer_jsonl_tabla,
+        leer_jsonl_lotes, leer_texto_lotes,
+    )
+    from descompresor.tabla import TablaColumnar
+    from descompresor.distancias import (
+        condensada_a_matriz, distancias_columnas, distancias_filas, guardar_distancias,
+        vectores_filas,
+    )
+    from descompresor.Rms_lector import LectorXLSXCSVError
+    from descompresor.cruce import METRICAS_CRUCE, ReferenciaCruce, cruzar_lotes
+except ImportError:
+    # Posible ejecución como módulo dentro de un paquete
+    from ..descompresor.ingesta import (
+        es_xlsx, detectar_separador, leer_xlsx_a_matriz, normalizar_ancho,
+        leer_muestra_lineas, leer_texto_paralelo, es_jsonl, leer_jsonl_tabla,
+        leer_jsonl_lotes, leer_texto_lotes,
+    )
+    from ..descompresor.tabla import TablaColumnar
+    from ..descompresor.distancias import (
+        condensada_a_matriz, distancias_columnas, distancias_filas, guardar_distancias,
+        vectores_filas,
+    )
+    from ..descompresor.Rms_lector import LectorXLSXCSVError
+    from ..descompresor.cruce import METRICAS_CRUCE, ReferenciaCruce, cruzar_lotes
 
 FALTANTES = {"", "na", "nan", "null", "none"}  # se usa .strip().lower()
-SEPARADORES_POSIBLES = [",", ";", "\t", "|", " "]
+MAX_FILAS_IMPRESION = 12  # matrices entre filas más grandes se guardan en archivo
+TAM_LOTE_CONSULTA = 2000  # filas de consulta por lote en el modo entre dos archivos
+NOMBRES_METRICAS = {
+    "euclidiana": "euclidiana", "euclidiana2": "euclidiana al cuadrado",
+    "manhattan": "Manhattan", "chebyshev": "Chebyshev", "minkowski": "Minkowski",
+    "coseno": "coseno",
+}
 
 # ---------------- Entrada segura y pequeños helpers ----------------
 
@@ -33,38 +68,17 @@ def intentar_float(txt):
     except Exception:
         return None
 
-def suma(valores):
-    t = 0.0
-    for v in valores:
-        t += v
-    return t
-
-def maximo(valores):
-    if not valores:
-        return 0
-    m = valores[0]
-    for v in valores[1:]:
-        if v > m:
-            m = v
-    return m
-
-def minimo(valores):
-    if not valores:
-        return 0
-    m = valores[0]
-    for v in valores[1:]:
-        if v < m:
-            m = v
-    return m
-
 # ---------------- Detección tipo de archivo y lectura base ----------------
 
 def leer_ruta_y_tipo():
     """
     Pide la ruta y detecta si es XLSX (intenta abrir como ZIP con [Content_Types].xml)
-    o texto (abre como UTF-8). Devuelve (ruta, tipo, payload) donde payload es:
+    o texto (abre como UTF-8; si viene en .gz/.bz2/.xz se descomprime al vuelo).
+    Devuelve (ruta, tipo, payload) donde payload es:
       - para xlsx: None (se vuelve a abrir dentro del lector xlsx)
-      - para texto: lista de líneas no vacías
+      - para jsonl: None (se lee en streaming con leer_jsonl_tabla)
+      - para texto: muestra con las primeras líneas no vacías (el archivo
+        completo se parsea luego en paralelo con leer_texto_paralelo)
     """
     while True:
         ruta = seguro_input("Ruta del archivo (.xlsx o texto): ", default="")
@@ -72,46 +86,23 @@ def leer_ruta_y_tipo():
             print("No se proporcionó ruta.")
             continue
         # ¿XLSX?
-        try:
-            with ZipFile(ruta, "r") as z:
-                if "[Content_Types].xml" in z.namelist():
-                    return ruta, "xlsx", None
-        except Exception:
-            pass
+        if es_xlsx(ruta):
+            return ruta, "xlsx", None
+        # ¿JSON Lines?
+        if es_jsonl(ruta):
+            return ruta, "jsonl", None
         # ¿Texto?
         try:
-            with open(ruta, "r", encoding="utf-8", errors="ignore") as f:
-                lineas = [ln.rstrip("\n\r") for ln in f if ln.strip() != ""]
-            if not lineas:
+            muestra = leer_muestra_lineas(ruta, 50)
+            if not muestra:
                 print("El archivo está vacío o no tiene líneas útiles.")
                 continue
-            return ruta, "texto", lineas
+            return ruta, "texto", muestra
         except Exception:
             print("No se pudo abrir el archivo como XLSX ni como texto. Verifica la ruta.")
 
 # ---------------- Lectura de TEXTO (CSV/TSV/pipe/espacios) ----------------
 
-def detectar_separador(lineas_muestra):
-    mejor_sep = ","
-    mejor_cols = 1
-    mejor_consistencia = -1.0
-    for sep in SEPARADORES_POSIBLES:
-        conteos = []
-        for ln in lineas_muestra:
-            cols = partir_linea(ln, sep)
-            conteos.append(len(cols))
-        if not conteos:
-            continue
-        promedio = suma(conteos) / len(conteos)
-        var = suma([(c - promedio) * (c - promedio) for c in conteos]) / len(conteos)
-        consistencia = -var
-        max_cols = maximo(conteos)
-        if (max_cols > mejor_cols) or (max_cols == mejor_cols and consistencia > mejor_consistencia):
-            mejor_cols = max_cols
-            mejor_consistencia = consistencia
-            mejor_sep = sep
-    return mejor_sep
-
 def pedir_separador(defecto):
     nombre = "tabulador" if defecto == "\t" else ("espacio" if defecto == " " else defecto)
     print("\nSeparador sugerido:", repr(nombre))
@@ -125,190 +116,17 @@ def pedir_separador(defecto):
     print("Entrada no válida; usando el sugerido.")
     return defecto
 
-def partir_linea(linea, sep):
-    if sep == " ":
-        partes = linea.strip().split()
-    else:
-        partes = linea.split(sep)
-    limpias = []
-    for p in partes:
-        limpias.append(p.strip())
-    return limpias
-
-def lineas_a_tabla(lineas, sep):
-    filas = []
-    for l in lineas:
-        if l.strip() == "":
-            continue
-        filas.append(partir_linea(l, sep))
-    return filas
-
 # ---------------- Lectura de XLSX (sin librerías externas) ----------------
 
-def leer_xlsx_a_matriz(ruta, sheet_index=None):
-    """
-    Convierte un .xlsx a una matriz de strings (lista de filas).
-    - sheet_index: 1..N (si None, pregunta si hay varias hojas).
-    - Resuelve sharedStrings; otros valores van tal cual del nodo <v>.
-    - No mapea estilos/fechas (se deja el número crudo).
-    """
-    with ZipFile(ruta, "r") as z:
-        names = z.namelist()
-
-        # sharedStrings
-        shared = []
-        if "xl/sharedStrings.xml" in names:
-            try:
-                sst = ElementTree.fromstring(z.read("xl/sharedStrings.xml"))
-                for si in sst.iter():
-                    if si.tag.endswith("si"):
-                        txt = ""
-                        for tnode in si.iter():
-                            if tnode.tag.endswith("t") and tnode.text is not None:
-                                txt += tnode.text
-                        shared.append(txt)
-            except Exception:
-                shared = []
-
-        # workbook y hojas
-        sheets = []
-        try:
-            wb = ElementTree.fromstring(z.read("xl/workbook.xml"))
-            for node in wb.iter():
-                if node.tag.endswith("sheet"):
-                    nm = node.attrib.get("name", "")
-                    sheets.append(nm)
-        except Exception:
-            pass
-
-        total = len([n for n in names if n.startswith("xl/worksheets/sheet") and n.endswith(".xml")])
-        if total == 0:
-            raise ValueError("XLSX sin hojas legibles.")
-
-        if sheet_index is None:
-            if total > 1 and sheets:
-                print("\nHojas detectadas (1..{}):".format(total))
-                for idx, nm in enumerate(sheets, start=1):
-                    print("  {}: {}".format(idx, nm))
-                ans = seguro_input("Elige hoja (Enter = 1): ", default="1")
-                try:
-                    sel = int(ans)
-                except Exception:
-                    sel = 1
-            else:
-                sel = 1
-        else:
-            sel = int(sheet_index)
-
-        if sel < 1 or sel > total:
-            sel = 1
-
-        sheet_path = "xl/worksheets/sheet{}.xml".format(sel)
-        if sheet_path not in names:
-            cand = [n for n in names if n.startswith("xl/worksheets/sheet") and n.endswith(".xml")]
-            cand.sort()
-            sheet_path = cand[0]
-
-        xml = ElementTree.fromstring(z.read(sheet_path))
-        filas_dict = {}
-        max_col_index = 0
-
-        for c in xml.iter():
-            if not c.tag.endswith("c"):
-                continue
-            r = c.attrib.get("r", "")
-            t = c.attrib.get("t", "")
-            v_node = None
-            for sub in c.iter():
-                if sub.tag.endswith("v"):
-                    v_node = sub
-                    break
-            if not r:
-                continue
-            fila_idx, col_idx = ref_a_indices(r)
-            if col_idx > max_col_index:
-                max_col_index = col_idx
-
-            val = ""
-            if v_node is not None and v_node.text is not None:
-                raw = v_node.text
-                if t == "s":
-                    try:
-                        si = int(raw)
-                        if 0 <= si < len(shared):
-                            val = shared[si]
-                        else:
-                            val = raw
-                    except Exception:
-                        val = raw
-                elif t == "b":
-                    val = "1" if raw.strip() == "1" else "0"
-                else:
-                    val = raw
-            else:
-                val = ""
-
-            if fila_idx not in filas_dict:
-                filas_dict[fila_idx] = {}
-            filas_dict[fila_idx][col_idx] = val
-
-        if not filas_dict:
-            return []
-
-        max_row = max(filas_dict.keys())
-        matriz = []
-        for r_i in range(1, max_row + 1):
-            fila_vals = []
-            row_dict = filas_dict.get(r_i, {})
-            if not row_dict:
-                fila_vals = ["" for _ in range(max_col_index)]
-            else:
-                for c_j in range(1, max_col_index + 1):
-                    fila_vals.append(row_dict.get(c_j, ""))
-            matriz.append(fila_vals)
-
-        return matriz
-
-def ref_a_indices(ref):
-    letras = ""
-    numeros = ""
-    for ch in ref:
-        if ("A" <= ch <= "Z") or ("a" <= ch <= "z"):
-            letras += ch
-        elif "0" <= ch <= "9":
-            numeros += ch
-    col = letras_a_indice(letras)
-    row = int(numeros) if numeros else 1
-    return row, col
-
-def letras_a_indice(letters):
-    letters = letters.upper()
-    n = 0
-    for ch in letters:
-        n = n * 26 + (ord(ch) - ord('A') + 1)
-    return n
-
-# ---------------- Normalización de tabla ----------------
-
-def normalizar_ancho(filas):
-    freq = {}
-    for fila in filas:
-        n = len(fila)
-        freq[n] = freq.get(n, 0) + 1
-    ncols_obj = None
-    mejor = -1
-    for k, v in freq.items():
-        if v > mejor:
-            mejor = v
-            ncols_obj = k
-    norm = []
-    for fila in filas:
-        if len(fila) < ncols_obj:
-            fila = fila + [""] * (ncols_obj - len(fila))
-        elif len(fila) > ncols_obj:
-            fila = fila[:ncols_obj]
-        norm.append(fila)
-    return norm, ncols_obj
+def pedir_hoja(nombres):
+    print("\nHojas detectadas (1..{}):".format(len(nombres)))
+    for idx, nm in enumerate(nombres, start=1):
+        print("  {}: {}".format(idx, nm))
+    ans = seguro_input("Elige hoja (Enter = 1): ", default="1")
+    try:
+        return int(ans)
+    except Exception:
+        return 1
 
 # ---------------- Selección de columnas ----------------
 
@@ -345,7 +163,40 @@ def parsear_columna_usuario(txt, encabezado):
 
 # ---------------- Distancia euclidiana ----------------
 
+def distancia_euclidiana_tabla(tabla, col_a, col_b):
+    """
+    Versión sobre TablaColumnar: recorre los array('d') ya parseados y solo
+    consulta el mapa de bits cuando alguna de las dos columnas tiene faltantes.
+    """
+    ca = tabla.columna(col_a)
+    cb = tabla.columna(col_b)
+    n = tabla.n_filas
+    if ca.tipo != "numerico" or cb.tipo != "numerico":
+        return 0.0, 0, n
+    va = ca.valores
+    vb = cb.valores
+    suma_sq = 0.0
+    usados = 0
+    if ca.n_faltantes == 0 and cb.n_faltantes == 0:
+        for fa, fb in zip(va, vb):
+            dif = fa - fb
+            suma_sq += dif * dif
+        usados = n
+    else:
+        for i in range(n):
+            if ca.es_faltante(i) or cb.es_faltante(i):
+                continue
+            dif = va[i] - vb[i]
+            suma_sq += dif * dif
+            usados += 1
+    ignorados = n - usados
+    if usados == 0:
+        return 0.0, 0, ignorados
+    return math.sqrt(suma_sq), usados, ignorados
+
 def distancia_euclidiana_col(datos, col_a, col_b):
+    if isinstance(datos, TablaColumnar):
+        return distancia_euclidiana_tabla(datos, col_a, col_b)
     suma_sq = 0.0
     usados = 0
     ignorados = 0
@@ -363,16 +214,7 @@ def distancia_euclidiana_col(datos, col_a, col_b):
         usados += 1
     if usados == 0:
         return 0.0, 0, ignorados
-    # sqrt por método babilónico para evitar importar math
-    x = suma_sq
-    if x == 0.0:
-        return 0.0, usados, ignorados
-    g = x
-    i = 0
-    while i < 10:
-        g = 0.5 * (g + x / g)
-        i += 1
-    return g, usados, ignorados
+    return math.sqrt(suma_sq), usados, ignorados
 
 def formato_float(x):
     try:
@@ -380,15 +222,224 @@ def formato_float(x):
     except Exception:
         return "0.000000"
 
+def imprimir_matriz_distancias(encabezado, indices, distancias, usados):
+    """Matriz de distancias entre columnas con una fila de nombres y el conteo mínimo."""
+    nombres = [str(encabezado[j]) for j in indices]
+    ancho = max([12] + [len(nm) for nm in nombres])
+    print("\n========== MATRIZ DE DISTANCIAS EUCLIDIANAS ==========")
+    print(" " * ancho + " " + " ".join(nm[:ancho].rjust(ancho) for nm in nombres))
+    for nm, fila in zip(nombres, distancias):
+        print(nm[:ancho].ljust(ancho) + " " + " ".join(formato_float(d).rjust(ancho) for d in fila))
+    if len(indices) > 1:
+        minimo = min(usados[j][k] for j in range(len(indices)) for k in range(j + 1, len(indices)))
+        print("Filas válidas por par (mínimo):", minimo)
+    print("======================================================\n")
+
+def imprimir_distancias_filas(filas_usadas, condensada, titulo):
+    """Matriz entre filas (numeradas 1-based como en el archivo de datos)."""
+    n = len(filas_usadas)
+    matriz = condensada_a_matriz(condensada, n)
+    print("\n" + titulo)
+    print("fila " + " ".join(str(i + 1).rjust(12) for i in filas_usadas))
+    for i, fila in zip(filas_usadas, matriz):
+        print(str(i + 1).ljust(4) + " " + " ".join(formato_float(d).rjust(12) for d in fila))
+
+def pedir_metrica():
+    """(metrica, p) elegidos por el usuario; Enter = euclidiana."""
+    print("\nMétricas: 1 = euclidiana, 2 = euclidiana al cuadrado, 3 = Manhattan,")
+    print("          4 = Chebyshev, 5 = Minkowski p, 6 = coseno")
+    opcion = str(seguro_input("Métrica (Enter = 1): ", default="1")).strip() or "1"
+    metrica = {"1": "euclidiana", "2": "euclidiana2", "3": "manhattan", "4": "chebyshev",
+               "5": "minkowski", "6": "coseno"}.get(opcion)
+    if metrica is None:
+        print("Opción no válida; usando euclidiana.")
+        return "euclidiana", 2.0
+    p = 2.0
+    if metrica == "minkowski":
+        p_txt = seguro_input("Valor de p (>= 1, Enter = 3): ", default="3")
+        p = intentar_float(p_txt) if p_txt else 3.0
+        if p is None or p < 1.0:
+            print("p no válido; usando 3.")
+            p = 3.0
+    return metrica, p
+
+def modo_distancias_filas(tabla, encabezado):
+    indices = tabla.indices_numericos()
+    if not indices:
+        print("No hay columnas numéricas.")
+        return
+    metrica, p = pedir_metrica()
+    filas_usadas, vectores = vectores_filas(tabla, indices, estandarizar=True, completas=False)
+    n = len(filas_usadas)
+    print("\nColumnas numéricas (estandarizadas):", len(indices))
+    con_faltantes = sum(1 for v in vectores if any(x != x for x in v))
+    print("Filas:", n, " | con faltantes (por pares completos):", con_faltantes)
+    if n < 2:
+        print("Se necesitan al menos 2 filas.")
+        return
+    condensada = distancias_filas(vectores, metrica, p)
+    sin_comunes = sum(1 for d in condensada if d != d)
+    if sin_comunes:
+        print("Pares sin columnas válidas en común (nan):", sin_comunes)
+    nombre = NOMBRES_METRICAS[metrica]
+    if metrica == "minkowski":
+        nombre += " (p = {:g})".format(p)
+    titulo = "Distancia {} entre filas:".format(nombre)
+    if n <= MAX_FILAS_IMPRESION:
+        imprimir_distancias_filas(filas_usadas, condensada, titulo)
+    else:
+        print(titulo, len(condensada), "pares (forma condensada).")
+    ruta = seguro_input("Archivo de salida (.csv = matriz, .bin = condensada; Enter = no guardar): ",
+                        default="")
+    if ruta:
+        try:
+            guardar_distancias(condensada, n, ruta, etiquetas=[i + 1 for i in filas_usadas])
+            print("Guardado en", ruta)
+        except (LectorXLSXCSVError, ValueError) as e:
+            print("No se pudo guardar:", e)
+
+# ---------------- Distancias entre dos archivos ----------------
+
+def lotes_consulta(ruta, tiene_encabezado, claves=None):
+    """
+    (encabezado, generador de lotes de filas crudas) del archivo de consulta,
+    sin cargarlo entero salvo en XLSX. encabezado es None si no lo tiene.
+    """
+    if es_jsonl(ruta):
+        lotes = leer_jsonl_lotes(ruta, claves, tam_lote=TAM_LOTE_CONSULTA)
+        return next(lotes), lotes
+    if es_xlsx(ruta):
+        matriz = leer_xlsx_a_matriz(ruta, sheet_index=None, elegir_hoja=pedir_hoja)
+        encabezado = matriz[0] if tiene_encabezado and matriz else None
+        filas = matriz[1:] if encabezado is not None else matriz
+        return encabezado, (filas[i:i + TAM_LOTE_CONSULTA]
+                            for i in range(0, len(filas), TAM_LOTE_CONSULTA))
+    muestra = leer_muestra_lineas(ruta, 50)
+    if not muestra:
+        return None, iter(())
+    sep = detectar_separador(muestra)
+    lotes = (lote for lote in leer_texto_lotes(ruta, sep) if lote)
+    if not tiene_encabezado:
+        return None, lotes
+    primero = next(lotes, [])
+    encabezado = primero[0] if primero else None
+
+    def resto():
+        if len(primero) > 1:
+            yield primero[1:]
+        yield from lotes
+    return encabezado, resto()
+
+def escribir_cruce(resultados, ruta_salida, referencia, k=None):
+    """
+    Escribe en CSV, lote a lote, el resultado de cruzar_lotes. Devuelve
+    (filas de consulta, sin distancias, primeras filas para mostrar).
+    - Bloque (k None): una columna por fila de referencia.
+    - k vecinos: fila_consulta, vecino_1, distancia_1, ..., vecino_k, distancia_k.
+    Las filas se numeran 1-based como en los archivos de datos.
+    """
+    n_consulta = 0
+    sin_distancias = 0
+    prevista = []
+    with open(ruta_salida, "w", newline="", encoding="utf-8") as salida:
+        escritor = csv.writer(salida)
+        if k is None:
+            escritor.writerow(["fila_consulta"] + [i + 1 for i in referencia.filas_referencia])
+        else:
+            encabezado = ["fila_consulta"]
+            for r in range(1, k + 1):
+                encabezado += ["vecino_" + str(r), "distancia_" + str(r)]
+            escritor.writerow(encabezado)
+        for filas, resultado in resultados:
+            for fila_resultado in resultado:
+                n_consulta += 1
+                if not fila_resultado:
+                    sin_distancias += 1
+                    escritor.writerow([n_consulta])
+                    continue
+                if k is None:
+                    escritor.writerow([n_consulta] + list(fila_resultado))
+                else:
+                    plana = [n_consulta]
+                    for i_ref, d in fila_resultado:
+                        plana += [i_ref + 1, d]
+                    escritor.writerow(plana)
+                    if len(prevista) < MAX_FILAS_IMPRESION:
+                        prevista.append((n_consulta, fila_resultado))
+    return n_consulta, sin_distancias, prevista
+
+def modo_cruce(tabla, tiene_encabezado):
+    """Cada fila de otro archivo (consulta) contra todas las filas de este (referencia)."""
+    print("\nMétricas entre archivos: 1 = euclidiana (estandarizada), 2 = Mahalanobis, 3 = Gower")
+    opcion = str(seguro_input("Métrica (Enter = 1): ", default="1")).strip() or "1"
+    metrica = {"1": "euclidiana", "2": "mahalanobis", "3": "gower"}.get(opcion)
+    if metrica not in METRICAS_CRUCE:
+        print("Opción no válida.")
+        return
+    try:
+        referencia = ReferenciaCruce(tabla, metrica)
+    except ValueError as e:
+        print("No se puede usar la referencia:", e)
+        return
+    print("Filas de referencia usadas:", referencia.n_referencia)
+
+    ruta_consulta = seguro_input("Archivo de consulta (mismas columnas): ", default="")
+    if not ruta_consulta:
+        print("No se proporcionó ruta.")
+        return
+    k_txt = seguro_input("Vecinos más cercanos por fila (Enter = bloque completo): ", default="")
+    k = None
+    if k_txt:
+        k = intentar_float(k_txt)
+        if k is None or k < 1 or k != int(k):
+            print("k no válido.")
+            return
+        k = int(k)
+    ruta_salida = seguro_input("Archivo CSV de salida: ", default="")
+    if not ruta_salida:
+        print("No se proporcionó archivo de salida.")
+        return
+    try:
+        encabezado_consulta, lotes = lotes_consulta(ruta_consulta, tiene_encabezado,
+                                                    tabla.encabezado)
+        referencia.alinear(encabezado_consulta)
+        n_consulta, sin_distancias, prevista = escribir_cruce(
+            cruzar_lotes(referencia, lotes, k), ruta_salida, referencia, k)
+    except (LectorXLSXCSVError, ValueError, OSError) as e:
+        print("No se pudo calcular el cruce:", e)
+        return
+
+    print("\nFilas de consulta:", n_consulta, " | sin distancias (faltantes):", sin_distancias)
+    for n_fila, vecinos in prevista:
+        print("  consulta {}: ".format(n_fila) + ", ".join(
+            "fila {} ({})".format(i_ref + 1, formato_float(d)) for i_ref, d in vecinos))
+    print("Resultado guardado en", ruta_salida)
+
 # ---------------- Flujo principal ----------------
 
 def main():
-    print("=== Distancia Euclidiana entre Columnas ===")
+    print("=== Distancias entre Columnas y Filas ===")
     ruta, tipo, payload = leer_ruta_y_tipo()
+    tabla = None
+    tiene_encabezado = True
 
-    if tipo == "xlsx":
+    if tipo == "jsonl":
+        claves_txt = seguro_input("Claves a usar, separadas por coma; 'a.b' para anidadas (Enter = todas): ",
+                                  default="")
+        claves = [c.strip() for c in claves_txt.split(",") if c.strip()] or None
         try:
-            matriz = leer_xlsx_a_matriz(ruta, sheet_index=None)
+            # Por lotes directo a la tabla, sin lista de filas intermedia
+            tabla = leer_jsonl_tabla(ruta, claves, umbral_numerico=0.0)
+        except Exception:
+            print("No se pudo leer el archivo JSON Lines.")
+            return
+        encabezado = tabla.encabezado
+        ncols = tabla.n_columnas
+        datos = tabla
+
+    elif tipo == "xlsx":
+        try:
+            matriz = leer_xlsx_a_matriz(ruta, sheet_index=None, elegir_hoja=pedir_hoja)
         except Exception:
             print("No se pudo leer el XLSX. Verifica que no esté corrupto.")
             return
@@ -412,13 +463,12 @@ def main():
             datos = filas_norm
 
     else:
-        lineas = payload
-        muestra = lineas[:50]
+        muestra = payload
         sep_detectado = detectar_separador(muestra)
         sep = pedir_separador(sep_detectado)
         ans = seguro_input("¿La primera fila es encabezado? [s/n] (Enter = 's'): ", default="s")
         tiene_encabezado = (str(ans).strip().lower() != "n")
-        filas = lineas_a_tabla(lineas, sep)
+        filas = leer_texto_paralelo(ruta, sep)
         filas_norm, ncols = normalizar_ancho(filas)
         if tiene_encabezado:
             encabezado = filas_norm[0]
@@ -435,6 +485,33 @@ def main():
         print("Datos insuficientes o menos de 2 columnas.")
         return
 
+    # Se parsea una sola vez a tabla columnar; las columnas con algún número son
+    # numéricas y el resto de sus celdas cuentan como faltantes (filas ignoradas).
+    if tabla is None:
+        tabla = TablaColumnar.desde_filas(datos, encabezado, umbral_numerico=0.0)
+
+    print("\nModos: 1 = un par de columnas, 2 = matriz entre todas las columnas numéricas,")
+    print("       3 = distancias entre filas (columnas numéricas estandarizadas),")
+    print("       4 = filas de otro archivo contra las de este")
+    modo = str(seguro_input("Modo (Enter = 1): ", default="1")).strip() or "1"
+    if modo == "4":
+        modo_cruce(tabla, tiene_encabezado)
+        print("Listo.")
+        return
+    if modo == "3":
+        modo_distancias_filas(tabla, encabezado)
+        print("Listo.")
+        return
+    if modo == "2":
+        indices = tabla.indices_numericos()
+        if len(indices) < 2:
+            print("Hay menos de 2 columnas numéricas.")
+            return
+        indices, distancias, usados = distancias_columnas(tabla, indices)
+        imprimir_matriz_distancias(encabezado, indices, distancias, usados)
+        print("Listo.")
+        return
+
     mostrar_encabezado(encabezado)
     colA_txt = seguro_input("\nElige columna A (nombre o índice 1..{}): ".format(len(encabezado)), default="")
     colB_txt = seguro_input("Elige columna B (nombre o índice 1..{}): ".format(len(encabezado)), default="")
@@ -445,7 +522,7 @@ def main():
         print("Selección de columnas inválida (revisa nombres/índices y que sean distintas).")
         return
 
-    dist, usados, ignorados = distancia_euclidiana_col(datos, idxA, idxB)
+    dist, usados, ignorados = distancia_euclidiana_col(tabla, idxA, idxB)
 
     print("\n================= RESULTADO =================")
     print("Columna A:", encabezado[idxA], " (índice:", idxA + 1, ")")
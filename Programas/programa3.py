@@ -1,5 +1,19 @@
-from zipfile import ZipFile
-from xml.etree import ElementTree
+try:
+    # Cuando se ejecuta desde la carpeta raíz del proyecto
+    from descompresor.ingesta import (
+        detectar_separador, leer_xlsx_a_matriz, normalizar_ancho,
+        leer_muestra_lineas, leer_texto_paralelo,
+    )
+    from descompresor.tabla import TablaColumnar
+    from descompresor.vistas import transponer
+except ImportError:
+    # Posible ejecución como módulo dentro de un paquete
+    from ..descompresor.ingesta import (
+        detectar_separador, leer_xlsx_a_matriz, normalizar_ancho,
+        leer_muestra_lineas, leer_texto_paralelo,
+    )
+    from ..descompresor.tabla import TablaColumnar
+    from ..descompresor.vistas import transponer
 
 
 class XLSXtoCSV:
@@ -7,153 +21,16 @@ class XLSXtoCSV:
         self.input_file = input_file
         self.output_file = output_file
 
-    # --- Utilidades ZIP mínimas (nos apoyamos en ZipFile de la stdlib) ---
     def procesar(self):
+        """Delegamos en el motor común de ingesta (descompresor.ingesta)."""
         # CSV simple (coma). Para otros delimitadores, lo leemos como texto abajo.
         if self.input_file.lower().endswith(".csv"):
-            with open(self.input_file, 'r', encoding='utf-8', errors='ignore') as f:
-                contenido = f.read()
-            lineas = [ln for ln in contenido.splitlines() if ln.strip() != ""]
-            filas = [ [c.strip().strip('"') for c in ln.split(",")] for ln in lineas ]
-            return filas
-
-        # XLSX: usamos ZipFile (robusto para tamaños/flags)
-        with ZipFile(self.input_file, "r") as z:
-            names = z.namelist()
-
-            # sharedStrings (opcional)
-            shared = []
-            if "xl/sharedStrings.xml" in names:
-                try:
-                    sst = ElementTree.fromstring(z.read("xl/sharedStrings.xml"))
-                    for si in sst.iter():
-                        if si.tag.endswith("si"):
-                            txt = ""
-                            for tnode in si.iter():
-                                if tnode.tag.endswith("t") and tnode.text is not None:
-                                    txt += tnode.text
-                            shared.append(txt)
-                except Exception:
-                    shared = []
-
-            # workbook para listar hojas
-            sheets = []
-            try:
-                wb = ElementTree.fromstring(z.read("xl/workbook.xml"))
-                for node in wb.iter():
-                    if node.tag.endswith("sheet"):
-                        nm = node.attrib.get("name", "")
-                        sheets.append(nm)
-            except Exception:
-                pass
-
-            # preferimos sheet1.xml; si no está, tomamos la primera
-            cand = [n for n in names if n.startswith("xl/worksheets/sheet") and n.endswith(".xml")]
-            if not cand:
-                raise Exception("XLSX sin hojas legibles.")
-            cand.sort()
-            sheet_path = "xl/worksheets/sheet1.xml" if "xl/worksheets/sheet1.xml" in names else cand[0]
-
-            xml = ElementTree.fromstring(z.read(sheet_path))
-
-            # Parseo de celdas con mapeo correcto row/col
-            filas_dict = {}
-            max_col_index = 0
-            for c in xml.iter():
-                if not c.tag.endswith("c"):
-                    continue
-                r = c.attrib.get("r", "")   # ej: "C5"
-                t = c.attrib.get("t", "")   # tipo: s (shared), b (bool), ... (num/texto crudo)
-                v_node = None
-                for sub in c.iter():
-                    if sub.tag.endswith("v"):
-                        v_node = sub
-                        break
-                if not r:
-                    continue
-
-                # === CORRECCIÓN CLAVE ===
-                letras = ""
-                numeros = ""
-                for ch in r:
-                    if ("A" <= ch <= "Z") or ("a" <= ch <= "z"):
-                        letras += ch
-                    elif "0" <= ch <= "9":
-                        numeros += ch
-                row = int(numeros) if numeros else 1          # fila = dígitos
-                col = self.letras_a_indice(letras)            # col = letras → índice
-                if col > max_col_index:
-                    max_col_index = col
-
-                val = ""
-                if v_node is not None and v_node.text is not None:
-                    raw = v_node.text
-                    if t == "s":
-                        try:
-                            si = int(raw)
-                            if 0 <= si < len(shared):
-                                val = shared[si]
-                            else:
-                                val = raw
-                        except Exception:
-                            val = raw
-                    elif t == "b":
-                        val = "1" if raw.strip() == "1" else "0"
-                    else:
-                        val = raw
-                else:
-                    val = ""
-
-                if row not in filas_dict:
-                    filas_dict[row] = {}
-                filas_dict[row][col] = val
-
-            if not filas_dict:
-                return []
-
-            max_row = max(filas_dict.keys())
-            matriz = []
-            for r_i in range(1, max_row + 1):
-                fila_vals = []
-                row_dict = filas_dict.get(r_i, {})
-                for c_j in range(1, max_col_index + 1):
-                    fila_vals.append(row_dict.get(c_j, ""))
-                matriz.append(fila_vals)
-
-            return matriz
-
-    def letras_a_indice(self, letters):
-        letters = letters.upper()
-        n = 0
-        for ch in letters:
-            n = n * 26 + (ord(ch) - ord('A') + 1)
-        return n
+            return leer_texto_paralelo(self.input_file, ",")
+        # XLSX: hoja 1 (sheet1.xml o, si no está, la primera disponible)
+        return leer_xlsx_a_matriz(self.input_file, sheet_index=1)
 
 # =================== Utilidades TEXTO (auto-separador) ===================
 
-SEPARADORES_POSIBLES = [",", ";", "\t", "|", " "]
-
-def detectar_separador(lineas_muestra):
-    mejor_sep = ","
-    mejor_cols = 1
-    mejor_consistencia = -1.0
-    for sep in SEPARADORES_POSIBLES:
-        conteos = []
-        for ln in lineas_muestra:
-            cols = partir_linea(ln, sep)
-            conteos.append(len(cols))
-        if not conteos:
-            continue
-        promedio = suma(conteos) / len(conteos)
-        var = suma([(c - promedio) * (c - promedio) for c in conteos]) / len(conteos)
-        consistencia = -var
-        max_cols = maximo(conteos)
-        if (max_cols > mejor_cols) or (max_cols == mejor_cols and consistencia > mejor_consistencia):
-            mejor_cols = max_cols
-            mejor_consistencia = consistencia
-            mejor_sep = sep
-    return mejor_sep
-
 def pedir_separador(defecto):
     print("\nSeparador sugerido:", repr("tabulador" if defecto == "\t" else ("espacio" if defecto == " " else defecto)))
     resp = seguro_input("Forzar separador? (Enter=aceptar, ',', ';', '|', '\\t', ' '): ", default="")
@@ -166,21 +43,6 @@ def pedir_separador(defecto):
     print("Entrada no válida; usando el sugerido.")
     return defecto
 
-def partir_linea(linea, sep):
-    if sep == " ":
-        partes = linea.strip().split()
-    else:
-        partes = linea.split(sep)
-    return [p.strip() for p in partes]
-
-def lineas_a_tabla(lineas, sep):
-    filas = []
-    for l in lineas:
-        if l.strip() == "":
-            continue
-        filas.append(partir_linea(l, sep))
-    return filas
-
 # =================== E/S segura y helpers numéricos ===================
 
 def seguro_input(prompt, default=None, validar=None):
@@ -199,21 +61,6 @@ def to_lower(s):
     except Exception:
         return s
 
-def suma(valores):
-    t = 0.0
-    for v in valores:
-        t += v
-    return t
-
-def maximo(valores):
-    if not valores:
-        return 0
-    m = valores[0]
-    for v in valores[1:]:
-        if v > m:
-            m = v
-    return m
-
 def es_faltante(x):
     if x is None:
         return True
@@ -233,35 +80,12 @@ def leer_matriz(ruta):
     if ruta.lower().endswith(".xlsx") or ruta.lower().endswith(".csv"):
         lector = XLSXtoCSV(ruta)
         return lector.procesar(), True  # True = ya es matriz (no pedir separador)
-    # Texto general
-    with open(ruta, "r", encoding="utf-8", errors="ignore") as f:
-        lineas = [ln.rstrip("\n\r") for ln in f if ln.strip() != ""]
-    if not lineas:
+    # Texto general: muestra para el separador y parseo paralelo del archivo
+    muestra = leer_muestra_lineas(ruta, 50)
+    if not muestra:
         return [], True
-    sep = pedir_separador(detectar_separador(lineas[:50]))
-    return lineas_a_tabla(lineas, sep), True
-
-def normalizar_ancho(filas):
-    if not filas:
-        return [], 0
-    freq = {}
-    for fila in filas:
-        n = len(fila)
-        freq[n] = freq.get(n, 0) + 1
-    ncols_obj = None
-    mejor = -1
-    for k, v in freq.items():
-        if v > mejor:
-            mejor = v
-            ncols_obj = k
-    norm = []
-    for fila in filas:
-        if len(fila) < ncols_obj:
-            fila = fila + [""] * (ncols_obj - len(fila))
-        elif len(fila) > ncols_obj:
-            fila = fila[:ncols_obj]
-        norm.append(fila)
-    return norm, ncols_obj
+    sep = pedir_separador(detectar_separador(muestra))
+    return leer_texto_paralelo(ruta, sep), True
 
 # =================== Binarización robusta ===================
 
@@ -281,34 +105,65 @@ def a_binario(celda):
     # No interpretable
     return None
 
+def columnas_binarias_tabla(tabla):
+    """
+    Binariza cada columna de una TablaColumnar. En columnas categóricas a_binario
+    se evalúa una sola vez por categoría del diccionario (no por celda); en las
+    numéricas basta comparar con 0.0. Devuelve una lista de columnas (0/1/None).
+    """
+    cols_bin = []
+    for col in tabla.columnas:
+        if col.tipo == "numerico":
+            vals = col.valores
+            if col.n_faltantes == 0:
+                cols_bin.append([1 if v != 0.0 else 0 for v in vals])
+            else:
+                cols_bin.append([None if col.es_faltante(i) else (1 if vals[i] != 0.0 else 0)
+                                 for i in range(len(vals))])
+        else:
+            mapa = [a_binario(cat) for cat in col.categorias]
+            cols_bin.append([mapa[c] if c >= 0 else None for c in col.codigos])
+    return cols_bin
+
 # =================== Conteos A,B,C,D y coeficientes ===================
 
-def contar_abcd(vec_i, vec_j):
-    a=b=c=d=0
-    for xi, xj in zip(vec_i, vec_j):
-        if xi is None or xj is None:
-            continue
-        if xi==1 and xj==1:
-            a += 1
-        elif xi==1 and xj==0:
-            b += 1
-        elif xi==0 and xj==1:
-            c += 1
-        elif xi==0 and xj==0:
-            d += 1
+def empaquetar_binario(vec):
+    """
+    Vector 0/1/None como dos enteros de bits (bit k = posición k):
+    unos (posiciones con 1) y validos (posiciones con 0 o 1). unos ⊆ validos.
+    """
+    unos = int("".join("1" if v == 1 else "0" for v in reversed(vec)) or "0", 2)
+    validos = int("".join("0" if v is None else "1" for v in reversed(vec)) or "0", 2)
+    return unos, validos
+
+def contar_abcd_bits(emp_i, emp_j):
+    """a,b,c,d de dos vectores empaquetados: unas pocas operaciones de enteros por par."""
+    ui, vi = emp_i
+    uj, vj = emp_j
+    v = vi & vj                 # posiciones válidas en ambos
+    a = (ui & uj & v).bit_count()
+    b = (ui & v).bit_count() - a
+    c = (uj & v).bit_count() - a
+    d = v.bit_count() - a - b - c
     return a,b,c,d
 
+def contar_abcd(vec_i, vec_j):
+    return contar_abcd_bits(empaquetar_binario(vec_i), empaquetar_binario(vec_j))
+
 def matriz_abcd(matriz_bin):
     n = len(matriz_bin)
     A = [[0]*n for _ in range(n)]
     B = [[0]*n for _ in range(n)]
     C = [[0]*n for _ in range(n)]
     D = [[0]*n for _ in range(n)]
+    # Cada vector se empaqueta una sola vez; los pares solo combinan enteros
+    empaquetados = [empaquetar_binario(vec) for vec in matriz_bin]
     for i in range(n):
         A[i][i]=B[i][i]=C[i][i]=0
-        D[i][i]=sum(1 for v in matriz_bin[i] if v==0)  # opcional, diagonal informativa
+        unos, validos = empaquetados[i]
+        D[i][i]=validos.bit_count() - unos.bit_count()  # opcional, diagonal informativa
         for j in range(i+1, n):
-            a,b,c,d = contar_abcd(matriz_bin[i], matriz_bin[j])
+            a,b,c,d = contar_abcd_bits(empaquetados[i], empaquetados[j])
             A[i][j]=A[j][i]=a
             B[i][j]=B[j][i]=b
             C[i][j]=C[j][i]=c
@@ -405,6 +260,10 @@ def main():
         print("Sin filas de datos.")
         return
 
+    # Tabla columnar: cada celda se parsea una vez; categorías se binarizan por diccionario
+    tabla = TablaColumnar.desde_filas(datos, encabezado)
+    bin_cols_tabla = columnas_binarias_tabla(tabla)
+
     # Orientación
     print("\n¿Calcular por FILAS (individuos) o por COLUMNAS (variables)?")
     modo = None
@@ -413,21 +272,11 @@ def main():
 
     # Construir matriz binaria según orientación
     if modo == "f":
-        # Cada fila es un vector binario sobre todas las columnas
-        bin_rows = []
-        for fila in datos:
-            bin_rows.append([a_binario(x) for x in fila])
         # Filtramos columnas completamente no-binarias (todas None) para no sesgar
         # (no es obligatorio; solo evita columnas “basura”)
-        col_ok = []
-        for j in range(ncols):
-            hay = False
-            for i in range(len(bin_rows)):
-                if bin_rows[i][j] is not None:
-                    hay = True
-                    break
-            col_ok.append(hay)
-        bin_rows = [ [v for v,ok in zip(row,col_ok) if ok] for row in bin_rows ]
+        cols_ok = [col for col in bin_cols_tabla if any(v is not None for v in col)]
+        # Cada fila es un vector binario: vista por filas de las columnas, sin copiar
+        bin_rows = transponer(cols_ok) if cols_ok else [[] for _ in range(len(datos))]
         A,B,C,D = matriz_abcd(bin_rows)
         J,S = matriz_coeficientes(A,B,C,D)
         imprimir_matriz(A, "Matriz A (1-1)")
@@ -439,16 +288,8 @@ def main():
     else:
         # Por columnas: transponer primero (columna => vector)
         # Transposición segura
-        nfil = len(datos)
-        T = []
-        for j in range(ncols):
-            col = []
-            for i in range(nfil):
-                col.append(datos[i][j] if j < len(datos[i]) else "")
-            T.append(col)
-        bin_cols = []
-        for col in T:
-            bin_cols.append([a_binario(x) for x in col])
+        # La tabla ya está orientada por columnas: no hace falta transponer
+        bin_cols = bin_cols_tabla
         # Filtrar filas totalmente None (opcional)
         row_ok = []
         for i in range(len(bin_cols[0]) if bin_cols else 0):
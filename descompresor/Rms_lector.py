@@ -1,3 +1,8 @@
+from .codificacion import TAM_PREFIJO, detectar_en_prefijo, decodificar
+from .tabla import TablaColumnar
+from .vistas import transponer
+
+
 class LectorXLSXCSVError(Exception):
     """Excepción base para errores del lector XLSX/CSV."""
     pass
@@ -6,7 +11,7 @@ class LectorXLSXCSVError(Exception):
 class LectorXLSXCSV:
     """
     Lector minimalista de archivos .xlsx (Office Open XML) y .csv sin librerías externas.
-    - Para .csv: devuelve una lista de filas (lista de listas).
+    - Para .csv: devuelve las columnas como vista (Transpuesta) de las filas leídas.
     - Para .xlsx: descomprime el ZIP, ubica sharedStrings y sheet1.xml, y parsea las celdas.
     """
 
@@ -583,17 +588,57 @@ class LectorXLSXCSV:
         filas = self.parsear_sheet(bytes_sheet, shared_strings)
         return filas
 
+    def procesar_tabla(self, encabezado=True, umbral_numerico=1.0, usar_cache=True):
+        """
+        Igual que procesar(), pero devuelve una TablaColumnar tipada.
+        Se aprovecha que procesar() ya entrega columnas (CSV y XLSX).
+        Con usar_cache=True se reutiliza la instantánea .tcol si el archivo no cambió.
+        """
+        # Import local: instantanea importa este módulo (LectorXLSXCSVError)
+        from .instantanea import leer_con_instantanea
+
+        parametros = {"lector": "LectorXLSXCSV", "encabezado": bool(encabezado),
+                      "umbral_numerico": umbral_numerico}
+        return leer_con_instantanea(
+            self.archivo_entrada, parametros,
+            lambda: self._construir_tabla(encabezado, umbral_numerico),
+            usar_cache=usar_cache,
+        )
+
+    def _construir_tabla(self, encabezado, umbral_numerico):
+        # procesar() entrega columnas (CSV como vista, XLSX ya orientado así):
+        # se tipifican directo, sin pasar por una copia por filas.
+        columnas = self.procesar()
+
+        nombres = None
+        if encabezado and columnas:
+            nombres = []
+            for col in columnas:
+                txt = col[0].strip() if len(col) else ""
+                nombres.append(txt if txt else "col_" + str(len(nombres) + 1))
+            columnas = [col[1:] for col in columnas]
+        return TablaColumnar.desde_columnas(columnas, nombres, umbral_numerico=umbral_numerico)
+
     # ----------- Procesamiento CSV ------------
 
     def _procesar_csv(self):
-        """Lee un CSV sencillo y lo devuelve como lista de filas (transpuesta, como en XLSX)."""
+        """
+        Lee un CSV sencillo. Devuelve las columnas (como en XLSX) en forma de vista
+        Transpuesta sobre las filas leídas: no se copia la matriz para reorientarla.
+        """
+        filas = self._leer_filas_csv()
+        if not filas:
+            return []
+        return transponer(filas)
+
+    def _leer_filas_csv(self):
+        """Lee el CSV como lista de filas, todas del mismo ancho."""
         try:
-            with open(self.archivo_entrada, "r", encoding="utf-8") as f:
-                contenido = f.read()
-        except UnicodeDecodeError:
-            # Intento de respaldo con latin-1
-            with open(self.archivo_entrada, "r", encoding="latin-1", errors="ignore") as f:
-                contenido = f.read()
+            # Una sola lectura: la codificación sale del prefijo (BOM / UTF-8 válido)
+            # y los bytes que no sean UTF-8 se leen como latin-1 sin releer el archivo.
+            with open(self.archivo_entrada, "rb") as f:
+                datos = f.read()
+            contenido = decodificar(datos, detectar_en_prefijo(datos[:TAM_PREFIJO]))
         except FileNotFoundError as e:
             raise LectorXLSXCSVError(f"No se encontró el archivo CSV: {self.archivo_entrada}") from e
         except OSError as e:
@@ -619,22 +664,12 @@ class LectorXLSXCSV:
         if not filas:
             return []
 
+        # Normalizamos el ancho de todas las filas (en su lugar, sin copiarlas)
         num_columnas = max(len(f) for f in filas)
-        # Normalizamos el ancho de todas las filas
-        filas_normalizadas = [
-            fila + [""] * (num_columnas - len(fila))
-            for fila in filas
-        ]
-
-        # Transponer (igual que tu versión original)
-        filas_transpuestas = []
-        for j in range(num_columnas):
-            fila = []
-            for i in range(len(filas_normalizadas)):
-                fila.append(filas_normalizadas[i][j])
-            filas_transpuestas.append(fila)
-
-        return filas_transpuestas
+        for fila in filas:
+            if len(fila) < num_columnas:
+                fila.extend([""] * (num_columnas - len(fila)))
+        return filas
 
     # ----------- Guardar como CSV ------------
 
@@ -0,0 +1,81 @@
+"""
+Detección de codificación de archivos de texto en una sola pasada.
+- BOM (UTF-8 / UTF-16) en los primeros bytes.
+- Si no hay BOM, se valida como UTF-8 un prefijo del archivo con un decodificador
+  incremental (un carácter multibyte cortado al final del prefijo no cuenta como
+  error): si lo no-ASCII es mayormente UTF-8 válido se usa UTF-8, si no latin-1.
+- Al decodificar se usa el manejador de errores "respaldo_latin1": los bytes que
+  no forman UTF-8 válido se leen como latin-1 en el mismo punto, sin reiniciar la
+  lectura ni descartar bytes (antes se releía todo o se usaba errors="ignore").
+Solo usa biblioteca estándar.
+"""
+
+import codecs
+
+TAM_PREFIJO = 64 * 1024
+ERRORES = "respaldo_latin1"
+
+BOMS = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+
+def _respaldo_latin1(error):
+    """Manejador de errores: los bytes inválidos se interpretan como latin-1."""
+    if isinstance(error, UnicodeDecodeError):
+        return error.object[error.start:error.end].decode("latin-1"), error.end
+    raise error
+
+
+codecs.register_error(ERRORES, _respaldo_latin1)
+
+
+def detectar_en_prefijo(prefijo):
+    """Codificación a usar según los primeros bytes del archivo."""
+    for bom, nombre in BOMS:
+        if prefijo.startswith(bom):
+            return nombre
+    # surrogateescape deja cada byte inválido como un carácter U+DC80..U+DCFF
+    decodificador = codecs.getincrementaldecoder("utf-8")("surrogateescape")
+    texto = decodificador.decode(prefijo, final=False)
+    invalidos = 0
+    multibyte = 0
+    for ch in texto:
+        if ch > "\x7f":
+            if "\udc80" <= ch <= "\udcff":
+                invalidos += 1
+            else:
+                multibyte += 1
+    # Archivo UTF-8 con algún byte suelto de otra codificación: sigue siendo UTF-8
+    # (el manejador de errores resuelve esos bytes como latin-1).
+    if invalidos == 0 or multibyte > invalidos:
+        return "utf-8"
+    return "latin-1"
+
+
+def detectar_codificacion(flujo_binario, tam_prefijo=TAM_PREFIJO):
+    """
+    Lee solo el prefijo de un flujo binario abierto y devuelve la codificación.
+    El flujo se deja al inicio si admite seek.
+    """
+    prefijo = flujo_binario.read(tam_prefijo)
+    try:
+        flujo_binario.seek(0)
+    except (OSError, ValueError):
+        pass
+    return detectar_en_prefijo(prefijo)
+
+
+def admite_cortes(codificacion):
+    """
+    True si se puede partir el texto en cualquier byte '\\n' sin romper caracteres
+    (UTF-8 y codificaciones de un byte; no UTF-16).
+    """
+    return not codecs.lookup(codificacion).name.startswith("utf-16")
+
+
+def decodificar(datos, codificacion):
+    """Decodifica bytes sin perder ninguno: lo inválido se lee como latin-1."""
+    return datos.decode(codificacion, errors=ERRORES)
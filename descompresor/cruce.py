@@ -0,0 +1,252 @@
+"""
+Distancias entre dos conjuntos de filas: cada fila de una consulta (por ejemplo
+clientes nuevos) contra todas las filas de una referencia (los históricos).
+La referencia es una TablaColumnar en memoria que se prepara UNA vez; la
+consulta llega por lotes de filas crudas, así que puede venir de un archivo que
+no cabe en memoria. Por cada lote se obtiene el bloque completo de distancias
+(una fila de n_referencia valores por fila de consulta) o solo los k vecinos
+más cercanos.
+Métricas:
+- euclidiana: sobre las columnas numéricas estandarizadas con la media y la
+  desviación de la referencia.
+- mahalanobis: las filas se blanquean con la factorización de Cholesky de la
+  covarianza de la referencia (L·Lᵀ = S); así la distancia de Mahalanobis entre
+  dos filas es la euclidiana entre sus versiones blanqueadas.
+- gower: columnas numéricas (|x − y| / rango de la referencia, hasta 1) y
+  categóricas (coinciden o no, sin distinguir mayúsculas); cada par promedia
+  las columnas que ambas filas tienen.
+En euclidiana y mahalanobis se usan las filas de referencia completas; una fila
+de consulta con faltantes en esas columnas no tiene distancias (None).
+Solo usa biblioteca estándar.
+"""
+
+import heapq
+from array import array
+from itertools import repeat
+from math import dist
+from operator import add, mul
+
+from .distancias import centros_escalas, mascara_validos, vectores_filas
+from .tabla import _NO_NUMERICO, a_numero, a_texto
+
+METRICAS_CRUCE = ("euclidiana", "mahalanobis", "gower")
+# Pivote mínimo de Cholesky, relativo a la varianza de la columna
+TOLERANCIA_SINGULAR = 1e-12
+
+# ----------- Álgebra para Mahalanobis ------------
+
+def covarianza(columnas):
+    """Covarianza muestral (n − 1) de columnas de igual largo (listas o arrays)."""
+    n = len(columnas[0]) if columnas else 0
+    if n < 2:
+        raise ValueError("Se requieren al menos 2 filas válidas para calcular la covarianza.")
+    medias = [sum(c) / n for c in columnas]
+    centradas = [array("d", [x - media for x in c]) for c, media in zip(columnas, medias)]
+    m = len(columnas)
+    cov = [[0.0] * m for _ in range(m)]
+    for j in range(m):
+        for k in range(j, m):
+            cov[j][k] = cov[k][j] = sum(map(mul, centradas[j], centradas[k])) / (n - 1)
+    return medias, cov
+
+
+def cholesky(matriz):
+    """L triangular inferior con L·Lᵀ = matriz; ValueError si no es definida positiva."""
+    m = len(matriz)
+    L = [[0.0] * m for _ in range(m)]
+    for i in range(m):
+        for j in range(i + 1):
+            suma = matriz[i][j] - sum(map(mul, L[i][:j], L[j][:j]))
+            if i == j:
+                if suma <= TOLERANCIA_SINGULAR * max(matriz[i][i], 1.0):
+                    raise ValueError("La matriz de covarianza es singular o casi singular "
+                                     "(columnas constantes o linealmente dependientes).")
+                L[i][i] = suma ** 0.5
+            else:
+                L[i][j] = suma / L[j][j]
+    return L
+
+
+def blanquear(x, medias, L):
+    """z = L⁻¹ (x − medias) por sustitución hacia adelante."""
+    z = []
+    for i, fila in enumerate(L):
+        z.append((x[i] - medias[i] - sum(map(mul, fila[:i], z))) / fila[i])
+    return tuple(z)
+
+# ----------- Referencia ------------
+
+class ReferenciaCruce:
+    """
+    Tabla de referencia preparada para medir filas de consulta contra ella.
+    - metrica: "euclidiana", "mahalanobis" o "gower".
+    - indices: columnas de la referencia a usar (por defecto las numéricas, o
+      todas en gower).
+    Las filas de consulta se emparejan por nombre de columna (alinear) o, sin
+    encabezado, por posición.
+    """
+
+    def __init__(self, tabla, metrica="euclidiana", indices=None):
+        metrica = str(metrica).strip().lower()
+        if metrica not in METRICAS_CRUCE:
+            raise ValueError(f"Métrica no soportada: {metrica!r}")
+        if indices is None:
+            indices = list(range(tabla.n_columnas)) if metrica == "gower" else tabla.indices_numericos()
+        if not indices:
+            raise ValueError("La referencia no tiene columnas para comparar.")
+        self.tabla = tabla
+        self.metrica = metrica
+        self.indices = list(indices)
+        self.posiciones = list(self.indices)
+        if metrica == "gower":
+            self._preparar_gower()
+        else:
+            self._preparar_vectores()
+
+    @property
+    def n_referencia(self):
+        return len(self.filas_referencia)
+
+    def alinear(self, encabezado_consulta):
+        """Ubica en la consulta cada columna usada; ValueError si falta alguna."""
+        if not encabezado_consulta:
+            self.posiciones = list(self.indices)
+            return
+        nombres = [str(nm).strip().lower() for nm in encabezado_consulta]
+        posiciones = []
+        for j in self.indices:
+            nombre = str(self.tabla.encabezado[j]).strip().lower()
+            if nombre not in nombres:
+                raise ValueError(f"La consulta no tiene la columna {self.tabla.encabezado[j]!r}.")
+            posiciones.append(nombres.index(nombre))
+        self.posiciones = posiciones
+
+    # --- Euclidiana y Mahalanobis: vectores ---
+
+    def _preparar_vectores(self):
+        columnas = [self.tabla.columna(j) for j in self.indices]
+        for col in columnas:
+            if col.tipo != "numerico":
+                raise ValueError(f"La columna {col.nombre!r} no es numérica.")
+        if self.metrica == "euclidiana":
+            self.centros, self.escalas = centros_escalas(columnas)
+            self.filas_referencia, self.vectores = vectores_filas(self.tabla, self.indices)
+            return
+        self.filas_referencia, crudos = vectores_filas(self.tabla, self.indices, estandarizar=False)
+        self.medias, cov = covarianza([array("d", c) for c in zip(*crudos)] if crudos else [])
+        self.L = cholesky(cov)
+        self.vectores = [blanquear(x, self.medias, self.L) for x in crudos]
+
+    def _vector_consulta(self, fila):
+        """Vector de la fila de consulta en el mismo espacio que la referencia; None si le falta algo."""
+        x = []
+        n = len(fila)
+        for pos in self.posiciones:
+            v = a_numero(fila[pos]) if pos < n else None
+            if v is None or v is _NO_NUMERICO:
+                return None
+            x.append(v)
+        if self.metrica == "mahalanobis":
+            return blanquear(x, self.medias, self.L)
+        return tuple(v if e is None else (v - c) / e
+                     for v, c, e in zip(x, self.centros, self.escalas))
+
+    # --- Gower: columnas ---
+
+    def _preparar_gower(self):
+        self.filas_referencia = list(range(self.tabla.n_filas))
+        self.columnas_gower = []
+        for j in self.indices:
+            col = self.tabla.columna(j)
+            mascara = mascara_validos(col) if col.tipo == "numerico" else None
+            if col.tipo == "numerico":
+                mn, mx = col.minimo_maximo()
+                if mn is None:
+                    continue
+                inverso = 1.0 / (mx - mn) if mx > mn else 0.0
+                self.columnas_gower.append((j, "numerico", col.valores, mascara, (mn, mx, inverso)))
+            else:
+                canon = {}
+                mapa = [canon.setdefault(cat.lower(), len(canon)) for cat in col.categorias]
+                codigos = array("i", [mapa[c] if c >= 0 else -1 for c in col.codigos])
+                if col.n_faltantes:
+                    mascara = array("d", [0.0 if c < 0 else 1.0 for c in codigos])
+                self.columnas_gower.append((j, "categorico", codigos, mascara, canon))
+
+    def _distancias_gower(self, fila):
+        n = self.tabla.n_filas
+        n_fila = len(fila)
+        posicion = dict(zip(self.indices, self.posiciones))
+        suma = [0.0] * n
+        contadas = [0.0] * n
+        comunes = 0
+        for j, tipo, valores, mascara, extra in self.columnas_gower:
+            pos = posicion[j]
+            celda = fila[pos] if pos < n_fila else None
+            if tipo == "numerico":
+                x = a_numero(celda)
+                if x is None or x is _NO_NUMERICO:
+                    continue
+                mn, mx, inverso = extra
+                aporte = [abs(x - v) * inverso for v in valores]
+                if not mn <= x <= mx:
+                    # Fuera del rango de la referencia: la diferencia se satura en 1
+                    aporte = [d if d < 1.0 else 1.0 for d in aporte]
+            else:
+                txt = a_texto(celda)
+                if txt is None:
+                    continue
+                q = extra.get(txt.lower(), -2)
+                aporte = [0.0 if c == q else 1.0 for c in valores]
+            if mascara is None:
+                comunes += 1
+            else:
+                aporte = map(mul, aporte, mascara)
+                contadas = list(map(add, contadas, mascara))
+            suma = list(map(add, suma, aporte))
+        # Sin columnas en común el par no se puede comparar: distancia 1.0 (como gower.py)
+        return array("d", [s / (c + comunes) if c + comunes else 1.0
+                           for s, c in zip(suma, contadas)])
+
+    # --- Lotes de consulta ---
+
+    def distancias(self, fila):
+        """array('d') con la distancia de la fila de consulta a cada fila de referencia, o None."""
+        if self.metrica == "gower":
+            return self._distancias_gower(fila)
+        q = self._vector_consulta(fila)
+        if q is None:
+            return None
+        return array("d", map(dist, repeat(q, len(self.vectores)), self.vectores))
+
+    def distancias_lote(self, filas):
+        """Bloque de distancias: una entrada (array o None) por fila de consulta."""
+        return [self.distancias(fila) for fila in filas]
+
+    def vecinos_lote(self, filas, k):
+        """
+        Los k vecinos más cercanos de cada fila de consulta: lista de pares
+        (fila de la tabla de referencia, distancia), de menor a mayor ([] si no hay distancias).
+        """
+        resultado = []
+        referencia = self.filas_referencia
+        for fila in filas:
+            d = self.distancias(fila)
+            if d is None:
+                resultado.append([])
+                continue
+            cercanos = heapq.nsmallest(k, range(len(d)), key=d.__getitem__)
+            resultado.append([(referencia[i], d[i]) for i in cercanos])
+        return resultado
+
+
+def cruzar_lotes(referencia, lotes, k=None):
+    """
+    Generador: por cada lote de filas de consulta, (filas, resultado) con el bloque
+    completo (k None) o los k vecinos más cercanos de cada fila.
+    """
+    for filas in lotes:
+        if k is None:
+            yield filas, referencia.distancias_lote(filas)
+        else:
+            yield filas, referencia.vecinos_lote(filas, k)
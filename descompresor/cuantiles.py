@@ -0,0 +1,150 @@
+"""
+Mediana y MAD sin ordenar, para estandarizar con estadísticos robustos.
+- seleccionar: k-ésimo menor en tiempo lineal esperado (quickselect con pivote
+  aleatorio y partición en tres: menores / iguales / mayores).
+- mediana_y_mad: mediana y desviación absoluta mediana (MAD), una selección cada una.
+- SketchKLL: sketch de cuantiles en flujo (Karnin, Lang y Liberty): una pasada,
+  memoria O(k log(n/k)), error de rango ~1/k. Sirve para archivos que no caben
+  en memoria y se puede combinar entre trozos.
+Solo usa biblioteca estándar.
+"""
+
+import math
+import random
+
+# Factor que hace del MAD un estimador de la desviación estándar con datos normales
+ESCALA_MAD = 1.4826
+# Por debajo de este tamaño ordenar es más rápido que seguir partiendo
+MINIMO_SELECCION = 32
+
+# Tamaño del nivel superior del sketch KLL y factor de reducción entre niveles
+TAM_SKETCH = 200
+FACTOR_KLL = 2.0 / 3.0
+
+_azar = random.Random(12345)
+
+# ----------- Selección en tiempo lineal ------------
+
+def seleccionar(valores, k):
+    """k-ésimo menor (0-based) de 'valores' sin ordenarlos ni modificarlos."""
+    if not 0 <= k < len(valores):
+        raise IndexError("k fuera de rango")
+    actual = valores
+    while len(actual) > MINIMO_SELECCION:
+        pivote = actual[_azar.randrange(len(actual))]
+        menores = [x for x in actual if x < pivote]
+        if k < len(menores):
+            actual = menores
+            continue
+        mayores = [x for x in actual if x > pivote]
+        n_hasta_pivote = len(actual) - len(mayores)
+        if k < n_hasta_pivote:
+            return pivote
+        k -= n_hasta_pivote
+        actual = mayores
+    return sorted(actual)[k]
+
+
+def mediana(valores):
+    """Mediana (promedio de los dos centrales si la cantidad es par); None si no hay valores."""
+    n = len(valores)
+    if n == 0:
+        return None
+    alto = seleccionar(valores, n // 2)
+    if n % 2:
+        return alto
+    # El central bajo es el mayor de los menores que 'alto' (o 'alto' si se repite)
+    menores = [x for x in valores if x < alto]
+    bajo = max(menores) if len(menores) == n // 2 else alto
+    return (bajo + alto) / 2.0
+
+
+def mediana_y_mad(valores):
+    """(mediana, MAD) de una lista de números; (None, None) si está vacía."""
+    centro = mediana(valores)
+    if centro is None:
+        return None, None
+    return centro, mediana([abs(x - centro) for x in valores])
+
+# ----------- Cuantil aproximado en flujo ------------
+
+class SketchKLL:
+    """
+    Sketch KLL de cuantiles: niveles de compactadores donde cada elemento del
+    nivel h representa 2**h valores. Al llenarse un nivel se ordena y se sube
+    uno de cada dos elementos (alternando al azar). El error es de rango (no de
+    valor), así que los atípicos extremos no arrastran la mediana.
+    Se pueden combinar sketches de distintos trozos (combinar).
+    """
+
+    def __init__(self, k=TAM_SKETCH):
+        self.k = k
+        self.n = 0
+        self.niveles = [[]]
+        self.guardados = 0
+        self._tope = self._capacidad(0)
+        self._azar = random.Random(k)
+
+    def _capacidad(self, h):
+        profundidad = len(self.niveles) - h - 1
+        return int(math.ceil(self.k * FACTOR_KLL ** profundidad)) + 1
+
+    def _compactar(self):
+        """Compacta el nivel más bajo que esté lleno (siempre hay uno si se llegó al tope)."""
+        for h, nivel in enumerate(self.niveles):
+            if len(nivel) >= self._capacidad(h):
+                if h + 1 == len(self.niveles):
+                    self.niveles.append([])
+                    self._tope = sum(self._capacidad(j) for j in range(len(self.niveles)))
+                nivel.sort()
+                mitad = nivel[self._azar.random() < 0.5::2]
+                self.niveles[h + 1].extend(mitad)
+                self.guardados -= len(nivel) - len(mitad)
+                del nivel[:]
+                return
+
+    def agregar(self, x):
+        self.n += 1
+        self.niveles[0].append(x)
+        self.guardados += 1
+        if self.guardados >= self._tope:
+            self._compactar()
+
+    def agregar_valores(self, valores):
+        """Agrega los valores int/float de un iterable (texto y None se ignoran)."""
+        for x in valores:
+            if isinstance(x, (int, float)):
+                self.agregar(x)
+
+    def combinar(self, otro):
+        """Suma al sketch los valores resumidos en otro. Devuelve self."""
+        while len(self.niveles) < len(otro.niveles):
+            self.niveles.append([])
+        for nivel, del_otro in zip(self.niveles, otro.niveles):
+            nivel.extend(del_otro)
+        self.n += otro.n
+        self.guardados += otro.guardados
+        self._tope = sum(self._capacidad(j) for j in range(len(self.niveles)))
+        while self.guardados >= self._tope:
+            self._compactar()
+        return self
+
+    def cuantil(self, q):
+        """Valor aproximado del cuantil q (0..1); None sin datos."""
+        if self.n == 0:
+            return None
+        pares = sorted((x, 1 << h) for h, nivel in enumerate(self.niveles) for x in nivel)
+        total = sum(peso for _, peso in pares)
+        objetivo = q * total
+        acumulado = 0
+        for x, peso in pares:
+            acumulado += peso
+            if acumulado >= objetivo:
+                return x
+        return pares[-1][0]
+
+    def valor(self):
+        """Mediana: exacta mientras no hubo compactación, aproximada después."""
+        if len(self.niveles) == 1:
+            return mediana(self.niveles[0])
+        return self.cuantil(0.5)
@@ -0,0 +1,558 @@
+"""
+Matrices de distancia sobre la TablaColumnar.
+- distancias_columnas: distancia euclidiana entre todos los pares de columnas
+  numéricas. Las filas se recorren UNA vez, por bloques: en cada bloque se
+  toman los trozos de todas las columnas y se acumula Σ(a − b)² de cada par con
+  math.dist (en C y sin la cancelación de ‖a‖² + ‖b‖² − 2·a·b cuando las
+  columnas comparten un desplazamiento grande), en lugar de m² recorridos
+  completos de a dos columnas.
+- distancias_filas: distancia entre todos los pares de filas, sobre las columnas
+  numéricas estandarizadas, con la métrica como parámetro (euclidiana y su
+  cuadrado, Manhattan, Chebyshev, Minkowski p y coseno). Un solo motor: se
+  calcula el triángulo superior por baldosas del tamaño de la caché, en franjas
+  de filas repartidas entre procesos, y se guarda en forma condensada: un
+  array('d') de n·(n−1)/2 valores, la mitad de memoria que la matriz cuadrada.
+  guardar_distancias lo escribe como float64 crudos o como matriz CSV.
+Entre columnas los faltantes se manejan con máscaras (1.0 válido, 0.0 faltante;
+el valor ya es 0.0 en la tabla) y la semántica es la de distancia_euclidiana_col:
+en cada par se ignoran las filas donde falta cualquiera de los dos valores.
+Entre filas, con faltantes como NaN, cada par usa las columnas válidas en ambas
+filas: por baldosa y por columna, los faltantes de las otras filas toman el
+valor de la fila comparada (diferencia 0.0) y el núcleo de la métrica sigue en C.
+Solo usa biblioteca estándar.
+"""
+
+import csv
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from math import dist, inf, sqrt
+from multiprocessing import cpu_count
+from operator import add, mul, sub
+
+from .Rms_lector import LectorXLSXCSVError
+from .momentos import MomentosColumna
+
+# Filas por bloque: los trozos de todas las columnas de un bloque caben en caché
+TAM_BLOQUE_FILAS = 4096
+# Filas por baldosa en las distancias entre filas: dos baldosas de vectores caben en caché
+TAM_BALDOSA = 256
+# Por debajo de estos pares no compensa levantar procesos
+UMBRAL_PARES_PARALELO = 2_000_000
+NAN = float("nan")
+
+METRICAS = ("euclidiana", "euclidiana2", "manhattan", "chebyshev", "minkowski", "coseno")
+EXTENSIONES_BINARIAS = (".bin", ".f64")
+
+# ----------- Máscaras de faltantes ------------
+
+def mascara_validos(col, inicio=0, fin=None):
+    """array('d') con 1.0 en las filas válidas y 0.0 en las faltantes; None si no hay faltantes."""
+    if fin is None:
+        fin = len(col)
+    if col.n_faltantes == 0:
+        return None
+    bits = col.faltantes
+    return array("d", [0.0 if (bits[i >> 3] >> (i & 7)) & 1 else 1.0
+                       for i in range(inicio, fin)])
+
+
+def _producto(u, v):
+    """Producto escalar de dos arrays del mismo largo (el bucle corre en C)."""
+    return sum(map(mul, u, v))
+
+# ----------- Distancias entre columnas ------------
+
+def distancias_columnas(tabla, indices=None, tam_bloque=TAM_BLOQUE_FILAS):
+    """
+    Distancia euclidiana entre cada par de columnas numéricas de la tabla.
+    - indices: columnas a comparar (por defecto tabla.indices_numericos()).
+    Devuelve (indices, distancias, usados): matrices simétricas m x m (listas de
+    listas) con la distancia y las filas válidas de cada par; la diagonal es 0.0
+    y n_filas menos los faltantes de la columna. Un par sin filas válidas da 0.0.
+    """
+    if indices is None:
+        indices = tabla.indices_numericos()
+    columnas = [tabla.columna(j) for j in indices]
+    for col in columnas:
+        if col.tipo != "numerico":
+            raise ValueError(f"La columna {col.nombre!r} no es numérica.")
+    m = len(columnas)
+    n = tabla.n_filas
+    sumas = [[0.0] * m for _ in range(m)]
+    usados = [[0] * m for _ in range(m)]
+
+    for inicio in range(0, n, tam_bloque):
+        fin = min(inicio + tam_bloque, n)
+        largo = fin - inicio
+        # Tuplas: el tipo con que math.dist es más rápido
+        trozos = [tuple(col.valores[inicio:fin]) for col in columnas]
+        mascaras = [mascara_validos(col, inicio, fin) for col in columnas]
+        validos = [largo if mk is None else int(sum(mk)) for mk in mascaras]
+        for j in range(m):
+            a = trozos[j]
+            ma = mascaras[j]
+            fila_sumas = sumas[j]
+            fila_usados = usados[j]
+            fila_usados[j] += validos[j]
+            for k in range(j + 1, m):
+                b = trozos[k]
+                mb = mascaras[k]
+                if ma is None and mb is None:
+                    d = dist(a, b)
+                    comunes = largo
+                else:
+                    # El faltante ya vale 0.0: multiplicar cada lado por la máscara
+                    # del otro anula las filas donde falta cualquiera de los dos
+                    d = dist(a if mb is None else tuple(map(mul, a, mb)),
+                             b if ma is None else tuple(map(mul, b, ma)))
+                    if ma is None:
+                        comunes = validos[k]
+                    elif mb is None:
+                        comunes = validos[j]
+                    else:
+                        comunes = int(_producto(ma, mb))
+                fila_sumas[k] += d * d
+                fila_usados[k] += comunes
+
+    distancias = [[0.0] * m for _ in range(m)]
+    for j in range(m):
+        for k in range(j + 1, m):
+            suma = sumas[j][k]
+            d = suma ** 0.5 if usados[j][k] else 0.0
+            distancias[j][k] = distancias[k][j] = d
+            usados[k][j] = usados[j][k]
+    return list(indices), distancias, usados
+
+# ----------- Forma condensada ------------
+
+def largo_condensado(n):
+    return n * (n - 1) // 2
+
+
+def indice_condensado(i, j, n):
+    """Posición del par (i, j), i != j, en el vector condensado de n filas."""
+    if i > j:
+        i, j = j, i
+    return n * i - i * (i + 1) // 2 + (j - i - 1)
+
+
+def distancia_condensada(condensada, i, j, n):
+    """Distancia entre las filas i y j a partir del vector condensado (0.0 si i == j)."""
+    if i == j:
+        return 0.0
+    return condensada[indice_condensado(i, j, n)]
+
+
+def condensada_a_matriz(condensada, n):
+    """Matriz cuadrada n x n (listas de listas) desde el vector condensado."""
+    matriz = [[0.0] * n for _ in range(n)]
+    k = 0
+    for i in range(n):
+        fila = matriz[i]
+        for j in range(i + 1, n):
+            fila[j] = matriz[j][i] = condensada[k]
+            k += 1
+    return matriz
+
+# ----------- Distancias entre filas ------------
+
+def centros_escalas(columnas):
+    """
+    (centros, escalas) de columnas numéricas: media y desviación poblacional.
+    La escala es None si la columna no tiene varianza (no se estandariza).
+    """
+    centros = []
+    escalas = []
+    for col in columnas:
+        mom = MomentosColumna()
+        mom.agregar_valores(v for _, v in col.validos())
+        desviacion = mom.desviacion()
+        centros.append(mom.obtener_media())
+        escalas.append(desviacion if desviacion else None)
+    return centros, escalas
+
+
+def vectores_filas(tabla, indices=None, estandarizar=True, completas=True):
+    """
+    Vectores por fila (tuplas de float, el tipo con que math.dist es más rápido)
+    con las columnas numéricas elegidas.
+    Con estandarizar=True cada columna pasa a puntaje Z (media y desviación
+    poblacional; las columnas sin varianza quedan como están).
+    Con completas=True las filas con algún faltante se dejan fuera; con False se
+    conservan con NaN en los faltantes (distancias_filas las compara por pares
+    completos).
+    Devuelve (filas_usadas, vectores): índices de fila de la tabla y sus vectores.
+    """
+    if indices is None:
+        indices = tabla.indices_numericos()
+    columnas = [tabla.columna(j) for j in indices]
+    for col in columnas:
+        if col.tipo != "numerico":
+            raise ValueError(f"La columna {col.nombre!r} no es numérica.")
+    datos = []
+    if estandarizar:
+        centros, escalas = centros_escalas(columnas)
+    else:
+        centros = escalas = [None] * len(columnas)
+    for col, centro, escala in zip(columnas, centros, escalas):
+        valores = col.valores
+        if escala is not None:
+            valores = array("d", [(v - centro) / escala for v in valores])
+        if not completas and col.n_faltantes:
+            valores = array("d", valores)
+            for i in range(len(valores)):
+                if col.es_faltante(i):
+                    valores[i] = NAN
+        datos.append(valores)
+
+    if not completas:
+        return list(range(tabla.n_filas)), list(zip(*datos))
+    con_faltantes = [col for col in columnas if col.n_faltantes]
+    filas_usadas = []
+    vectores = []
+    for i, vector in enumerate(zip(*datos)):
+        if con_faltantes and any(col.es_faltante(i) for col in con_faltantes):
+            continue
+        filas_usadas.append(i)
+        vectores.append(vector)
+    return filas_usadas, vectores
+
+
+# ----------- Métricas ------------
+
+def _euclidiana2(a, b):
+    d = dist(a, b)
+    return d * d
+
+
+def _manhattan(a, b):
+    return sum(map(abs, map(sub, a, b)))
+
+
+def _chebyshev(a, b):
+    return max(map(abs, map(sub, a, b)), default=0.0)
+
+
+def _coseno(u, v):
+    # Con u y v de norma 1 (preparar_vectores): 1 − u·v = ‖u − v‖² / 2
+    d = dist(u, v)
+    return 0.5 * d * d
+
+
+# Métricas que salen de math.dist elevada al cuadrado y escalada
+_ESCALA_CUADRADO = {"euclidiana2": 1.0, "coseno": 0.5}
+
+
+def normalizar_metrica(metrica, p=2.0):
+    """
+    (metrica, p) validados. Minkowski con p = 1, 2 o inf se resuelve con el
+    núcleo especializado (Manhattan, euclidiana, Chebyshev), que es más rápido.
+    """
+    metrica = str(metrica).strip().lower()
+    if metrica not in METRICAS:
+        raise ValueError(f"Métrica no soportada: {metrica!r}")
+    if metrica == "minkowski":
+        p = float(p)
+        if not p >= 1.0:
+            raise ValueError("Minkowski necesita p >= 1.")
+        if p == 1.0:
+            metrica = "manhattan"
+        elif p == 2.0:
+            metrica = "euclidiana"
+        elif p == inf:
+            metrica = "chebyshev"
+    return metrica, p
+
+
+def nucleo_metrica(metrica, p=2.0):
+    """Función (a, b) -> distancia entre dos vectores preparados con preparar_vectores."""
+    metrica, p = normalizar_metrica(metrica, p)
+    if metrica == "euclidiana":
+        return dist
+    if metrica == "euclidiana2":
+        return _euclidiana2
+    if metrica == "manhattan":
+        return _manhattan
+    if metrica == "chebyshev":
+        return _chebyshev
+    if metrica == "coseno":
+        return _coseno
+    inverso = 1.0 / p
+
+    def _minkowski(a, b):
+        return sum(map(pow, map(abs, map(sub, a, b)), repeat(p))) ** inverso
+    return _minkowski
+
+
+def preparar_vectores(vectores, metrica):
+    """
+    Coseno trabaja con vectores de norma 1 y una coordenada extra en 0.0. Un vector
+    nulo pasa a (0, ..., 0, 1): queda a distancia 1.0 de todos (0.0 de otro nulo).
+    Las demás métricas usan los vectores tal cual.
+    """
+    if normalizar_metrica(metrica)[0] != "coseno":
+        return vectores
+    unitarios = []
+    for v in vectores:
+        norma = dist(v, repeat(0.0, len(v)))
+        if norma > 0.0:
+            unitarios.append(tuple(x / norma for x in v) + (0.0,))
+        else:
+            unitarios.append((0.0,) * len(v) + (1.0,))
+    return unitarios
+
+# ----------- Pares con faltantes ------------
+
+def _preparar_faltantes(vectores):
+    """
+    Datos para comparar por pares completos las filas que tienen NaN; None si no
+    hay ninguna. Por columnas, para recorrer de una vez una columna en muchas
+    filas: valores (NaN -> 0.0), máscara (1.0 válido, 0.0 falta) y las filas
+    donde falta.
+    """
+    incompletos = [i for i, v in enumerate(vectores) if any(x != x for x in v)]
+    if not incompletos:
+        return None
+    es_incompleto = bytearray(len(vectores))
+    for i in incompletos:
+        es_incompleto[i] = 1
+    columnas = list(zip(*vectores))
+    return {"incompletos": incompletos, "es_incompleto": es_incompleto,
+            "valores": [[0.0 if x != x else x for x in col] for col in columnas],
+            "mascaras": [tuple(0.0 if x != x else 1.0 for x in col) for col in columnas],
+            "huecos": [[i for i, x in enumerate(col) if x != x] for col in columnas]}
+
+
+def _pares_con_faltantes(fila_x, fila_m, xs, ms, huecos, desde, metrica, f):
+    """
+    Distancias de una fila (fila_x con NaN -> 0.0 y su máscara fila_m) con varias
+    otras dadas por columnas: xs[c] (lista propia, se modifica) y ms[c] son los
+    valores y la máscara de la columna c en esas filas, a partir de la posición
+    'desde' de un bloque donde la columna falta en las posiciones huecos[c].
+    Solo cuentan las columnas válidas en ambas filas (como
+    distancia_euclidiana_col); NaN si no comparten ninguna.
+    Se trabaja por columnas sobre todas las filas a la vez: se dejan las
+    columnas válidas de la fila y, en cada una, los faltantes de las otras toman
+    el valor de la fila (diferencia 0.0), así el núcleo f (math.dist y compañía,
+    que restan antes de sumar) se aplica en C a cada par tal cual.
+    Coseno necesita además las normas sobre las columnas comunes: se acumulan.
+    """
+    largo = len(xs[0]) if xs else 0
+    if metrica == "coseno":
+        comunes = [0.0] * largo
+        prod = [0.0] * largo
+        norma_i = [0.0] * largo
+        norma_j = [0.0] * largo
+        for a, ma, x, m in zip(fila_x, fila_m, xs, ms):
+            if ma:
+                comunes = list(map(add, comunes, m))
+                # Los faltantes de las otras filas ya valen 0.0 en x
+                prod = list(map(add, prod, map(mul, x, repeat(a))))
+                norma_i = list(map(add, norma_i, map(mul, m, repeat(a * a))))
+                norma_j = list(map(add, norma_j, map(mul, x, x)))
+        salida = array("d", [NAN]) * largo
+        for k, (c, ab, aa, bb) in enumerate(zip(comunes, prod, norma_i, norma_j)):
+            if not c:
+                continue
+            if aa == 0.0 or bb == 0.0:
+                salida[k] = 0.0 if aa == bb else 1.0
+            else:
+                d = 1.0 - ab / sqrt(aa * bb)
+                salida[k] = d if d > 0.0 else 0.0
+        return salida
+
+    propia = []
+    columnas = []
+    validas = []
+    for a, ma, x, m, h in zip(fila_x, fila_m, xs, ms, huecos):
+        if ma:
+            for k in h[bisect_left(h, desde):]:
+                x[k - desde] = a
+            propia.append(a)
+            columnas.append(x)
+            validas.append(m)
+    if not propia:
+        return array("d", [NAN]) * largo
+    valores = array("d", map(f, repeat(tuple(propia), largo), zip(*columnas)))
+    # Sin columnas comunes todas las diferencias son 0.0: solo esos pares se revisan
+    k = _siguiente_cero(valores, 0)
+    while k is not None:
+        if not any(m[k] for m in validas):
+            valores[k] = NAN
+        k = _siguiente_cero(valores, k + 1)
+    return valores
+
+
+def _siguiente_cero(valores, desde):
+    """Posición del siguiente 0.0 desde 'desde' (la búsqueda corre en C); None si no hay."""
+    try:
+        return valores.index(0.0, desde)
+    except ValueError:
+        return None
+
+# ----------- Motor por baldosas ------------
+
+def _largo_franja(ini_i, fin_i, n):
+    """Pares de las filas [ini_i, fin_i) con las siguientes: un tramo contiguo del condensado."""
+    return sum(n - 1 - i for i in range(ini_i, fin_i))
+
+
+def _franja(vectores, ini_i, fin_i, metrica, p, tam_baldosa, faltantes=None):
+    """
+    Distancias de las filas [ini_i, fin_i) con todas las posteriores, recorridas
+    por baldosas de columnas [ini_j, fin_j): cada baldosa de vectores se reutiliza
+    para todas las filas de la franja mientras está en caché.
+    Los pares donde alguna fila tiene faltantes se calculan por baldosa con
+    _pares_con_faltantes (ver _preparar_faltantes): una fila incompleta contra
+    todo su tramo, una completa contra las incompletas del tramo.
+    Devuelve el tramo del vector condensado que empieza en el par (ini_i, ini_i + 1).
+    """
+    n = len(vectores)
+    escala = _ESCALA_CUADRADO.get(metrica)
+    f_exacta = nucleo_metrica(metrica, p)
+    f = dist if escala is not None else f_exacta
+    if faltantes is not None:
+        incompletos = faltantes["incompletos"]
+        es_incompleto = faltantes["es_incompleto"]
+        col_x = faltantes["valores"]
+        col_m = faltantes["mascaras"]
+        col_h = faltantes["huecos"]
+        filas_x = [[x[i] for x in col_x] for i in range(ini_i, fin_i)]
+        filas_m = [[m[i] for m in col_m] for i in range(ini_i, fin_i)]
+    base = indice_condensado(ini_i, ini_i + 1, n) if ini_i + 1 < n else 0
+    salida = array("d", [0.0]) * _largo_franja(ini_i, fin_i, n)
+    for ini_j in range(ini_i, n, tam_baldosa):
+        fin_j = min(ini_j + tam_baldosa, n)
+        destino = vectores[ini_j:fin_j]
+        if faltantes is not None:
+            # Columnas de la baldosa entera y solo de sus filas incompletas, con
+            # las posiciones de los faltantes relativas a cada una
+            baldosa_x = [x[ini_j:fin_j] for x in col_x]
+            baldosa_m = [m[ini_j:fin_j] for m in col_m]
+            baldosa_h = [[k - ini_j for k in h[bisect_left(h, ini_j):bisect_left(h, fin_j)]]
+                         for h in col_h]
+            inc = incompletos[bisect_left(incompletos, ini_j):bisect_left(incompletos, fin_j)]
+            inc_x = [list(map(x.__getitem__, inc)) for x in col_x]
+            inc_m = [tuple(map(m.__getitem__, inc)) for m in col_m]
+            inc_h = [[k for k, v in enumerate(m) if not v] for m in inc_m]
+        for i in range(ini_i, fin_i):
+            desde = max(i + 1, ini_j) - ini_j
+            if desde >= fin_j - ini_j:
+                continue
+            primero = desde + ini_j
+            pos = indice_condensado(i, primero, n) - base
+            if faltantes is not None and es_incompleto[i]:
+                valores = _pares_con_faltantes(
+                    filas_x[i - ini_i], filas_m[i - ini_i],
+                    [x[desde:] for x in baldosa_x], [m[desde:] for m in baldosa_m],
+                    baldosa_h, desde, metrica, f_exacta)
+                salida[pos:pos + len(valores)] = valores
+                continue
+            tramo = destino[desde:]
+            valores = array("d", map(f, repeat(vectores[i], len(tramo)), tramo))
+            if escala is not None:
+                valores = array("d", [escala * d * d for d in valores])
+            if faltantes is not None:
+                k = bisect_left(inc, primero)
+                if k < len(inc):
+                    otros = _pares_con_faltantes(
+                        filas_x[i - ini_i], filas_m[i - ini_i],
+                        [x[k:] for x in inc_x], [m[k:] for m in inc_m],
+                        inc_h, k, metrica, f_exacta)
+                    for j, d in zip(inc[k:], otros):
+                        valores[j - primero] = d
+            salida[pos:pos + len(valores)] = valores
+    return salida
+
+
+_TRABAJO = {}
+
+
+def _iniciar_trabajador(vectores, metrica, p, tam_baldosa, faltantes):
+    """Cada proceso recibe los vectores una sola vez, no con cada franja."""
+    _TRABAJO["args"] = (vectores, metrica, p, tam_baldosa, faltantes)
+
+
+def _franja_de_trabajador(limites):
+    vectores, metrica, p, tam_baldosa, faltantes = _TRABAJO["args"]
+    return _franja(vectores, limites[0], limites[1], metrica, p, tam_baldosa, faltantes)
+
+
+def distancias_filas(vectores, metrica="euclidiana", p=2.0, tam_baldosa=TAM_BALDOSA,
+                     procesos=None):
+    """
+    Distancia entre todos los pares de vectores (filas) con la métrica elegida:
+    euclidiana, euclidiana2 (al cuadrado), manhattan, chebyshev, minkowski (con
+    p >= 1) o coseno (1 − similitud coseno).
+    Devuelve el vector condensado: array('d') de n·(n−1)/2 valores en el orden
+    (0,1), (0,2), ..., (1,2), ... (ver indice_condensado).
+    Las filas se parten en franjas de tam_baldosa filas, cada una recorrida por
+    baldosas; con muchos pares las franjas se reparten entre 'procesos'.
+    Los faltantes van como NaN (vectores_filas con completas=False): cada par se
+    mide sobre las columnas válidas en ambas filas y da NaN si no comparte ninguna.
+    """
+    metrica, p = normalizar_metrica(metrica, p)
+    faltantes = _preparar_faltantes(vectores)
+    vectores = preparar_vectores(vectores, metrica)
+    n = len(vectores)
+    condensada = array("d", [0.0]) * largo_condensado(n)
+    franjas = [(ini, min(ini + tam_baldosa, n)) for ini in range(0, n - 1, tam_baldosa)]
+    if procesos is None:
+        procesos = cpu_count() or 1
+
+    if procesos <= 1 or len(franjas) <= 1 or len(condensada) < UMBRAL_PARES_PARALELO:
+        partes = (_franja(vectores, ini, fin, metrica, p, tam_baldosa, faltantes)
+                  for ini, fin in franjas)
+        for (ini, _), parte in zip(franjas, partes):
+            pos = indice_condensado(ini, ini + 1, n)
+            condensada[pos:pos + len(parte)] = parte
+        return condensada
+
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_trabajador,
+                             initargs=(vectores, metrica, p, tam_baldosa, faltantes)) as ejecutor:
+        for (ini, _), parte in zip(franjas, ejecutor.map(_franja_de_trabajador, franjas)):
+            pos = indice_condensado(ini, ini + 1, n)
+            condensada[pos:pos + len(parte)] = parte
+    return condensada
+
+# ----------- Salida ------------
+
+def formato_distancias(ruta, formato=None):
+    """'bin' si la extensión es binaria (.bin/.f64), si no 'csv'; valida el indicado."""
+    if formato is None:
+        formato = "bin" if ruta.lower().endswith(EXTENSIONES_BINARIAS) else "csv"
+    if formato not in ("csv", "bin"):
+        raise ValueError("Formato de salida no soportado: {}".format(formato))
+    return formato
+
+
+def guardar_distancias(condensada, n, ruta, formato=None, etiquetas=None):
+    """
+    Escribe las distancias de n filas:
+    - "bin": el vector condensado tal cual, float64 en el orden nativo de la máquina.
+    - "csv": la matriz cuadrada, fila por fila (sin armarla entera en memoria),
+      con 'etiquetas' como encabezado y primera columna si se dan.
+    """
+    formato = formato_distancias(ruta, formato)
+    try:
+        if formato == "bin":
+            with open(ruta, "wb") as f:
+                condensada.tofile(f)
+            return
+        with open(ruta, "w", newline="", encoding="utf-8") as f:
+            escritor = csv.writer(f)
+            if etiquetas is not None:
+                escritor.writerow([""] + list(etiquetas))
+            for i in range(n):
+                # Columna i de las filas anteriores (simétrica) + diagonal + tramo propio
+                fila = [condensada[indice_condensado(k, i, n)] for k in range(i)]
+                fila.append(0.0)
+                pos = indice_condensado(i, i + 1, n) if i + 1 < n else 0
+                fila.extend(condensada[pos:pos + n - 1 - i])
+                if etiquetas is not None:
+                    fila.insert(0, etiquetas[i])
+                escritor.writerow(fila)
+    except OSError as e:
+        raise LectorXLSXCSVError(f"Error al escribir las distancias: {e}") from e
@@ -0,0 +1,231 @@
+"""
+Filtros de filas simples, comunes a todos los lectores.
+Un filtro es una lista de condiciones (columna, operador, valor) unidas con Y:
+    [("region", "=", "Norte"), ("anio", ">=", 2020), ("mes", "in", [1, 2, 3])]
+Operadores: =, !=, <, <=, >, >=, in.
+Se puede escribir como texto: "region = Norte; anio >= 2020; mes in 1,2,3".
+El mismo filtro se traduce a SQL (SQLite) o se compila a un predicado que los
+lectores de texto y XLSX evalúan mientras parsean, antes de armar cada fila.
+Un valor numérico compara como número; uno de texto compara el texto de la celda.
+Una celda faltante no cumple ninguna condición (como NULL en SQL).
+Solo usa biblioteca estándar.
+"""
+
+import operator
+
+from .tabla import _NO_NUMERICO, a_numero, a_texto
+
+OPERADORES = ("=", "!=", "<", "<=", ">", ">=", "in")
+# Al buscar el operador en el texto, los de dos caracteres van primero
+_ORDEN_TEXTO = ("!=", "<=", ">=", "==", "=", "<", ">")
+
+# ----------- Texto -> condiciones ------------
+
+def _valor_literal(txt):
+    """'2020' -> 2020.0, '"Norte"' -> 'Norte', 'Norte' -> 'Norte'."""
+    txt = txt.strip()
+    if len(txt) >= 2 and txt[0] == txt[-1] and txt[0] in "\"'":
+        return txt[1:-1]
+    try:
+        return float(txt)
+    except ValueError:
+        return txt
+
+
+def parsear_filtro(texto):
+    """
+    Convierte "col op valor; col2 in a,b" en lista de condiciones.
+    Devuelve [] si el texto está vacío. Lanza ValueError si una condición no se entiende.
+    """
+    condiciones = []
+    if not texto or not texto.strip():
+        return condiciones
+    for parte in texto.split(";"):
+        parte = parte.strip()
+        if not parte:
+            continue
+        bajo = parte.lower()
+        pos_in = bajo.find(" in ")
+        if pos_in != -1:
+            columna = parte[:pos_in].strip()
+            valores = [_valor_literal(v) for v in parte[pos_in + 4:].split(",") if v.strip()]
+            if not columna or not valores:
+                raise ValueError(f"Condición inválida: {parte!r}")
+            condiciones.append((columna, "in", valores))
+            continue
+        for op in _ORDEN_TEXTO:
+            pos = parte.find(op)
+            if pos > 0:
+                columna = parte[:pos].strip()
+                valor = parte[pos + len(op):]
+                if not columna or not valor.strip():
+                    raise ValueError(f"Condición inválida: {parte!r}")
+                condiciones.append((columna, "=" if op == "==" else op, _valor_literal(valor)))
+                break
+        else:
+            raise ValueError(f"Condición inválida: {parte!r}")
+    return condiciones
+
+
+def validar_condiciones(condiciones):
+    """Normaliza y verifica una lista de condiciones; devuelve la lista lista para usar."""
+    normalizadas = []
+    for cond in condiciones or []:
+        if len(cond) != 3:
+            raise ValueError(f"Condición inválida: {cond!r}")
+        columna, op, valor = cond
+        op = str(op).strip().lower()
+        if op == "==":
+            op = "="
+        if op not in OPERADORES:
+            raise ValueError(f"Operador no soportado: {op!r}")
+        if op == "in":
+            if isinstance(valor, (str, bytes)) or not hasattr(valor, "__iter__"):
+                raise ValueError(f"'in' necesita una lista de valores: {cond!r}")
+            valor = list(valor)
+        normalizadas.append((columna, op, valor))
+    return normalizadas
+
+# ----------- Condiciones -> SQL ------------
+
+def filtro_a_sql(condiciones, citar):
+    """
+    Traduce las condiciones a un WHERE con parámetros '?'.
+    'citar' pone el nombre de columna entre comillas del motor.
+    Devuelve (texto_where, parametros); texto_where es "" si no hay condiciones.
+    """
+    partes = []
+    parametros = []
+    for columna, op, valor in validar_condiciones(condiciones):
+        if op == "in":
+            partes.append("{} IN ({})".format(citar(columna), ", ".join("?" * len(valor))))
+            parametros.extend(valor)
+        else:
+            partes.append("{} {} ?".format(citar(columna), op))
+            parametros.append(valor)
+    return " AND ".join(partes), parametros
+
+# ----------- Condiciones -> predicado en Python ------------
+
+_COMPARAR = {
+    "=": operator.eq, "!=": operator.ne,
+    "<": operator.lt, "<=": operator.le,
+    ">": operator.gt, ">=": operator.ge,
+}
+
+
+def _es_numero(valor):
+    return isinstance(valor, (int, float)) and not isinstance(valor, bool)
+
+
+def _indice_columna(columna, nombres):
+    """Índice 0-based: int tal cual; texto por nombre, o "3" como posición 1-based."""
+    if isinstance(columna, int):
+        return columna
+    for j, nm in enumerate(nombres):
+        if nm == columna:
+            return j
+    bajo = str(columna).lower()
+    for j, nm in enumerate(nombres):
+        if nm.lower() == bajo:
+            return j
+    txt = str(columna).lstrip("#")
+    if txt.isdigit() and int(txt) >= 1:
+        return int(txt) - 1
+    raise ValueError(f"La columna del filtro no existe: {columna!r}")
+
+
+def resolver_columnas(condiciones, encabezado=None):
+    """
+    Cambia la columna de cada condición por su índice 0-based según 'encabezado'.
+    El resultado es una lista de tuplas simples, apta para mandar a otros procesos.
+    """
+    nombres = [a_texto(c) or "" for c in encabezado] if encabezado else []
+    return [(_indice_columna(columna, nombres), op, valor)
+            for columna, op, valor in validar_condiciones(condiciones)]
+
+
+def _comparador(op, valor):
+    """Función celda -> bool para una condición."""
+    if op == "in":
+        numeros = set(float(v) for v in valor if _es_numero(v))
+        textos = set(str(v) for v in valor if not _es_numero(v))
+
+        def prueba(celda):
+            if numeros:
+                x = a_numero(celda)
+                if x is not None and x is not _NO_NUMERICO and x in numeros:
+                    return True
+            if textos:
+                return a_texto(celda) in textos
+            return False
+        return prueba
+
+    comparar = _COMPARAR[op]
+    if _es_numero(valor):
+        ref = float(valor)
+
+        def prueba(celda):
+            x = a_numero(celda)
+            return x is not None and x is not _NO_NUMERICO and comparar(x, ref)
+    else:
+        ref = str(valor)
+
+        def prueba(celda):
+            t = a_texto(celda)
+            return t is not None and comparar(t, ref)
+    return prueba
+
+
+def compilar(resueltas, por_referencia=False):
+    """
+    Predicado fila -> bool a partir de condiciones resueltas (resolver_columnas).
+    Solo mira las celdas que nombran las condiciones.
+    - por_referencia=False: la fila es una secuencia de celdas.
+    - por_referencia=True: la fila es un dict {columna 1-based: valor} (XLSX).
+    """
+    if por_referencia:
+        pruebas = [(j + 1, _comparador(op, valor)) for j, op, valor in resueltas]
+
+        def acepta(celdas):
+            for j, prueba in pruebas:
+                if not prueba(celdas.get(j)):
+                    return False
+            return True
+    else:
+        pruebas = [(j, _comparador(op, valor)) for j, op, valor in resueltas]
+
+        def acepta(fila):
+            n = len(fila)
+            for j, prueba in pruebas:
+                if not prueba(fila[j] if j < n else None):
+                    return False
+            return True
+    return acepta
+
+
+def textos_requeridos(resueltas):
+    """
+    Para cada condición '=' / 'in' con valores de texto, las cadenas de las que al
+    menos una tiene que aparecer en la línea cruda para que la fila pueda cumplirla.
+    Permite descartar líneas sin partirlas. Las numéricas no sirven para esto
+    (2020 puede estar escrito 2020.0).
+    """
+    grupos = []
+    for _, op, valor in resueltas:
+        if op == "=" and isinstance(valor, str) and valor:
+            grupos.append((valor,))
+        elif op == "in" and valor and all(isinstance(v, str) and v for v in valor):
+            grupos.append(tuple(valor))
+    return grupos
+
+
+def linea_posible(linea, grupos):
+    """True si la línea contiene al menos una cadena de cada grupo."""
+    for grupo in grupos:
+        for txt in grupo:
+            if txt in linea:
+                break
+        else:
+            return False
+    return True
@@ -0,0 +1,434 @@
+"""
+Índice espacial para vecinos más cercanos sobre columnas numéricas estandarizadas.
+- "kd": árbol KD; cada nodo parte sus filas por la mediana de la coordenada de
+  mayor rango. Poda con la distancia al plano de corte; rinde en pocas dimensiones.
+- "bolas": árbol de bolas; cada nodo guarda centro y radio y parte sus filas
+  según la proyección sobre el eje entre sus dos puntos más alejados. Poda con
+  dist(q, centro) − radio; aguanta mejor dimensiones moderadas.
+Las filas se reordenan para que cada nodo cubra un tramo contiguo [inicio, fin),
+así las hojas se recorren con math.dist sobre un trozo de la lista de puntos.
+Responde k vecinos (vecinos) y consultas por radio (en_radio) sin recorrer todo,
+y se guarda en disco (.tidx) con el mismo esquema que las instantáneas: cabecera
+JSON + bloques binarios alineados a 8 bytes, leídos con mmap.
+El índice puede llevar el centro y la escala de cada columna (un
+ModeloEstandarizacion de programa1) para estandarizar las filas de consulta.
+Solo usa biblioteca estándar.
+"""
+
+import heapq
+import json
+import mmap
+import os
+import sys
+from array import array
+from itertools import repeat
+from math import dist, inf
+from operator import mul, sub
+
+from .Rms_lector import LectorXLSXCSVError
+from .tabla import _NO_NUMERICO, a_numero
+
+MAGICO = b"TIDX\x01\x00\x00\x00"
+EXTENSION_INDICE = ".tidx"
+TIPOS_INDICE = ("kd", "bolas")
+# Filas por hoja: por debajo de esto conviene recorrerlas en C con math.dist
+TAM_HOJA = 32
+# Hasta cuántas dimensiones se elige árbol KD por defecto (más allá, bolas)
+DIMENSION_MAX_KD = 10
+
+
+def _producto(u, v):
+    return sum(map(mul, u, v))
+
+
+class IndiceEspacial:
+    """
+    Árbol KD o de bolas sobre vectores de igual dimensión (tuplas de float).
+    - ids: identificador de cada vector (por defecto su posición); en los
+      programas es el número de fila de los datos.
+    - columnas / posiciones / centros / escalas: cómo estandarizar una fila
+      nueva (ver vector_consulta); opcionales.
+    """
+
+    def __init__(self, vectores, ids=None, tipo=None, tam_hoja=TAM_HOJA, columnas=None,
+                 posiciones=None, centros=None, escalas=None):
+        vectores = [tuple(v) for v in vectores]
+        if not vectores:
+            raise ValueError("No hay vectores para indexar.")
+        self.dimension = len(vectores[0])
+        if any(len(v) != self.dimension for v in vectores):
+            raise ValueError("Todos los vectores deben tener la misma dimensión.")
+        if tipo is None:
+            tipo = "kd" if self.dimension <= DIMENSION_MAX_KD else "bolas"
+        if tipo not in TIPOS_INDICE:
+            raise ValueError(f"Tipo de índice no soportado: {tipo!r}")
+        ids = list(range(len(vectores))) if ids is None else list(ids)
+        if len(ids) != len(vectores):
+            raise ValueError("Hace falta un id por vector.")
+        self.tipo = tipo
+        self.tam_hoja = max(1, int(tam_hoja))
+        self.columnas = list(columnas) if columnas else None
+        self.posiciones = list(posiciones) if posiciones is not None else list(range(self.dimension))
+        self.centros = list(centros) if centros is not None else None
+        self.escalas = list(escalas) if escalas is not None else None
+        self._construir(vectores, ids)
+
+    def __len__(self):
+        return len(self.puntos)
+
+    def __repr__(self):
+        return "IndiceEspacial({}, {} puntos, dimensión {})".format(
+            self.tipo, len(self), self.dimension)
+
+    # ----------- Construcción ------------
+
+    def _construir(self, vectores, ids):
+        orden = list(range(len(vectores)))
+        self.inicio = []
+        self.fin = []
+        self.izq = []
+        self.der = []
+        self.eje = []      # kd: coordenada de corte
+        self.corte = []    # kd: valor de corte
+        self.centros_nodo = []  # bolas
+        self.radios = []        # bolas
+
+        pendientes = [(self._nuevo_nodo(0, len(orden)), 0, len(orden))]
+        while pendientes:
+            nodo, ini, fin = pendientes.pop()
+            es_hoja = fin - ini <= self.tam_hoja
+            if es_hoja and self.tipo == "kd":
+                continue
+            tramo = [vectores[i] for i in orden[ini:fin]]
+            if self.tipo == "kd":
+                clave = self._particion_kd(nodo, tramo)
+            else:
+                # Las hojas también necesitan centro y radio para podarlas
+                clave = self._particion_bolas(nodo, tramo)
+            if es_hoja or clave is None:
+                continue
+            # Ordenar el tramo por la clave y cortar en la mediana
+            pares = sorted(zip(map(clave, tramo), orden[ini:fin]))
+            orden[ini:fin] = [i for _, i in pares]
+            medio = (ini + fin) // 2
+            if self.tipo == "kd":
+                self.corte[nodo] = pares[medio - ini][0]
+            izq = self._nuevo_nodo(ini, medio)
+            der = self._nuevo_nodo(medio, fin)
+            self.izq[nodo] = izq
+            self.der[nodo] = der
+            pendientes.append((izq, ini, medio))
+            pendientes.append((der, medio, fin))
+
+        self.puntos = [vectores[i] for i in orden]
+        self.ids = [ids[i] for i in orden]
+
+    def _nuevo_nodo(self, ini, fin):
+        self.inicio.append(ini)
+        self.fin.append(fin)
+        self.izq.append(-1)
+        self.der.append(-1)
+        self.eje.append(-1)
+        self.corte.append(0.0)
+        self.centros_nodo.append(())
+        self.radios.append(0.0)
+        return len(self.inicio) - 1
+
+    def _particion_kd(self, nodo, tramo):
+        """Elige la coordenada de mayor rango; None si todos los puntos son iguales."""
+        mejor = -1
+        rango_mejor = 0.0
+        for d, valores in enumerate(zip(*tramo)):
+            rango = max(valores) - min(valores)
+            if rango > rango_mejor:
+                mejor, rango_mejor = d, rango
+        self.eje[nodo] = mejor
+        if mejor < 0:
+            return None
+        return lambda v: v[mejor]
+
+    def _particion_bolas(self, nodo, tramo):
+        """Centro y radio del nodo; clave = proyección sobre el eje de los dos puntos más alejados."""
+        n = len(tramo)
+        centro = tuple(sum(valores) / n for valores in zip(*tramo))
+        distancias = list(map(dist, repeat(centro, n), tramo))
+        radio = max(distancias)
+        self.centros_nodo[nodo] = centro
+        self.radios[nodo] = radio
+        if radio == 0.0:
+            return None
+        p1 = tramo[distancias.index(radio)]
+        desde_p1 = list(map(dist, repeat(p1, n), tramo))
+        p2 = tramo[desde_p1.index(max(desde_p1))]
+        eje = tuple(map(sub, p2, p1))
+        return lambda v: _producto(v, eje)
+
+    # ----------- Consultas ------------
+
+    def _hijos_por_cercania(self, nodo, q, cota):
+        """Hijos de un nodo interno como (cota inferior de distancia, hijo), el lejano primero."""
+        izq = self.izq[nodo]
+        der = self.der[nodo]
+        if self.tipo == "kd":
+            dif = q[self.eje[nodo]] - self.corte[nodo]
+            lejano = max(cota, abs(dif))
+            if dif < 0:
+                return ((lejano, der), (cota, izq))
+            return ((lejano, izq), (cota, der))
+        hijos = []
+        for hijo in (izq, der):
+            c = dist(q, self.centros_nodo[hijo]) - self.radios[hijo]
+            hijos.append((c if c > cota else cota, hijo))
+        hijos.sort(reverse=True)
+        return hijos
+
+    def _cota_raiz(self, q):
+        if self.tipo == "bolas":
+            c = dist(q, self.centros_nodo[0]) - self.radios[0]
+            return c if c > 0.0 else 0.0
+        return 0.0
+
+    def _recorrer(self, q, limite, visitar_hoja):
+        """
+        Recorre en profundidad (el hijo más cercano primero) los nodos cuya cota
+        inferior no supera limite(); visitar_hoja(ini, fin) procesa cada hoja.
+        """
+        pila = [(self._cota_raiz(q), 0)]
+        while pila:
+            cota, nodo = pila.pop()
+            if cota > limite():
+                continue
+            if self.izq[nodo] < 0:
+                visitar_hoja(self.inicio[nodo], self.fin[nodo])
+                continue
+            pila.extend(self._hijos_por_cercania(nodo, q, cota))
+
+    def vecinos(self, q, k=1):
+        """Los k puntos más cercanos a q: lista de (id, distancia) de menor a mayor."""
+        q = tuple(q)
+        if len(q) != self.dimension:
+            raise ValueError("La consulta no tiene la dimensión del índice.")
+        k = min(int(k), len(self.puntos))
+        if k < 1:
+            return []
+        monticulo = []  # (-distancia, -posición): el peor queda arriba
+
+        def limite():
+            return -monticulo[0][0] if len(monticulo) == k else inf
+
+        def visitar_hoja(ini, fin):
+            distancias = map(dist, repeat(q, fin - ini), self.puntos[ini:fin])
+            for pos, d in enumerate(distancias, start=ini):
+                if len(monticulo) < k:
+                    heapq.heappush(monticulo, (-d, -pos))
+                elif d < -monticulo[0][0]:
+                    heapq.heapreplace(monticulo, (-d, -pos))
+
+        self._recorrer(q, limite, visitar_hoja)
+        return [(self.ids[-p], -d) for d, p in sorted(monticulo, reverse=True)]
+
+    def en_radio(self, q, radio):
+        """Todos los puntos a distancia <= radio de q: (id, distancia) de menor a mayor."""
+        q = tuple(q)
+        if len(q) != self.dimension:
+            raise ValueError("La consulta no tiene la dimensión del índice.")
+        encontrados = []
+
+        def visitar_hoja(ini, fin):
+            distancias = map(dist, repeat(q, fin - ini), self.puntos[ini:fin])
+            for pos, d in enumerate(distancias, start=ini):
+                if d <= radio:
+                    encontrados.append((d, pos))
+
+        self._recorrer(q, lambda: radio, visitar_hoja)
+        encontrados.sort()
+        return [(self.ids[pos], d) for d, pos in encontrados]
+
+    # ----------- Filas de consulta ------------
+
+    def alinear(self, encabezado=None):
+        """
+        Posición en una fila de consulta de cada columna del índice: por nombre si
+        el índice y la consulta tienen encabezado, si no las del archivo original.
+        """
+        if not encabezado or not self.columnas:
+            return list(self.posiciones)
+        nombres = [str(nm).strip().lower() for nm in encabezado]
+        posiciones = []
+        for nombre in self.columnas:
+            bajo = str(nombre).strip().lower()
+            if bajo not in nombres:
+                raise ValueError(f"La consulta no tiene la columna {nombre!r}.")
+            posiciones.append(nombres.index(bajo))
+        return posiciones
+
+    def vector_consulta(self, fila, posiciones=None):
+        """
+        Vector estandarizado de una fila cruda (celdas de texto o números), o None
+        si le falta alguna columna del índice. posiciones: resultado de alinear.
+        """
+        if posiciones is None:
+            posiciones = self.posiciones
+        x = []
+        n = len(fila)
+        for pos in posiciones:
+            v = a_numero(fila[pos]) if pos < n else None
+            if v is None or v is _NO_NUMERICO:
+                return None
+            x.append(v)
+        if self.centros is None:
+            return tuple(x)
+        return tuple((v - c) / e for v, c, e in zip(x, self.centros, self.escalas))
+
+    # ----------- Disco ------------
+
+    def guardar(self, ruta):
+        """Escribe el índice en 'ruta' (.tidx), a un temporal que luego lo reemplaza."""
+        bloques_datos = {
+            "puntos": array("d", [x for p in self.puntos for x in p]),
+            "ids": array("q", self.ids),
+            "inicio": array("q", self.inicio),
+            "fin": array("q", self.fin),
+            "izq": array("q", self.izq),
+            "der": array("q", self.der),
+        }
+        if self.tipo == "bolas":
+            bloques_datos["centros_nodo"] = array(
+                "d", [x for c in self.centros_nodo for x in (c or (0.0,) * self.dimension)])
+            bloques_datos["radios"] = array("d", self.radios)
+        else:
+            bloques_datos["eje"] = array("q", self.eje)
+            bloques_datos["corte"] = array("d", self.corte)
+
+        bloques = []
+        posiciones_bloques = {}
+        pos = 0
+        for nombre, datos in bloques_datos.items():
+            crudo = datos.tobytes()
+            posiciones_bloques[nombre] = [datos.typecode, pos, len(crudo)]
+            bloques.append(crudo)
+            pos += len(crudo)
+            relleno = (-pos) % 8
+            if relleno:
+                bloques.append(b"\x00" * relleno)
+                pos += relleno
+
+        cabecera = {
+            "tipo": self.tipo,
+            "dimension": self.dimension,
+            "tam_hoja": self.tam_hoja,
+            "orden_bytes": sys.byteorder,
+            "columnas": self.columnas,
+            "posiciones": self.posiciones,
+            "centros": self.centros,
+            "escalas": self.escalas,
+            "bloques": posiciones_bloques,
+        }
+        cab_bytes = json.dumps(cabecera, ensure_ascii=False).encode("utf-8")
+        cab_bytes += b" " * ((-(len(MAGICO) + 4 + len(cab_bytes))) % 8)
+
+        temporal = ruta + ".tmp"
+        try:
+            with open(temporal, "wb") as f:
+                f.write(MAGICO)
+                f.write(len(cab_bytes).to_bytes(4, "little"))
+                f.write(cab_bytes)
+                for b in bloques:
+                    f.write(b)
+            os.replace(temporal, ruta)
+        except OSError as e:
+            # No dejar el temporal a medias junto a los datos
+            try:
+                os.remove(temporal)
+            except OSError:
+                pass
+            raise LectorXLSXCSVError(f"Error al escribir el índice: {e}") from e
+
+    @classmethod
+    def cargar(cls, ruta):
+        """Lee un índice guardado con guardar (sin reconstruir el árbol)."""
+        try:
+            with open(ruta, "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if len(mm) < len(MAGICO) + 4 or mm[:len(MAGICO)] != MAGICO:
+                        raise ValueError(f"'{ruta}' no es un índice espacial.")
+                    largo = int.from_bytes(mm[len(MAGICO):len(MAGICO) + 4], "little")
+                    base = len(MAGICO) + 4
+                    cabecera = json.loads(bytes(mm[base:base + largo]).decode("utf-8"))
+                    base += largo
+                    invertir = cabecera["orden_bytes"] != sys.byteorder
+                    datos = {}
+                    for nombre, (codigo, inicio, largo_bloque) in cabecera["bloques"].items():
+                        a = array(codigo)
+                        a.frombytes(mm[base + inicio:base + inicio + largo_bloque])
+                        if invertir:
+                            a.byteswap()
+                        datos[nombre] = a
+        except FileNotFoundError:
+            raise
+        except OSError as e:
+            raise LectorXLSXCSVError(f"Error al leer el índice: {e}") from e
+        except (KeyError, ValueError, TypeError) as e:
+            raise ValueError(f"Índice espacial inválido: {e}") from e
+
+        indice = cls.__new__(cls)
+        m = cabecera["dimension"]
+        indice.tipo = cabecera["tipo"]
+        indice.dimension = m
+        indice.tam_hoja = cabecera["tam_hoja"]
+        indice.columnas = cabecera["columnas"]
+        indice.posiciones = cabecera["posiciones"]
+        indice.centros = cabecera["centros"]
+        indice.escalas = cabecera["escalas"]
+        planos = datos["puntos"]
+        indice.puntos = [tuple(planos[i:i + m]) for i in range(0, len(planos), m)]
+        indice.ids = datos["ids"].tolist()
+        for nombre in ("inicio", "fin", "izq", "der"):
+            setattr(indice, nombre, datos[nombre].tolist())
+        n_nodos = len(indice.inicio)
+        if indice.tipo == "bolas":
+            planos = datos["centros_nodo"]
+            indice.centros_nodo = [tuple(planos[i:i + m]) for i in range(0, len(planos), m)]
+            indice.radios = datos["radios"].tolist()
+            indice.eje = [-1] * n_nodos
+            indice.corte = [0.0] * n_nodos
+        else:
+            indice.eje = datos["eje"].tolist()
+            indice.corte = datos["corte"].tolist()
+            indice.centros_nodo = [()] * n_nodos
+            indice.radios = [0.0] * n_nodos
+        return indice
+
+# ----------- Construcción desde datos ------------
+
+def indice_desde_lotes(lotes, centros, escalas, encabezado=None, tipo=None, tam_hoja=TAM_HOJA):
+    """
+    Índice sobre las filas de 'lotes' (listas de celdas), estandarizadas con los
+    centros y escalas por columna de la entrada (ModeloEstandarizacion.estadisticos_para).
+    Se usan las columnas con centro y escala > 0; las filas con algún faltante en
+    ellas no se indexan. El id de cada fila es su número (0-based) en la entrada.
+    """
+    posiciones = [j for j, (c, e) in enumerate(zip(centros, escalas))
+                  if c is not None and e is not None and e > 0]
+    if not posiciones:
+        raise ValueError("No hay columnas numéricas con varianza para indexar.")
+    cs = [centros[j] for j in posiciones]
+    es = [escalas[j] for j in posiciones]
+    vectores = []
+    ids = []
+    n_fila = 0
+    for filas in lotes:
+        for fila in filas:
+            x = []
+            n = len(fila)
+            for pos, c, e in zip(posiciones, cs, es):
+                v = a_numero(fila[pos]) if pos < n else None
+                if v is None or v is _NO_NUMERICO:
+                    break
+                x.append((v - c) / e)
+            else:
+                vectores.append(tuple(x))
+                ids.append(n_fila)
+            n_fila += 1
+    columnas = [encabezado[j] for j in posiciones] if encabezado else None
+    return IndiceEspacial(vectores, ids, tipo, tam_hoja, columnas, posiciones, cs, es)
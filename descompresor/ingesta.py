@@ -0,0 +1,380 @@
+"""
+Motor único de ingesta para todos los programas (programa1, programa2, programa3,
+pograma4, gower).
+Reúne en un solo lugar lo que antes estaba copiado en cada programa:
+detectar_separador, partir_linea, lineas_a_tabla, normalizar_ancho,
+leer_xlsx_a_matriz y ref_a_indices. También expone las bases SQLite
+(lector_sqlite) y JSON Lines (lector_jsonl) como fuentes más. Cualquier mejora de lectura aplica a todos,
+y se puede medir con:
+
+    python -m descompresor.ingesta <archivo> [repeticiones]
+
+Solo usa biblioteca estándar.
+"""
+
+import time
+from zipfile import ZipFile, BadZipFile
+from xml.etree import ElementTree
+
+from .Rms_lector import LectorXLSXCSVError
+from .filtro import compilar, parsear_filtro, resolver_columnas
+from .lector_jsonl import es_jsonl, claves_jsonl, leer_jsonl_lotes, leer_jsonl_tabla
+from .lector_sqlite import (
+    es_sqlite, listar_tablas, leer_sqlite_lotes, leer_sqlite_tabla, leer_sqlite_matriz,
+)
+from .lectura_paralela import (
+    FlujoConPrefijo, leer_flujo_lotes, leer_muestra_lineas, leer_texto_lotes, leer_texto_paralelo,
+    leer_texto_tabla, ultimo_corte,
+)
+from .tabla import TablaColumnar
+
+# Fachada: además de lo propio, reexporta los lectores de los demás módulos para
+# que los programas importen todo desde aquí
+__all__ = [
+    "SEPARADORES_POSIBLES", "FALTANTES",
+    "detectar_separador", "partir_linea", "lineas_a_tabla", "normalizar_ancho",
+    "letras_a_indice", "ref_a_indices", "es_xlsx", "listar_hojas", "leer_xlsx_a_matriz",
+    "leer_matriz", "medir_lectura",
+    # filtro
+    "parsear_filtro",
+    # lector_jsonl
+    "es_jsonl", "claves_jsonl", "leer_jsonl_lotes", "leer_jsonl_tabla",
+    # lector_sqlite
+    "es_sqlite", "listar_tablas", "leer_sqlite_lotes", "leer_sqlite_tabla", "leer_sqlite_matriz",
+    # lectura_paralela
+    "FlujoConPrefijo", "leer_flujo_lotes", "leer_muestra_lineas", "leer_texto_lotes",
+    "leer_texto_paralelo", "leer_texto_tabla", "ultimo_corte",
+]
+
+SEPARADORES_POSIBLES = [",", ";", "\t", "|", " "]
+FALTANTES = {"", "na", "nan", "null", "none"}  # se usa .strip().lower()
+
+# ---------------- Texto: separador y partición ----------------
+
+def _contar_columnas(linea, sep):
+    """Columnas que daría partir_linea, sin construir la lista."""
+    if sep == " ":
+        return len(linea.split())
+    return linea.count(sep) + 1
+
+
+def detectar_separador(lineas_muestra):
+    """
+    Elige el separador que da más columnas; a igualdad, el más consistente
+    (menor varianza del número de columnas entre líneas).
+    """
+    mejor_sep = ","
+    mejor_cols = 1
+    mejor_consistencia = -1.0
+    for sep in SEPARADORES_POSIBLES:
+        conteos = [_contar_columnas(ln, sep) for ln in lineas_muestra]
+        if not conteos:
+            continue
+        promedio = sum(conteos) / len(conteos)
+        var = sum((c - promedio) * (c - promedio) for c in conteos) / len(conteos)
+        consistencia = -var
+        max_cols = max(conteos)
+        if (max_cols > mejor_cols) or (max_cols == mejor_cols and consistencia > mejor_consistencia):
+            mejor_cols = max_cols
+            mejor_consistencia = consistencia
+            mejor_sep = sep
+    return mejor_sep
+
+
+def partir_linea(linea, sep):
+    if sep == " ":
+        return linea.split()
+    return [p.strip() for p in linea.split(sep)]
+
+
+def lineas_a_tabla(lineas, sep):
+    return [partir_linea(l, sep) for l in lineas if l.strip() != ""]
+
+
+def normalizar_ancho(filas):
+    """
+    Ajusta todas las filas al ancho modal (la cantidad de columnas más repetida).
+    Devuelve (filas_normalizadas, ncols).
+    """
+    if not filas:
+        return [], 0
+    freq = {}
+    for fila in filas:
+        n = len(fila)
+        freq[n] = freq.get(n, 0) + 1
+    ncols_obj = None
+    mejor = -1
+    for k, v in freq.items():
+        if v > mejor:
+            mejor = v
+            ncols_obj = k
+    if mejor == len(filas):
+        return filas, ncols_obj  # ya son todas del mismo ancho: no se copia nada
+    norm = []
+    for fila in filas:
+        if len(fila) < ncols_obj:
+            fila = fila + [""] * (ncols_obj - len(fila))
+        elif len(fila) > ncols_obj:
+            fila = fila[:ncols_obj]
+        norm.append(fila)
+    return norm, ncols_obj
+
+# ---------------- XLSX: referencias ----------------
+
+def letras_a_indice(letters):
+    """'A'->1, 'B'->2, ..., 'Z'->26, 'AA'->27, etc."""
+    n = 0
+    for ch in letters.upper():
+        n = n * 26 + (ord(ch) - 64)
+    return n
+
+
+def ref_a_indices(ref):
+    """Convierte una referencia tipo "C5" a (row=5, col=3), ambos 1-based."""
+    letras = ref.rstrip("0123456789")
+    numeros = ref[len(letras):]
+    col = letras_a_indice(letras)
+    row = int(numeros) if numeros else 1
+    return row, col
+
+# ---------------- XLSX: lectura en streaming ----------------
+
+def _local(tag):
+    """Nombre de la etiqueta sin namespace: '{ns}c' -> 'c'."""
+    return tag[tag.rfind("}") + 1:]
+
+
+def es_xlsx(ruta):
+    """ZIP con [Content_Types].xml."""
+    try:
+        with ZipFile(ruta, "r") as z:
+            return "[Content_Types].xml" in z.namelist()
+    except (BadZipFile, OSError):
+        return False
+
+
+def _hojas_disponibles(names):
+    cand = [n for n in names if n.startswith("xl/worksheets/sheet") and n.endswith(".xml")]
+    cand.sort()
+    return cand
+
+
+def listar_hojas(ruta):
+    """Nombres de las hojas según workbook.xml (puede ser [] si no se puede leer)."""
+    hojas = []
+    with ZipFile(ruta, "r") as z:
+        try:
+            wb = ElementTree.fromstring(z.read("xl/workbook.xml"))
+            for node in wb.iter():
+                if _local(node.tag) == "sheet":
+                    hojas.append(node.attrib.get("name", ""))
+        except (KeyError, ElementTree.ParseError):
+            pass
+    return hojas
+
+
+def _leer_shared_strings(z):
+    shared = []
+    try:
+        with z.open("xl/sharedStrings.xml") as f:
+            for _, nodo in ElementTree.iterparse(f, events=("end",)):
+                if _local(nodo.tag) == "si":
+                    partes = [t.text for t in nodo.iter() if _local(t.tag) == "t" and t.text is not None]
+                    shared.append("".join(partes))
+                    nodo.clear()
+    except (KeyError, ElementTree.ParseError):
+        return []
+    return shared
+
+
+def leer_xlsx_a_matriz(ruta, sheet_index=None, elegir_hoja=None, filtro=None, encabezado=True):
+    """
+    Convierte un .xlsx a una matriz de strings (lista de filas).
+    - sheet_index: 1..N. Si es None y hay varias hojas, se llama a
+      elegir_hoja(nombres) (si se dio) para que el programa pregunte; si no, 1.
+    - Resuelve sharedStrings y cadenas en línea; booleanos a "1"/"0"; el resto
+      va tal cual del nodo <v> (fechas/estilos en crudo).
+    La hoja se recorre con iterparse liberando cada celda y fila ya leída, así que
+    nunca se arma el árbol XML completo en memoria.
+    - filtro: condiciones (ver descompresor.filtro) evaluadas al cerrar cada <row>;
+      las filas rechazadas se descartan antes de convertirse en lista. Con
+      encabezado=True las columnas se buscan por nombre en la primera fila, que
+      siempre se conserva. Con filtro no se rellenan los huecos entre filas.
+    """
+    with ZipFile(ruta, "r") as z:
+        names = z.namelist()
+        cand = _hojas_disponibles(names)
+        total = len(cand)
+        if total == 0:
+            raise ValueError("XLSX sin hojas legibles.")
+
+        if sheet_index is None:
+            sel = 1
+            if total > 1 and elegir_hoja is not None:
+                nombres = listar_hojas(ruta)
+                if nombres:
+                    sel = elegir_hoja(nombres)
+        else:
+            sel = int(sheet_index)
+        if sel < 1 or sel > total:
+            sel = 1
+
+        sheet_path = "xl/worksheets/sheet{}.xml".format(sel)
+        if sheet_path not in names:
+            sheet_path = cand[0]
+
+        shared = _leer_shared_strings(z) if "xl/sharedStrings.xml" in names else []
+
+        filas_dict = {}
+        max_col_index = 0
+        acepta = None
+        if filtro and not encabezado:
+            acepta = compilar(resolver_columnas(filtro), por_referencia=True)
+        fila_actual = None
+        with z.open(sheet_path) as f:
+            for _, nodo in ElementTree.iterparse(f, events=("end",)):
+                local = _local(nodo.tag)
+                if local == "row":
+                    nodo.clear()
+                    if filtro and fila_actual is not None:
+                        celdas = filas_dict[fila_actual]
+                        if acepta is None:
+                            # Primera fila con datos: encabezado (se conserva)
+                            nombres = [celdas.get(c, "") for c in range(1, max(celdas) + 1)]
+                            acepta = compilar(resolver_columnas(filtro, nombres),
+                                              por_referencia=True)
+                        elif not acepta(celdas):
+                            del filas_dict[fila_actual]
+                    fila_actual = None
+                    continue
+                if local != "c":
+                    continue
+                r = nodo.attrib.get("r", "")
+                if not r:
+                    nodo.clear()
+                    continue
+                t = nodo.attrib.get("t", "")
+                raw = None
+                for sub in nodo:
+                    sub_local = _local(sub.tag)
+                    if sub_local == "v":
+                        raw = sub.text
+                        break
+                    if sub_local == "is" and t == "inlineStr":
+                        raw = "".join(x.text for x in sub.iter() if _local(x.tag) == "t" and x.text)
+                        break
+                nodo.clear()
+
+                fila_idx, col_idx = ref_a_indices(r)
+                if col_idx > max_col_index:
+                    max_col_index = col_idx
+
+                if raw is None:
+                    val = ""
+                elif t == "s":
+                    try:
+                        si = int(raw)
+                        val = shared[si] if 0 <= si < len(shared) else raw
+                    except ValueError:
+                        val = raw
+                elif t == "b":
+                    val = "1" if raw.strip() == "1" else "0"
+                else:
+                    val = raw
+
+                fila = filas_dict.get(fila_idx)
+                if fila is None:
+                    fila = filas_dict[fila_idx] = {}
+                fila[col_idx] = val
+                fila_actual = fila_idx
+
+    if not filas_dict:
+        return []
+
+    if filtro:
+        indices = sorted(filas_dict)
+    else:
+        indices = range(1, max(filas_dict.keys()) + 1)
+    vacia = {}
+    matriz = []
+    for r_i in indices:
+        row_dict = filas_dict.get(r_i, vacia)
+        matriz.append([row_dict.get(c_j, "") for c_j in range(1, max_col_index + 1)])
+    return matriz
+
+# ---------------- Lectura genérica ----------------
+
+def leer_matriz(ruta, sep=None, elegir_hoja=None, convertir=False, elegir_tabla=None,
+                filtro=None):
+    """
+    Lee cualquier archivo tabular a lista de filas.
+    filtro: condiciones de fila (ver descompresor.filtro) que se aplican en el
+    propio lector: dentro del parser de XLSX/texto o como WHERE en SQLite. Las
+    columnas se nombran según la primera fila (en XLSX/texto también por posición "3").
+    - XLSX: leer_xlsx_a_matriz.
+    - SQLite: la tabla elegida con elegir_tabla(nombres) (o la primera), con el
+      encabezado como primera fila.
+    - Texto: separador detectado con una muestra (o el indicado) y parseo
+      paralelo por rangos de bytes.
+    Devuelve (filas, sep) con sep = None para XLSX y SQLite.
+    """
+    if es_xlsx(ruta):
+        return leer_xlsx_a_matriz(ruta, elegir_hoja=elegir_hoja, filtro=filtro), None
+    if es_sqlite(ruta):
+        tablas = listar_tablas(ruta)
+        if not tablas:
+            return [], None
+        tabla = elegir_tabla(tablas) if elegir_tabla is not None else tablas[0]
+        return leer_sqlite_matriz(ruta, tabla=tabla, filtro=filtro), None
+    if sep is None:
+        muestra = leer_muestra_lineas(ruta, 50)
+        if not muestra:
+            return [], ","
+        sep = detectar_separador(muestra)
+    return leer_texto_paralelo(ruta, sep, convertir=convertir, filtro=filtro), sep
+
+# ---------------- Medición ----------------
+
+def medir_lectura(ruta, repeticiones=3):
+    """Mide cada etapa de la ingesta sobre un archivo y devuelve {etapa: segundos}."""
+    tiempos = {}
+
+    def medir(nombre, funcion):
+        mejor = None
+        resultado = None
+        for _ in range(repeticiones):
+            t0 = time.perf_counter()
+            resultado = funcion()
+            dt = time.perf_counter() - t0
+            if mejor is None or dt < mejor:
+                mejor = dt
+        tiempos[nombre] = mejor
+        return resultado
+
+    if es_xlsx(ruta):
+        filas = medir("xlsx_a_matriz", lambda: leer_xlsx_a_matriz(ruta, 1))
+    else:
+        muestra = leer_muestra_lineas(ruta, 50)
+        sep = medir("detectar_separador", lambda: detectar_separador(muestra))
+        filas = medir("texto_paralelo", lambda: leer_texto_paralelo(ruta, sep))
+        medir("texto_paralelo_convertido", lambda: leer_texto_paralelo(ruta, sep, convertir=True))
+        medir("tabla_sin_cache", lambda: leer_texto_tabla(ruta, sep, usar_cache=False))
+        leer_texto_tabla(ruta, sep)
+        medir("tabla_con_cache", lambda: leer_texto_tabla(ruta, sep))
+    medir("normalizar_ancho", lambda: normalizar_ancho(filas))
+    medir("tabla_desde_filas", lambda: TablaColumnar.desde_filas(filas))
+    return tiempos
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Uso: python -m descompresor.ingesta <archivo> [repeticiones]")
+    else:
+        try:
+            reps = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+            for etapa, seg in medir_lectura(sys.argv[1], reps).items():
+                print("{:28s} {:10.4f} s".format(etapa, seg))
+        except (LectorXLSXCSVError, OSError, ValueError) as e:
+            print("Error:", e)
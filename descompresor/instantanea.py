@@ -0,0 +1,188 @@
+"""
+Instantáneas binarias (.tcol) de tablas ya parseadas.
+Evita repetir el parseo y la tipificación cuando el archivo fuente no cambió.
+
+Formato (orden de bytes nativo, anotado en la cabecera):
+    MAGICO (8 bytes) | largo cabecera (4 bytes, little) | cabecera JSON (utf-8)
+    | bloques de datos alineados a 8 bytes
+La cabecera guarda la huella del archivo fuente (ruta, tamaño, mtime y parámetros
+de lectura), los nombres y tipos de columna, los diccionarios de categorías y
+la posición de cada bloque (valores, mapa de faltantes, códigos).
+La lectura usa mmap y copia cada bloque directo a su array (memcpy).
+"""
+
+import json
+import mmap
+import os
+import sys
+from array import array
+
+from .Rms_lector import LectorXLSXCSVError
+from .tabla import TablaColumnar, ColumnaNumerica, ColumnaCategorica
+
+MAGICO = b"TCOL\x01\x00\x00\x00"
+EXTENSION = ".tcol"
+
+# ----------- Huella del archivo fuente ------------
+
+def huella_archivo(ruta, parametros=None):
+    """Identifica una versión concreta del archivo fuente y de cómo se leyó."""
+    try:
+        st = os.stat(ruta)
+    except OSError as e:
+        raise LectorXLSXCSVError(f"No se pudo obtener información del archivo: {e}") from e
+    return {
+        "ruta": os.path.abspath(ruta),
+        "tamano": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "parametros": parametros or {},
+    }
+
+
+def ruta_instantanea(ruta):
+    return ruta + EXTENSION
+
+# ----------- Escritura ------------
+
+def _relleno(pos):
+    return (-pos) % 8
+
+
+def guardar_instantanea(tabla, destino, huella):
+    """Escribe la tabla en 'destino' (se escribe a un temporal y luego se reemplaza)."""
+    bloques = []
+    columnas = []
+    pos = 0
+
+    def agregar_bloque(datos):
+        nonlocal pos
+        inicio = pos
+        bloques.append(datos)
+        pos += len(datos)
+        relleno = _relleno(pos)
+        if relleno:
+            bloques.append(b"\x00" * relleno)
+            pos += relleno
+        return inicio, len(datos)
+
+    for col in tabla.columnas:
+        if col.tipo == "numerico":
+            off_v, largo_v = agregar_bloque(col.valores.tobytes())
+            off_f, largo_f = agregar_bloque(bytes(col.faltantes))
+            columnas.append({
+                "nombre": col.nombre, "tipo": "numerico",
+                "valores": [off_v, largo_v], "faltantes": [off_f, largo_f],
+                "n_faltantes": col.n_faltantes,
+            })
+        else:
+            off_c, largo_c = agregar_bloque(col.codigos.tobytes())
+            columnas.append({
+                "nombre": col.nombre, "tipo": "categorico",
+                "codigos": [off_c, largo_c], "categorias": col.categorias,
+                "n_faltantes": col.n_faltantes,
+            })
+
+    cabecera = {
+        "huella": huella,
+        "orden_bytes": sys.byteorder,
+        "n_filas": tabla.n_filas,
+        "encabezado": tabla.encabezado,
+        "columnas": columnas,
+    }
+    cab_bytes = json.dumps(cabecera, ensure_ascii=False).encode("utf-8")
+    inicio_datos = len(MAGICO) + 4 + len(cab_bytes)
+    cab_bytes += b" " * _relleno(inicio_datos)
+
+    temporal = destino + ".tmp"
+    try:
+        with open(temporal, "wb") as f:
+            f.write(MAGICO)
+            f.write(len(cab_bytes).to_bytes(4, "little"))
+            f.write(cab_bytes)
+            for b in bloques:
+                f.write(b)
+        os.replace(temporal, destino)
+    except OSError as e:
+        # No dejar el temporal a medias junto a los datos
+        try:
+            os.remove(temporal)
+        except OSError:
+            pass
+        raise LectorXLSXCSVError(f"Error al escribir la instantánea: {e}") from e
+
+# ----------- Lectura ------------
+
+def _leer_cabecera(mm):
+    if len(mm) < len(MAGICO) + 4 or mm[:len(MAGICO)] != MAGICO:
+        return None, 0
+    largo = int.from_bytes(mm[len(MAGICO):len(MAGICO) + 4], "little")
+    inicio = len(MAGICO) + 4
+    cabecera = json.loads(bytes(mm[inicio:inicio + largo]).decode("utf-8"))
+    return cabecera, inicio + largo
+
+
+def cargar_instantanea(origen, huella=None):
+    """
+    Lee una instantánea con mmap. Devuelve la TablaColumnar, o None si no existe,
+    está corrupta o su huella no coincide con la indicada.
+    """
+    try:
+        with open(origen, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                cabecera, base = _leer_cabecera(mm)
+                if cabecera is None:
+                    return None
+                if huella is not None and cabecera.get("huella") != huella:
+                    return None
+                invertir = cabecera.get("orden_bytes") != sys.byteorder
+
+                def bloque(tipo, rango):
+                    inicio, largo = rango
+                    a = array(tipo)
+                    a.frombytes(mm[base + inicio:base + inicio + largo])
+                    if invertir:
+                        a.byteswap()
+                    return a
+
+                columnas = []
+                for meta in cabecera["columnas"]:
+                    if meta["tipo"] == "numerico":
+                        col = ColumnaNumerica(meta["nombre"])
+                        col.valores = bloque("d", meta["valores"])
+                        inicio, largo = meta["faltantes"]
+                        col.faltantes = bytearray(mm[base + inicio:base + inicio + largo])
+                    else:
+                        col = ColumnaCategorica(meta["nombre"])
+                        col.codigos = bloque("i", meta["codigos"])
+                        col.categorias = list(meta["categorias"])
+                        col._indice = {c: k for k, c in enumerate(col.categorias)}
+                    col.n_faltantes = meta["n_faltantes"]
+                    columnas.append(col)
+    except (OSError, ValueError, KeyError):
+        return None
+
+    return TablaColumnar(cabecera["encabezado"], columnas)
+
+# ----------- Caché transparente ------------
+
+def leer_con_instantanea(ruta, parametros, construir, usar_cache=True):
+    """
+    Devuelve la tabla de 'ruta' desde su instantánea si la huella coincide;
+    si no, llama a construir() y guarda la instantánea para la próxima vez.
+    Si no se puede escribir junto al archivo fuente, simplemente no se cachea.
+    """
+    if not usar_cache:
+        return construir()
+
+    huella = huella_archivo(ruta, parametros)
+    destino = ruta_instantanea(ruta)
+    tabla = cargar_instantanea(destino, huella)
+    if tabla is not None:
+        return tabla
+
+    tabla = construir()
+    try:
+        guardar_instantanea(tabla, destino, huella)
+    except LectorXLSXCSVError:
+        pass
+    return tabla
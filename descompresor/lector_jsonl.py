@@ -0,0 +1,168 @@
+"""
+Lector en streaming de JSON Lines (un objeto JSON por línea).
+- Las claves elegidas (con punto para anidar: "usuario.edad") se aplanan a columnas;
+  si no se eligen, se toman las que aparecen en una muestra de las primeras líneas.
+- Los tipos se infieren con esa muestra y el resto del archivo se agrega por lotes
+  a la TablaColumnar: nunca se arma la lista completa de filas.
+- Acepta archivos comprimidos (.gz/.bz2/.xz) y detecta la codificación como los
+  lectores de texto.
+Solo usa biblioteca estándar.
+"""
+
+import io
+import json
+
+from .Rms_lector import LectorXLSXCSVError
+from .codificacion import ERRORES, detectar_codificacion
+from .lectura_paralela import ERRORES_COMPRESION, abrir_binario, leer_muestra_lineas
+from .tabla import FALTANTES, TablaColumnar
+
+TAM_LOTE = 10000
+N_MUESTRA = 1000
+
+# ----------- Detección ------------
+
+def es_jsonl(ruta):
+    """La primera línea no vacía es un objeto JSON."""
+    try:
+        muestra = leer_muestra_lineas(ruta, 1)
+    except LectorXLSXCSVError:
+        return False
+    if not muestra or not muestra[0].lstrip().startswith("{"):
+        return False
+    try:
+        return isinstance(json.loads(muestra[0]), dict)
+    except ValueError:
+        return False
+
+# ----------- Aplanado ------------
+
+def _hoja(valor):
+    """Valor de celda: escalares tal cual (bool -> 1.0/0.0), listas/objetos como JSON."""
+    if isinstance(valor, bool):
+        return 1.0 if valor else 0.0
+    if isinstance(valor, (dict, list)):
+        return json.dumps(valor, ensure_ascii=False, sort_keys=True)
+    return valor
+
+
+def aplanar_claves(obj, prefijo="", claves=None):
+    """Agrega a 'claves' (en orden de aparición) las rutas con punto de las hojas de obj."""
+    if claves is None:
+        claves = {}
+    for k, v in obj.items():
+        ruta = prefijo + str(k)
+        if isinstance(v, dict) and v:
+            aplanar_claves(v, ruta + ".", claves)
+        else:
+            claves.setdefault(ruta, None)
+    return claves
+
+
+def _compilar_rutas(claves):
+    """'a.b.c' -> ('a', 'b', 'c'), una sola vez por columna."""
+    return [tuple(c.split(".")) for c in claves]
+
+
+def extraer_fila(obj, rutas):
+    """Fila con el valor de cada ruta (None si falta en este objeto)."""
+    fila = []
+    for ruta in rutas:
+        v = obj
+        for parte in ruta:
+            if isinstance(v, dict):
+                v = v.get(parte)
+            else:
+                v = None
+                break
+        fila.append(None if v is None else _hoja(v))
+    return fila
+
+# ----------- Lectura por lotes ------------
+
+def _objetos(ruta):
+    """Generador de (número de línea, objeto) del archivo, en streaming."""
+    try:
+        with abrir_binario(ruta) as f_bin:
+            codificacion = detectar_codificacion(f_bin)
+            for n, linea in enumerate(io.TextIOWrapper(f_bin, encoding=codificacion,
+                                                       errors=ERRORES), start=1):
+                if not linea.strip():
+                    continue
+                try:
+                    obj = json.loads(linea)
+                except ValueError as e:
+                    raise LectorXLSXCSVError(f"JSON inválido en la línea {n}: {e}") from e
+                if not isinstance(obj, dict):
+                    raise LectorXLSXCSVError(f"La línea {n} no es un objeto JSON.")
+                yield n, obj
+    except FileNotFoundError as e:
+        raise LectorXLSXCSVError(f"No se encontró el archivo: {ruta}") from e
+    except ERRORES_COMPRESION as e:
+        raise LectorXLSXCSVError(f"Error al leer el archivo: {e}") from e
+
+
+def claves_jsonl(ruta, n_muestra=N_MUESTRA):
+    """Claves aplanadas que aparecen en las primeras n_muestra líneas."""
+    claves = {}
+    for k, (_, obj) in enumerate(_objetos(ruta)):
+        if k >= n_muestra:
+            break
+        aplanar_claves(obj, "", claves)
+    return list(claves)
+
+
+def leer_jsonl_lotes(ruta, claves=None, tam_lote=TAM_LOTE, n_muestra=N_MUESTRA,
+                     max_filas=None):
+    """
+    Generador: el primer elemento es el encabezado (claves) y luego lotes de hasta
+    tam_lote filas. Si claves es None se usan las de claves_jsonl(ruta, n_muestra).
+    max_filas corta la lectura sin recorrer el resto del archivo.
+    """
+    if not claves:
+        claves = claves_jsonl(ruta, n_muestra)
+    claves = list(claves)
+    rutas = _compilar_rutas(claves)
+    yield claves
+
+    lote = []
+    total = 0
+    for _, obj in _objetos(ruta):
+        if max_filas is not None and total >= max_filas:
+            break
+        lote.append(extraer_fila(obj, rutas))
+        total += 1
+        if len(lote) >= tam_lote:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def leer_jsonl_tabla(ruta, claves=None, umbral_numerico=1.0, n_muestra=N_MUESTRA,
+                     tam_lote=TAM_LOTE, max_filas=None, faltantes=FALTANTES):
+    """
+    TablaColumnar desde JSON Lines. Los tipos se infieren con los primeros lotes
+    (al menos n_muestra filas); los demás se agregan con esos tipos (un texto en
+    una columna numérica queda como faltante).
+    faltantes: textos que cuentan como faltante (como en TablaColumnar.desde_filas).
+    """
+    lotes = leer_jsonl_lotes(ruta, claves, tam_lote, n_muestra, max_filas)
+    encabezado = next(lotes)
+    muestra = []
+    tabla = None
+    for lote in lotes:
+        if tabla is None:
+            muestra.extend(lote)
+            if len(muestra) < n_muestra:
+                continue
+            tabla = TablaColumnar.desde_filas(muestra, encabezado,
+                                              umbral_numerico=umbral_numerico,
+                                              faltantes=faltantes)
+            muestra = None
+        else:
+            tabla.agregar_filas(lote, faltantes)
+    if tabla is None:
+        tabla = TablaColumnar.desde_filas(muestra, encabezado, umbral_numerico=umbral_numerico,
+                                          faltantes=faltantes)
+    return tabla
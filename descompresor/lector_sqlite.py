@@ -0,0 +1,130 @@
+"""
+Lector de tablas y consultas SQLite (módulo sqlite3 de la biblioteca estándar).
+- Las columnas elegidas y el filtro de filas se mandan al propio SQL (SELECT ...
+  WHERE ...), así SQLite descarta lo que no hace falta antes de llegar a Python.
+- Las filas salen en lotes de tam_lote (fetchmany) y se agregan a la misma
+  TablaColumnar / lista de filas que usan los lectores CSV y XLSX.
+La base se abre en modo solo lectura.
+"""
+
+import os
+import sqlite3
+from urllib.request import pathname2url
+
+from .Rms_lector import LectorXLSXCSVError
+from .filtro import filtro_a_sql
+from .tabla import TablaColumnar
+
+CABECERA_SQLITE = b"SQLite format 3\x00"
+TAM_LOTE = 10000
+
+# ----------- Detección y conexión ------------
+
+def es_sqlite(ruta):
+    """Archivo de base SQLite (por su cabecera de 16 bytes)."""
+    try:
+        with open(ruta, "rb") as f:
+            return f.read(len(CABECERA_SQLITE)) == CABECERA_SQLITE
+    except OSError:
+        return False
+
+
+def _conectar(ruta):
+    if not os.path.isfile(ruta):
+        raise LectorXLSXCSVError(f"No se encontró el archivo: {ruta}")
+    uri = "file:{}?mode=ro".format(pathname2url(os.path.abspath(ruta)))
+    try:
+        return sqlite3.connect(uri, uri=True)
+    except sqlite3.Error as e:
+        raise LectorXLSXCSVError(f"No se pudo abrir la base SQLite: {e}") from e
+
+
+def citar(nombre):
+    """Nombre de tabla/columna entre comillas dobles (SQL estándar)."""
+    return '"' + str(nombre).replace('"', '""') + '"'
+
+# ----------- Metadatos ------------
+
+def listar_tablas(ruta):
+    """Tablas y vistas de la base, en orden alfabético."""
+    con = _conectar(ruta)
+    try:
+        cur = con.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'view') "
+            "AND name NOT LIKE 'sqlite_%' ORDER BY name")
+        return [fila[0] for fila in cur.fetchall()]
+    except sqlite3.Error as e:
+        raise LectorXLSXCSVError(f"Error al leer la base SQLite: {e}") from e
+    finally:
+        con.close()
+
+
+def construir_consulta(tabla=None, consulta=None, columnas=None, filtro=None):
+    """
+    Arma el SELECT con las columnas y el filtro empujados a SQL.
+    Una consulta libre se envuelve como subconsulta para poder filtrarla igual.
+    Devuelve (sql, parametros).
+    """
+    if (tabla is None) == (consulta is None):
+        raise ValueError("Indica una tabla o una consulta (solo una).")
+    origen = citar(tabla) if tabla is not None else "(" + consulta.strip().rstrip(";") + ")"
+    seleccion = ", ".join(citar(c) for c in columnas) if columnas else "*"
+    where, parametros = filtro_a_sql(filtro, citar)
+    sql = "SELECT {} FROM {}".format(seleccion, origen)
+    if where:
+        sql += " WHERE " + where
+    return sql, parametros
+
+# ----------- Lectura por lotes ------------
+
+def leer_sqlite_lotes(ruta, tabla=None, consulta=None, columnas=None, filtro=None,
+                      tam_lote=TAM_LOTE):
+    """
+    Generador: el primer elemento es el encabezado (nombres de columna) y luego
+    vienen lotes de hasta tam_lote filas (listas de int/float/str/None).
+    """
+    sql, parametros = construir_consulta(tabla, consulta, columnas, filtro)
+    con = _conectar(ruta)
+    try:
+        try:
+            cur = con.execute(sql, parametros)
+        except sqlite3.Error as e:
+            raise LectorXLSXCSVError(f"Error en la consulta SQLite: {e}") from e
+        yield [d[0] for d in cur.description]
+        while True:
+            lote = cur.fetchmany(tam_lote)
+            if not lote:
+                break
+            yield [list(fila) for fila in lote]
+    finally:
+        con.close()
+
+
+def leer_sqlite_tabla(ruta, tabla=None, consulta=None, columnas=None, filtro=None,
+                      umbral_numerico=1.0, tam_lote=TAM_LOTE):
+    """
+    Igual que leer_sqlite_lotes, pero devuelve una TablaColumnar.
+    Los tipos se infieren con el primer lote; los siguientes se agregan con esos tipos.
+    """
+    lotes = leer_sqlite_lotes(ruta, tabla, consulta, columnas, filtro, tam_lote)
+    encabezado = next(lotes)
+    resultado = None
+    for lote in lotes:
+        if resultado is None:
+            resultado = TablaColumnar.desde_filas(lote, encabezado,
+                                                  umbral_numerico=umbral_numerico)
+        else:
+            resultado.agregar_filas(lote)
+    if resultado is None:
+        resultado = TablaColumnar.vacia(encabezado, ["categorico"] * len(encabezado))
+    return resultado
+
+
+def leer_sqlite_matriz(ruta, tabla=None, consulta=None, columnas=None, filtro=None,
+                       tam_lote=TAM_LOTE):
+    """Lista de filas con el encabezado como primera fila (como un CSV leído)."""
+    lotes = leer_sqlite_lotes(ruta, tabla, consulta, columnas, filtro, tam_lote)
+    filas = [next(lotes)]
+    for lote in lotes:
+        filas.extend(lote)
+    return filas
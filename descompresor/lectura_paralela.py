@@ -0,0 +1,552 @@
+"""
+Lectura paralela de archivos de texto delimitados (CSV/TSV/pipe/espacios).
+- Parte el archivo en rangos de bytes que terminan justo después de un salto de
+  línea, sin cortar nunca dentro de un campo entre comillas dobles.
+- Cada proceso trabajador parsea su rango y (opcionalmente) convierte los números.
+- Los resultados se reensamblan en el orden original del archivo.
+- Los archivos comprimidos (.gz/.bz2/.xz, reconocidos por sus bytes mágicos) se
+  descomprimen como flujo, en memoria, y se parten en trozos por registros
+  completos que van a los mismos trabajadores; no se escribe nada a disco.
+- La codificación se detecta una vez sobre un prefijo (ver codificacion.py) y los
+  bytes que no son UTF-8 válido se leen como latin-1 en el acto: nunca se relee
+  el archivo ni se descartan bytes.
+Solo usa biblioteca estándar.
+"""
+
+import bz2
+import codecs
+import csv
+import gzip
+import io
+import lzma
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import cpu_count
+
+from .Rms_lector import LectorXLSXCSVError
+from .codificacion import (
+    ERRORES, TAM_PREFIJO, detectar_codificacion, detectar_en_prefijo, admite_cortes, decodificar,
+)
+from .filtro import compilar, linea_posible, resolver_columnas, textos_requeridos, validar_condiciones
+from .tabla import TablaColumnar, a_texto
+from .instantanea import leer_con_instantanea
+
+# Por debajo de este tamaño no compensa levantar procesos: se parsea en el actual.
+UMBRAL_PARALELO = 8 * 1024 * 1024
+TAM_BLOQUE = 1024 * 1024
+TROZOS_POR_PROCESO = 2
+# Para comprimidos el umbral se mide sobre el archivo comprimido (el texto es varias veces mayor).
+UMBRAL_PARALELO_COMPRIMIDO = 2 * 1024 * 1024
+TAM_TROZO_FLUJO = 4 * TAM_BLOQUE
+
+# Bytes mágicos -> función para abrir el flujo descomprimido
+COMPRESORES = [
+    (b"\x1f\x8b", "gzip", gzip.open),
+    (b"BZh", "bz2", bz2.open),
+    (b"\xfd7zXZ\x00", "xz", lzma.open),
+]
+ERRORES_COMPRESION = (OSError, EOFError, lzma.LZMAError)
+
+FALTANTES = {"", "na", "nan", "null", "none"}  # se usa .strip().lower()
+
+# ----------- Compresión ------------
+
+def detectar_compresion(ruta):
+    """Devuelve 'gzip', 'bz2', 'xz' o None según los primeros bytes del archivo."""
+    try:
+        with open(ruta, "rb") as f:
+            cabeza = f.read(6)
+    except FileNotFoundError as e:
+        raise LectorXLSXCSVError(f"No se encontró el archivo: {ruta}") from e
+    except OSError as e:
+        raise LectorXLSXCSVError(f"Error al leer el archivo: {e}") from e
+    for magico, nombre, _ in COMPRESORES:
+        if cabeza.startswith(magico):
+            return nombre
+    return None
+
+
+def abrir_binario(ruta):
+    """Abre el archivo en modo binario; si está comprimido, el flujo ya sale descomprimido."""
+    compresion = detectar_compresion(ruta)
+    for _, nombre, abrir in COMPRESORES:
+        if nombre == compresion:
+            return abrir(ruta, "rb")
+    return open(ruta, "rb")
+
+
+def resolver_codificacion(ruta, codificacion=None):
+    """Devuelve 'codificacion' o, si es None, la detectada en el prefijo del archivo."""
+    if codificacion is not None:
+        return codificacion
+    try:
+        with abrir_binario(ruta) as f:
+            return detectar_codificacion(f)
+    except ERRORES_COMPRESION as e:
+        raise LectorXLSXCSVError(f"Error al leer el archivo: {e}") from e
+
+# ----------- Cortes del archivo ------------
+
+def tamano_archivo(ruta):
+    try:
+        with open(ruta, "rb") as f:
+            f.seek(0, 2)
+            return f.tell()
+    except FileNotFoundError as e:
+        raise LectorXLSXCSVError(f"No se encontró el archivo: {ruta}") from e
+    except OSError as e:
+        raise LectorXLSXCSVError(f"Error al leer el archivo: {e}") from e
+
+
+def calcular_cortes(ruta, n_trozos, comillas=True):
+    """
+    Devuelve una lista de rangos (inicio, fin) en bytes que cubren el archivo.
+    Cada corte cae justo después de un '\\n'. Con comillas=True se lleva la paridad
+    de comillas dobles desde el inicio (bytes.count, sin parsear) para no cortar
+    dentro de un campo entrecomillado que contenga saltos de línea.
+    """
+    tam = tamano_archivo(ruta)
+    if tam == 0:
+        return []
+    if n_trozos <= 1:
+        return [(0, tam)]
+
+    objetivos = [tam * k // n_trozos for k in range(1, n_trozos)]
+    cortes = [0]
+
+    with open(ruta, "rb") as f:
+        if not comillas:
+            # Sin comillas basta con saltar al objetivo y buscar el siguiente '\n'
+            for objetivo in objetivos:
+                if objetivo < cortes[-1]:
+                    continue
+                f.seek(objetivo)
+                pos = objetivo
+                while True:
+                    bloque = f.read(TAM_BLOQUE)
+                    if not bloque:
+                        pos = tam
+                        break
+                    nl = bloque.find(b"\n")
+                    if nl != -1:
+                        pos += nl + 1
+                        break
+                    pos += len(bloque)
+                if cortes[-1] < pos < tam:
+                    cortes.append(pos)
+        else:
+            paridad = 0
+            pos = 0
+            idx_obj = 0
+            while idx_obj < len(objetivos):
+                bloque = f.read(TAM_BLOQUE)
+                if not bloque:
+                    break
+                i = 0
+                largo = len(bloque)
+                while i < largo and idx_obj < len(objetivos):
+                    objetivo = objetivos[idx_obj]
+                    if pos + i < objetivo:
+                        fin = min(largo, objetivo - pos)
+                        paridad ^= bloque.count(b'"', i, fin) & 1
+                        i = fin
+                        continue
+                    nl = bloque.find(b"\n", i)
+                    if nl == -1:
+                        paridad ^= bloque.count(b'"', i) & 1
+                        i = largo
+                        continue
+                    paridad ^= bloque.count(b'"', i, nl) & 1
+                    i = nl + 1
+                    if paridad == 0:
+                        corte = pos + i
+                        if cortes[-1] < corte < tam:
+                            cortes.append(corte)
+                        while idx_obj < len(objetivos) and objetivos[idx_obj] <= corte:
+                            idx_obj += 1
+                pos += largo
+
+    cortes.append(tam)
+    return [(cortes[k], cortes[k + 1]) for k in range(len(cortes) - 1)]
+
+
+def ultimo_corte(datos, comillas=True):
+    """
+    Posición justo después del último '\n' de 'datos' que no cae dentro de un
+    campo entrecomillado (datos empieza en un inicio de registro). 0 si no hay.
+    """
+    nl = datos.rfind(b"\n")
+    if nl == -1:
+        return 0
+    if not comillas:
+        return nl + 1
+    paridad = datos.count(b'"', 0, nl) & 1
+    while paridad:
+        anterior = datos.rfind(b"\n", 0, nl)
+        if anterior == -1:
+            return 0
+        paridad ^= datos.count(b'"', anterior, nl) & 1
+        nl = anterior
+    return nl + 1
+
+
+def trozos_flujo(f, tam_trozo=TAM_TROZO_FLUJO, comillas=True):
+    """
+    Lee un flujo binario (p. ej. descomprimido) y produce trozos de bytes que
+    terminan en fin de registro, para parsearlos por separado.
+    """
+    resto = b""
+    while True:
+        bloque = f.read(tam_trozo)
+        if not bloque:
+            break
+        datos = resto + bloque if resto else bloque
+        corte = ultimo_corte(datos, comillas)
+        if corte == 0:
+            resto = datos
+            continue
+        yield datos[:corte]
+        resto = datos[corte:]
+    if resto:
+        yield resto
+
+
+def _encadenar(primero, resto):
+    yield primero
+    yield from resto
+
+# ----------- Parseo y conversión de un rango ------------
+
+def convertir_celda(txt):
+    """Convierte una celda ya recortada: faltante -> None, número -> float, resto -> str."""
+    if txt == "":
+        return None
+    try:
+        valor = float(txt)
+    except ValueError:
+        if txt.lower() in FALTANTES:
+            return None
+        return txt
+    if valor != valor:  # "nan"
+        return None
+    return valor
+
+
+def _fila_de_partes(partes):
+    """Celdas recortadas, o None si la línea estaba vacía."""
+    fila = [p.strip() for p in partes]
+    if not fila or (len(fila) == 1 and fila[0] == ""):
+        return None
+    return fila
+
+
+def parsear_texto(texto, sep, convertir=False, filtro=None, exento=False):
+    """
+    Parte un bloque de texto en filas (lista de listas), saltando líneas vacías.
+    - filtro: condiciones ya resueltas a índices (filtro.resolver_columnas). Una
+      fila rechazada se descarta antes de recortar o convertir sus celdas; si el
+      bloque no tiene comillas, las líneas que no contienen el texto buscado por
+      '=' / 'in' se descartan sin siquiera partirlas.
+    - exento: la primera fila (el encabezado) se conserva aunque no cumpla el filtro.
+    """
+    filas = []
+    acepta = compilar(filtro) if filtro else None
+    if sep == " " or (acepta is not None and '"' not in texto):
+        grupos = textos_requeridos(filtro) if acepta is not None else []
+        for linea in texto.splitlines():
+            if grupos and not exento and not linea_posible(linea, grupos):
+                continue
+            partes = linea.split() if sep == " " else linea.split(sep)
+            if acepta is not None and not exento and not acepta(partes):
+                continue
+            fila = partes if sep == " " else _fila_de_partes(partes)
+            if fila:
+                filas.append(fila)
+                exento = False
+    else:
+        lector = csv.reader(io.StringIO(texto, newline=""), delimiter=sep,
+                            quotechar='"', skipinitialspace=True)
+        for partes in lector:
+            if acepta is not None and not exento and not acepta(partes):
+                continue
+            fila = _fila_de_partes(partes)
+            if fila is None:
+                continue
+            filas.append(fila)
+            exento = False
+
+    if convertir:
+        filas = [[convertir_celda(c) for c in fila] for fila in filas]
+    return filas
+
+
+def _parsear_bytes(tarea):
+    """Trabajador: decodifica un trozo de bytes y lo devuelve parseado."""
+    datos, sep, codificacion, convertir, filtro, exento = tarea
+    texto = decodificar(datos, codificacion)
+    return parsear_texto(texto, sep, convertir, filtro, exento)
+
+
+def parsear_rango(ruta, inicio, fin, sep, codificacion, convertir=False, filtro=None, exento=False):
+    """
+    Lee los bytes [inicio, fin) de 'ruta' y devuelve sus filas parseadas.
+    inicio y fin deben caer en límites de registro (ver calcular_cortes) y
+    codificacion ya resuelta (resolver_codificacion). filtro: condiciones con
+    índices ya resueltos; exento conserva la primera fila aunque no las cumpla.
+    """
+    with open(ruta, "rb") as f:
+        f.seek(inicio)
+        datos = f.read(fin - inicio)
+    return _parsear_bytes((datos, sep, codificacion, convertir, filtro, exento))
+
+
+def _parsear_rango(tarea):
+    """Trabajador: parsear_rango con los argumentos en una tupla (para map)."""
+    return parsear_rango(*tarea)
+
+
+def _resolver_filtro_texto(ruta, sep, filtro, encabezado, codificacion):
+    """Condiciones -> índices, leyendo solo la primera línea si hay encabezado."""
+    if not filtro:
+        return None
+    nombres = []
+    if encabezado:
+        muestra = leer_muestra_lineas(ruta, 1, codificacion)
+        if muestra:
+            primera = parsear_texto(muestra[0], sep)
+            nombres = primera[0] if primera else []
+    return resolver_columnas(filtro, nombres)
+
+# ----------- API principal ------------
+
+def leer_muestra_lineas(ruta, n=50, codificacion=None):
+    """
+    Lee solo las primeras n líneas no vacías (para detectar separador/encabezado).
+    codificacion=None: se detecta sobre el prefijo del archivo.
+    """
+    lineas = []
+    try:
+        with abrir_binario(ruta) as f_bin:
+            if codificacion is None:
+                codificacion = detectar_codificacion(f_bin)
+            for ln in io.TextIOWrapper(f_bin, encoding=codificacion, errors=ERRORES):
+                if ln.strip() == "":
+                    continue
+                lineas.append(ln.rstrip("\n\r"))
+                if len(lineas) >= n:
+                    break
+    except FileNotFoundError as e:
+        raise LectorXLSXCSVError(f"No se encontró el archivo: {ruta}") from e
+    except ERRORES_COMPRESION as e:
+        raise LectorXLSXCSVError(f"Error al leer el archivo: {e}") from e
+    return lineas
+
+
+def leer_texto_paralelo(ruta, sep, procesos=None, convertir=False,
+                        codificacion=None, comillas=True, filtro=None, encabezado=True):
+    """
+    Lee un archivo delimitado y devuelve una lista de filas en el orden original.
+    - procesos: número de procesos trabajadores (None = núcleos disponibles).
+    - convertir: si es True, las celdas numéricas salen como float y las faltantes
+      como None; si es False, todas las celdas son str (como lineas_a_tabla).
+    - codificacion: None = detectarla (BOM / validez UTF-8 del prefijo).
+    - filtro: condiciones (ver descompresor.filtro) que se evalúan dentro de cada
+      trabajador mientras parsea; solo vuelven las filas que las cumplen. Con
+      encabezado=True las columnas se buscan por nombre en la primera fila, que
+      siempre se conserva.
+    Archivos pequeños (< UMBRAL_PARALELO) se parsean en el proceso actual.
+    Los comprimidos (.gz/.bz2/.xz) se leen como flujo con leer_texto_comprimido.
+    """
+    if procesos is None:
+        procesos = cpu_count() or 1
+
+    tam = tamano_archivo(ruta)
+    if tam == 0:
+        return []
+
+    resueltas = _resolver_filtro_texto(ruta, sep, filtro, encabezado, codificacion)
+    exento = bool(resueltas) and encabezado
+
+    comprimido = detectar_compresion(ruta) is not None
+    if comprimido and codificacion is None:
+        # Se detecta sobre el primer trozo del propio flujo
+        return _leer_comprimido(ruta, sep, procesos, convertir, codificacion, comillas,
+                                resueltas, exento)
+
+    codificacion = resolver_codificacion(ruta, codificacion)
+    if not admite_cortes(codificacion):
+        # UTF-16: un '\n' no marca límite de carácter; se decodifica entero aquí
+        try:
+            with abrir_binario(ruta) as f:
+                datos = f.read()
+        except ERRORES_COMPRESION as e:
+            raise LectorXLSXCSVError(f"Error al leer el archivo: {e}") from e
+        return _parsear_bytes((datos, sep, codificacion, convertir, resueltas, exento))
+    if comprimido:
+        return _leer_comprimido(ruta, sep, procesos, convertir, codificacion, comillas,
+                                resueltas, exento)
+
+    if procesos <= 1 or tam < UMBRAL_PARALELO:
+        return _parsear_rango((ruta, 0, tam, sep, codificacion, convertir, resueltas, exento))
+
+    rangos = calcular_cortes(ruta, procesos * TROZOS_POR_PROCESO, comillas)
+    tareas = [(ruta, ini, fin, sep, codificacion, convertir, resueltas, exento and ini == 0)
+              for ini, fin in rangos]
+
+    filas = []
+    with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+        # map conserva el orden de las tareas
+        for parcial in ejecutor.map(_parsear_rango, tareas):
+            filas.extend(parcial)
+    return filas
+
+
+def leer_texto_comprimido(ruta, sep, procesos=None, convertir=False,
+                          codificacion=None, comillas=True, filtro=None, encabezado=True):
+    """
+    Descomprime el archivo como flujo y lo parsea por trozos de registros
+    completos. Con varios procesos, el proceso actual descomprime mientras los
+    trabajadores parsean; se mantienen a lo sumo procesos * TROZOS_POR_PROCESO
+    trozos en vuelo y los resultados se reensamblan en orden.
+    Con codificacion=None se detecta sobre el primer trozo (sin reabrir el flujo).
+    filtro / encabezado: como en leer_texto_paralelo.
+    """
+    if procesos is None:
+        procesos = cpu_count() or 1
+    resueltas = _resolver_filtro_texto(ruta, sep, filtro, encabezado, codificacion)
+    return _leer_comprimido(ruta, sep, procesos, convertir, codificacion, comillas,
+                            resueltas, bool(resueltas) and encabezado)
+
+
+def _leer_comprimido(ruta, sep, procesos, convertir, codificacion, comillas, filtro, exento):
+    filas = []
+    try:
+        with abrir_binario(ruta) as f:
+            trozos = trozos_flujo(f, TAM_TROZO_FLUJO, comillas)
+            if codificacion is None:
+                primero = next(trozos, None)
+                if primero is None:
+                    return filas
+                codificacion = detectar_en_prefijo(primero[:TAM_PREFIJO])
+                if not admite_cortes(codificacion):
+                    primero += b"".join(trozos)
+                    return _parsear_bytes((primero, sep, codificacion, convertir, filtro, exento))
+                trozos = _encadenar(primero, trozos)
+
+            def tareas():
+                # Solo el primer trozo lleva el encabezado
+                primero = exento
+                for datos in trozos:
+                    yield (datos, sep, codificacion, convertir, filtro, primero)
+                    primero = False
+
+            if procesos <= 1 or tamano_archivo(ruta) < UMBRAL_PARALELO_COMPRIMIDO:
+                for tarea in tareas():
+                    filas.extend(_parsear_bytes(tarea))
+                return filas
+
+            pendientes = deque()
+            with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+                for tarea in tareas():
+                    pendientes.append(ejecutor.submit(_parsear_bytes, tarea))
+                    if len(pendientes) >= procesos * TROZOS_POR_PROCESO:
+                        filas.extend(pendientes.popleft().result())
+                while pendientes:
+                    filas.extend(pendientes.popleft().result())
+    except ERRORES_COMPRESION as e:
+        raise LectorXLSXCSVError(f"Error al descomprimir el archivo: {e}") from e
+    return filas
+
+
+def leer_texto_lotes(ruta, sep, convertir=False, codificacion=None, comillas=True,
+                     filtro=None, encabezado=True, tam_trozo=TAM_TROZO_FLUJO):
+    """
+    Generador de lotes de filas en el orden del archivo, un lote por trozo de
+    ~tam_trozo bytes: la memoria queda acotada por el trozo, no por el archivo.
+    Se parsea en el proceso actual; sirve para recorrer archivos que no caben en
+    memoria (varias pasadas = varias llamadas). Acepta comprimidos.
+    convertir / codificacion / filtro / encabezado: como en leer_texto_paralelo.
+    """
+    resueltas = _resolver_filtro_texto(ruta, sep, filtro, encabezado, codificacion)
+    try:
+        with abrir_binario(ruta) as f:
+            if codificacion is None:
+                codificacion = detectar_codificacion(f)
+            yield from leer_flujo_lotes(f, sep, codificacion, convertir, comillas,
+                                        resueltas, bool(resueltas) and encabezado, tam_trozo)
+    except ERRORES_COMPRESION as e:
+        raise LectorXLSXCSVError(f"Error al leer el archivo: {e}") from e
+
+
+def leer_flujo_lotes(f, sep, codificacion, convertir=False, comillas=True, filtro=None,
+                     exento=False, tam_trozo=TAM_TROZO_FLUJO):
+    """
+    Igual que leer_texto_lotes pero sobre un flujo binario ya abierto (por ejemplo
+    sys.stdin.buffer), con la codificación ya elegida y el filtro ya resuelto.
+    """
+    if not admite_cortes(codificacion):
+        # UTF-16: se recodifica a UTF-8 al vuelo para poder cortar en '\n'
+        f = codecs.EncodedFile(f, "utf-8", codificacion, ERRORES)
+        codificacion = "utf-8"
+    for datos in trozos_flujo(f, tam_trozo, comillas):
+        filas = _parsear_bytes((datos, sep, codificacion, convertir, filtro, exento))
+        exento = False
+        if filas:
+            yield filas
+
+
+class FlujoConPrefijo:
+    """
+    Flujo binario que primero devuelve unos bytes ya leídos y después sigue con el
+    flujo original. Permite mirar el comienzo de una entrada que no admite seek
+    (stdin, tuberías) para detectar codificación y separador sin perderlo.
+    """
+
+    def __init__(self, prefijo, flujo):
+        self.prefijo = prefijo
+        self.flujo = flujo
+
+    def read(self, n=-1):
+        if not self.prefijo:
+            return self.flujo.read(n)
+        if n is None or n < 0:
+            datos = self.prefijo + self.flujo.read()
+            self.prefijo = b""
+            return datos
+        datos = self.prefijo[:n]
+        self.prefijo = self.prefijo[n:]
+        return datos
+
+
+def leer_texto_tabla(ruta, sep, encabezado=True, procesos=None,
+                     umbral_numerico=1.0, codificacion=None, usar_cache=True, filtro=None):
+    """
+    Igual que leer_texto_paralelo, pero devuelve una TablaColumnar tipada.
+    Si encabezado es True la primera fila da los nombres de columna.
+    filtro: solo entran a la tabla las filas que lo cumplen.
+    Con usar_cache=True se reutiliza la instantánea .tcol si el archivo no cambió.
+    """
+    parametros = {"lector": "texto", "sep": sep, "encabezado": bool(encabezado),
+                  "umbral_numerico": umbral_numerico, "codificacion": codificacion,
+                  "filtro": [list(c) for c in validar_condiciones(filtro)]}
+    return leer_con_instantanea(
+        ruta, parametros,
+        lambda: _construir_tabla_texto(ruta, sep, encabezado, procesos,
+                                       umbral_numerico, codificacion, filtro),
+        usar_cache=usar_cache,
+    )
+
+
+def _construir_tabla_texto(ruta, sep, encabezado, procesos, umbral_numerico, codificacion,
+                           filtro=None):
+    filas = leer_texto_paralelo(ruta, sep, procesos=procesos, convertir=True,
+                                codificacion=codificacion, filtro=filtro,
+                                encabezado=encabezado)
+    nombres = None
+    if encabezado and filas:
+        nombres = []
+        for cel in filas[0]:
+            txt = a_texto(cel)
+            nombres.append(txt if txt else "col_" + str(len(nombres) + 1))
+        filas = filas[1:]
+    return TablaColumnar.desde_filas(filas, nombres, umbral_numerico=umbral_numerico)
@@ -0,0 +1,101 @@
+"""
+Modelo de estandarización guardado en disco.
+Guarda, por columna, el centro y la escala con que se calcularon los puntajes Z
+(media y desviación, o mediana y MAD escalado en modo robusto), junto con los
+nombres de columna y cuántos valores se usaron. Es un JSON pequeño: se ajusta
+una vez sobre el histórico y luego se puntúan archivos nuevos sin recalcular.
+Solo usa biblioteca estándar.
+"""
+
+import json
+import os
+
+from .Rms_lector import LectorXLSXCSVError
+
+VERSION_MODELO = 1
+TIPOS_MODELO = ("clasico", "robusto")
+
+
+class ModeloEstandarizacion:
+    """Centro y escala por columna; estandariza filas nuevas con ellos."""
+
+    def __init__(self, centros, escalas, encabezado=None, conteos=None, tipo="clasico"):
+        if tipo not in TIPOS_MODELO:
+            raise ValueError(f"Tipo de modelo no soportado: {tipo!r}")
+        if len(centros) != len(escalas):
+            raise ValueError("El modelo necesita un centro y una escala por columna.")
+        self.centros = list(centros)
+        self.escalas = list(escalas)
+        self.encabezado = list(encabezado) if encabezado else None
+        self.conteos = list(conteos) if conteos is not None else [0] * len(self.centros)
+        self.tipo = tipo
+
+    @property
+    def n_columnas(self):
+        return len(self.centros)
+
+    def __repr__(self):
+        return "ModeloEstandarizacion({} columnas, {})".format(self.n_columnas, self.tipo)
+
+    # ----------- Columnas de la entrada ------------
+
+    def estadisticos_para(self, encabezado=None, n_columnas=None):
+        """
+        (centros, escalas) en el orden de las columnas de una entrada nueva.
+        Si el modelo y la entrada tienen encabezado se emparejan por nombre (las
+        columnas que el modelo no conoce no se estandarizan); si no, por posición.
+        """
+        if encabezado and self.encabezado:
+            posicion = {nombre: j for j, nombre in enumerate(self.encabezado)}
+            indices = [posicion.get(nombre) for nombre in encabezado]
+        else:
+            n = self.n_columnas if n_columnas is None else n_columnas
+            indices = [j if j < self.n_columnas else None for j in range(n)]
+        centros = [None if j is None else self.centros[j] for j in indices]
+        escalas = [None if j is None else self.escalas[j] for j in indices]
+        return centros, escalas
+
+    # ----------- Disco ------------
+
+    def a_dict(self):
+        return {
+            "version": VERSION_MODELO,
+            "tipo": self.tipo,
+            "encabezado": self.encabezado,
+            "centros": self.centros,
+            "escalas": self.escalas,
+            "conteos": self.conteos,
+        }
+
+    @classmethod
+    def desde_dict(cls, datos):
+        if not isinstance(datos, dict) or datos.get("version") != VERSION_MODELO:
+            raise ValueError("El archivo no es un modelo de estandarización válido.")
+        try:
+            return cls(datos["centros"], datos["escalas"], datos.get("encabezado"),
+                       datos.get("conteos"), datos.get("tipo", "clasico"))
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Modelo de estandarización incompleto: {e}") from e
+
+    def guardar(self, ruta):
+        """Escribe el modelo como JSON (primero a un temporal, luego lo reemplaza)."""
+        temporal = ruta + ".tmp"
+        try:
+            with open(temporal, "w", encoding="utf-8") as f:
+                json.dump(self.a_dict(), f, ensure_ascii=False, indent=1)
+            os.replace(temporal, ruta)
+        except OSError as e:
+            raise LectorXLSXCSVError(f"Error al escribir el modelo: {e}") from e
+
+    @classmethod
+    def cargar(cls, ruta):
+        try:
+            with open(ruta, "r", encoding="utf-8") as f:
+                datos = json.load(f)
+        except FileNotFoundError:
+            raise
+        except OSError as e:
+            raise LectorXLSXCSVError(f"Error al leer el modelo: {e}") from e
+        except ValueError as e:
+            raise ValueError(f"El modelo no es JSON válido: {e}") from e
+        return cls.desde_dict(datos)
@@ -0,0 +1,276 @@
+"""
+Momentos por columna en una sola pasada (algoritmo de Welford).
+Cada columna guarda n (valores numéricos vistos), media y M2 (suma de cuadrados de
+desviaciones respecto a la media). Se alimenta fila a fila o por lotes de filas,
+sin transponer, y da la media y la desviación estándar poblacional sin recorrer
+los datos otra vez. Es numéricamente estable (no resta sumas grandes).
+Los estados parciales se combinan exactamente (fórmula de Chan), así que cada
+proceso puede resumir un trozo de archivo, o un archivo entero, y luego se unen.
+Solo usa biblioteca estándar.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import cpu_count
+
+from .codificacion import admite_cortes
+from .lectura_paralela import (
+    TROZOS_POR_PROCESO, UMBRAL_PARALELO, calcular_cortes, detectar_compresion, parsear_rango,
+    leer_texto_lotes, resolver_codificacion, tamano_archivo,
+)
+
+# Tope de bytes por rango: cada trabajador tiene en memoria a lo sumo un rango
+TAM_RANGO = 64 * 1024 * 1024
+
+
+class MomentosColumna:
+    """n, media y M2 de una columna, actualizados valor a valor."""
+
+    __slots__ = ("n", "media", "m2")
+
+    def __init__(self, n=0, media=0.0, m2=0.0):
+        self.n = n
+        self.media = media
+        self.m2 = m2
+
+    def agregar(self, x):
+        n = self.n + 1
+        delta = x - self.media
+        media = self.media + delta / n
+        self.m2 += delta * (x - media)
+        self.media = media
+        self.n = n
+
+    def agregar_valores(self, valores):
+        """Agrega los valores int/float de un iterable (texto y None se ignoran)."""
+        n = self.n
+        media = self.media
+        m2 = self.m2
+        for x in valores:
+            if isinstance(x, (int, float)):
+                n += 1
+                delta = x - media
+                media += delta / n
+                m2 += delta * (x - media)
+        self.n, self.media, self.m2 = n, media, m2
+
+    def combinar(self, otro):
+        """Suma al estado el de otro MomentosColumna (fórmula de Chan). Devuelve self."""
+        if otro.n == 0:
+            return self
+        if self.n == 0:
+            self.n, self.media, self.m2 = otro.n, otro.media, otro.m2
+            return self
+        n = self.n + otro.n
+        delta = otro.media - self.media
+        self.media += delta * otro.n / n
+        self.m2 += otro.m2 + delta * delta * self.n * otro.n / n
+        self.n = n
+        return self
+
+    def obtener_media(self):
+        return self.media if self.n else None
+
+    def varianza(self):
+        """Varianza poblacional (M2 / n); None sin datos."""
+        if self.n == 0:
+            return None
+        return self.m2 / self.n if self.m2 > 0 else 0.0
+
+    def desviacion(self):
+        """Desviación estándar poblacional: None sin datos, 0.0 con un solo valor."""
+        if self.n == 0:
+            return None
+        if self.n == 1:
+            return 0.0
+        return self.varianza() ** 0.5
+
+
+class AcumuladorMomentos:
+    """Un MomentosColumna por columna; se alimenta con filas o lotes de filas."""
+
+    def __init__(self, n_columnas):
+        self.columnas = [MomentosColumna() for _ in range(n_columnas)]
+
+    def __len__(self):
+        return len(self.columnas)
+
+    def ampliar(self, n_columnas):
+        """Agrega columnas vacías hasta tener n_columnas (filas más largas que las vistas)."""
+        while len(self.columnas) < n_columnas:
+            self.columnas.append(MomentosColumna())
+
+    def agregar_fila(self, fila):
+        for mom, x in zip(self.columnas, fila):
+            if isinstance(x, (int, float)):
+                mom.agregar(x)
+
+    def agregar_lote(self, filas):
+        """Una pasada por el lote; las celdas que faltan en filas cortas no aportan."""
+        columnas = self.columnas
+        estado = [[m.n, m.media, m.m2] for m in columnas]
+        for fila in filas:
+            for e, x in zip(estado, fila):
+                if isinstance(x, (int, float)):
+                    n = e[0] + 1
+                    delta = x - e[1]
+                    media = e[1] + delta / n
+                    e[2] += delta * (x - media)
+                    e[1] = media
+                    e[0] = n
+        for m, e in zip(columnas, estado):
+            m.n, m.media, m.m2 = e
+
+    def combinar(self, otro):
+        """Combina columna a columna con otro acumulador. Devuelve self."""
+        self.ampliar(len(otro))
+        for mom, parcial in zip(self.columnas, otro.columnas):
+            mom.combinar(parcial)
+        return self
+
+    def medias(self):
+        return [m.obtener_media() for m in self.columnas]
+
+    def desviaciones(self):
+        return [m.desviacion() for m in self.columnas]
+
+    def conteos(self):
+        return [m.n for m in self.columnas]
+
+class MomentosPorGrupo:
+    """
+    Un AcumuladorMomentos por valor de la columna de grupo, en una tabla hash.
+    Una sola pasada por las filas; la memoria crece con la cantidad de grupos,
+    no con la de filas.
+    """
+
+    def __init__(self, columna_grupo, n_columnas=0):
+        self.columna_grupo = columna_grupo
+        self.n_columnas = n_columnas
+        self.grupos = {}
+
+    def __len__(self):
+        return len(self.grupos)
+
+    def _acumulador(self, clave):
+        acumulador = self.grupos.get(clave)
+        if acumulador is None:
+            acumulador = AcumuladorMomentos(self.n_columnas)
+            self.grupos[clave] = acumulador
+        return acumulador
+
+    def agregar_lote(self, filas):
+        """Welford por grupo: el estado de cada grupo se busca por su clave en cada fila."""
+        g = self.columna_grupo
+        estados = {}
+        for fila in filas:
+            clave = fila[g] if g < len(fila) else None
+            estado = estados.get(clave)
+            if estado is None:
+                estado = [[m.n, m.media, m.m2] for m in self._acumulador(clave).columnas]
+                estados[clave] = estado
+            if len(fila) > len(estado):
+                estado.extend([0, 0.0, 0.0] for _ in range(len(fila) - len(estado)))
+            for e, x in zip(estado, fila):
+                if isinstance(x, (int, float)):
+                    n = e[0] + 1
+                    delta = x - e[1]
+                    media = e[1] + delta / n
+                    e[2] += delta * (x - media)
+                    e[1] = media
+                    e[0] = n
+        for clave, estado in estados.items():
+            acumulador = self.grupos[clave]
+            acumulador.ampliar(len(estado))
+            for m, e in zip(acumulador.columnas, estado):
+                m.n, m.media, m.m2 = e
+
+    def combinar(self, otro):
+        for clave, acumulador in otro.grupos.items():
+            self._acumulador(clave).combinar(acumulador)
+        return self
+
+    def estadisticos(self, n_columnas=None):
+        """
+        {clave: (medias, desviaciones)}; la columna de grupo no se estandariza
+        (su centro y escala quedan en None). n_columnas rellena con None.
+        """
+        resultado = {}
+        for clave, acumulador in self.grupos.items():
+            medias = acumulador.medias()
+            desviaciones = acumulador.desviaciones()
+            if n_columnas is not None and n_columnas > len(medias):
+                medias += [None] * (n_columnas - len(medias))
+                desviaciones += [None] * (n_columnas - len(desviaciones))
+            if self.columna_grupo < len(medias):
+                medias[self.columna_grupo] = None
+                desviaciones[self.columna_grupo] = None
+            resultado[clave] = (medias, desviaciones)
+        return resultado
+
+# ----------- Parciales en paralelo ------------
+
+def _momentos_de_tarea(tarea):
+    """
+    Trabajador: AcumuladorMomentos de un rango de bytes [inicio, fin) o, si inicio
+    es None, del archivo entero leído por lotes (comprimidos, UTF-16).
+    """
+    ruta, inicio, fin, sep, codificacion, saltar, preparar = tarea
+    convertir = preparar is None
+    if inicio is None:
+        lotes = leer_texto_lotes(ruta, sep, convertir=convertir, codificacion=codificacion)
+    else:
+        lotes = [parsear_rango(ruta, inicio, fin, sep, codificacion, convertir)]
+    acumulador = AcumuladorMomentos(0)
+    for filas in lotes:
+        if saltar:
+            filas = filas[1:]
+            saltar = False
+        if preparar is not None:
+            filas = [f for f in map(preparar, filas) if f is not None]
+        if filas:
+            acumulador.ampliar(max(len(f) for f in filas))
+            acumulador.agregar_lote(filas)
+    return acumulador
+
+
+def momentos_archivos(archivos, procesos=None, preparar=None):
+    """
+    Momentos por columna de uno o varios archivos de texto, en paralelo.
+    - archivos: lista de (ruta, sep, saltar_encabezado).
+    - preparar: función fila -> fila lista (o None para descartarla), de nivel de
+      módulo para poder mandarla a los trabajadores. Sin ella las celdas llegan
+      convertidas como en leer_texto_paralelo(convertir=True).
+    Cada archivo sin comprimir se parte en rangos de bytes (de a lo sumo TAM_RANGO
+    si es grande); los comprimidos (o en UTF-16) son una tarea cada uno y se leen
+    por lotes. Los parciales se combinan en el orden de los
+    archivos. Devuelve un AcumuladorMomentos.
+    """
+    if procesos is None:
+        procesos = cpu_count() or 1
+
+    tareas = []
+    total_bytes = 0
+    for ruta, sep, saltar in archivos:
+        tam = tamano_archivo(ruta)
+        if tam == 0:
+            continue
+        total_bytes += tam
+        codificacion = resolver_codificacion(ruta)
+        if detectar_compresion(ruta) is not None or not admite_cortes(codificacion):
+            tareas.append((ruta, None, None, sep, codificacion, saltar, preparar))
+            continue
+        n_trozos = 1
+        if tam >= UMBRAL_PARALELO:
+            n_trozos = max(procesos * TROZOS_POR_PROCESO, -(-tam // TAM_RANGO))
+        for ini, fin in calcular_cortes(ruta, n_trozos):
+            tareas.append((ruta, ini, fin, sep, codificacion, saltar and ini == 0, preparar))
+
+    total = AcumuladorMomentos(0)
+    if procesos <= 1 or len(tareas) <= 1 or total_bytes < UMBRAL_PARALELO:
+        for tarea in tareas:
+            total.combinar(_momentos_de_tarea(tarea))
+        return total
+    with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+        for parcial in ejecutor.map(_momentos_de_tarea, tareas):
+            total.combinar(parcial)
+    return total
@@ -0,0 +1,298 @@
+"""
+Tabla columnar tipada, formato común en memoria para todos los programas.
+- Columnas numéricas: array('d') + mapa de bits de faltantes (1 bit por fila).
+- Columnas categóricas: códigos enteros array('i') + diccionario de categorías
+  (código -1 = faltante).
+Los valores se parsean UNA sola vez al construir la tabla; los núcleos (Gower,
+euclidiana, Jaccard, puntaje Z, Mahalanobis) trabajan directamente sobre los arrays.
+Solo usa biblioteca estándar.
+"""
+
+from array import array
+
+FALTANTES = {"", "na", "nan", "null", "none", "n/a", "vacio"}  # se usa .strip().lower()
+
+_NO_NUMERICO = object()
+
+# ----------- Conversión de celdas ------------
+
+def a_numero(valor, faltantes=FALTANTES):
+    """
+    Devuelve float, None (faltante) o _NO_NUMERICO si la celda es texto.
+    Acepta celdas ya convertidas (float/int/None) y coma decimal.
+    """
+    if valor is None:
+        return None
+    if isinstance(valor, (int, float)):
+        return None if valor != valor else float(valor)
+    txt = str(valor).strip()
+    if txt.lower() in faltantes:
+        return None
+    try:
+        num = float(txt)
+    except ValueError:
+        try:
+            num = float(txt.replace(",", "."))
+        except ValueError:
+            return _NO_NUMERICO
+    if num != num:
+        return None
+    return num
+
+
+def a_texto(valor, faltantes=FALTANTES):
+    """Devuelve la celda como str recortado, o None si es faltante."""
+    if valor is None:
+        return None
+    if isinstance(valor, float):
+        if valor != valor:
+            return None
+        if valor.is_integer() and abs(valor) < 1e15:
+            return str(int(valor))
+        return repr(valor)
+    txt = str(valor).strip()
+    if txt.lower() in faltantes:
+        return None
+    return txt
+
+# ----------- Columnas ------------
+
+class ColumnaNumerica:
+    """Valores float en array('d'); las filas faltantes se marcan en un mapa de bits."""
+
+    tipo = "numerico"
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.valores = array("d")
+        self.faltantes = bytearray()
+        self.n_faltantes = 0
+
+    def __len__(self):
+        return len(self.valores)
+
+    def agregar(self, valor):
+        i = len(self.valores)
+        if i & 7 == 0:
+            self.faltantes.append(0)
+        if valor is None:
+            self.valores.append(0.0)
+            self.faltantes[i >> 3] |= 1 << (i & 7)
+            self.n_faltantes += 1
+        else:
+            self.valores.append(valor)
+
+    def es_faltante(self, i):
+        return (self.faltantes[i >> 3] >> (i & 7)) & 1 == 1
+
+    def valor(self, i):
+        if self.n_faltantes and self.es_faltante(i):
+            return None
+        return self.valores[i]
+
+    def validos(self):
+        """Itera (índice, valor) saltando faltantes."""
+        if self.n_faltantes == 0:
+            return enumerate(self.valores)
+        return ((i, v) for i, v in enumerate(self.valores) if not self.es_faltante(i))
+
+    def minimo_maximo(self):
+        mn = None
+        mx = None
+        for _, v in self.validos():
+            if mn is None or v < mn:
+                mn = v
+            if mx is None or v > mx:
+                mx = v
+        return mn, mx
+
+
+class ColumnaCategorica:
+    """Códigos enteros en array('i') con diccionario de categorías; -1 = faltante."""
+
+    tipo = "categorico"
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.codigos = array("i")
+        self.categorias = []
+        self._indice = {}
+        self.n_faltantes = 0
+
+    def __len__(self):
+        return len(self.codigos)
+
+    def codigo_de(self, texto):
+        """Código de una categoría (la registra si es nueva)."""
+        cod = self._indice.get(texto)
+        if cod is None:
+            cod = len(self.categorias)
+            self._indice[texto] = cod
+            self.categorias.append(texto)
+        return cod
+
+    def agregar(self, texto):
+        if texto is None:
+            self.codigos.append(-1)
+            self.n_faltantes += 1
+        else:
+            self.codigos.append(self.codigo_de(texto))
+
+    def es_faltante(self, i):
+        return self.codigos[i] < 0
+
+    def valor(self, i):
+        cod = self.codigos[i]
+        return None if cod < 0 else self.categorias[cod]
+
+
+def _construir_columna(nombre, crudos, tipo, umbral_numerico, faltantes):
+    """Parsea una columna de celdas crudas; si tipo es None lo infiere."""
+    nums = None
+    if tipo is None or tipo == "numerico":
+        nums = [a_numero(v, faltantes) for v in crudos]
+    if tipo is None:
+        total = 0
+        convertibles = 0
+        for x in nums:
+            if x is None:
+                continue
+            total += 1
+            if x is not _NO_NUMERICO:
+                convertibles += 1
+        # Con umbral 0.0 basta un número: una columna solo de texto sigue siendo categórica
+        es_num = convertibles > 0 and convertibles >= umbral_numerico * total
+        tipo = "numerico" if es_num else "categorico"
+
+    if tipo == "numerico":
+        col = ColumnaNumerica(nombre)
+        for x in nums:
+            col.agregar(None if x is _NO_NUMERICO else x)
+    else:
+        col = ColumnaCategorica(nombre)
+        for v in crudos:
+            col.agregar(a_texto(v, faltantes))
+    return col
+
+# ----------- Tabla ------------
+
+class TablaColumnar:
+    """Conjunto de columnas tipadas de igual longitud, con encabezado."""
+
+    def __init__(self, encabezado, columnas):
+        if len(encabezado) != len(columnas):
+            raise ValueError("El encabezado y las columnas no coinciden en cantidad.")
+        self.encabezado = list(encabezado)
+        self.columnas = list(columnas)
+
+    @property
+    def n_filas(self):
+        return len(self.columnas[0]) if self.columnas else 0
+
+    @property
+    def n_columnas(self):
+        return len(self.columnas)
+
+    def __len__(self):
+        return self.n_filas
+
+    @property
+    def tipos(self):
+        return [c.tipo for c in self.columnas]
+
+    # --- Construcción ---
+
+    @classmethod
+    def vacia(cls, encabezado, tipos):
+        """Tabla sin filas con tipos fijos (para ir agregando lotes)."""
+        columnas = []
+        for nombre, tipo in zip(encabezado, tipos):
+            if tipo == "numerico":
+                columnas.append(ColumnaNumerica(nombre))
+            else:
+                columnas.append(ColumnaCategorica(nombre))
+        return cls(encabezado, columnas)
+
+    @classmethod
+    def desde_filas(cls, filas, encabezado=None, tipos=None,
+                    umbral_numerico=1.0, faltantes=FALTANTES):
+        """
+        Construye la tabla a partir de filas (listas de celdas str/float/None).
+        - encabezado: nombres; si es None se usan col_1..col_n.
+        - tipos: lista 'numerico'/'categorico'; si es None se infieren: una columna
+          es numérica si al menos umbral_numerico de sus valores no faltantes son
+          números (los que no lo son pasan a faltantes).
+        Filas cortas se completan con faltantes; las largas se recortan.
+        """
+        if encabezado is None:
+            ncols = max((len(f) for f in filas), default=0)
+            encabezado = ["col_" + str(j + 1) for j in range(ncols)]
+
+        columnas = []
+        for j in range(len(encabezado)):
+            crudos = [f[j] if j < len(f) else None for f in filas]
+            tipo = tipos[j] if tipos is not None else None
+            columnas.append(_construir_columna(encabezado[j], crudos, tipo,
+                                               umbral_numerico, faltantes))
+        return cls(encabezado, columnas)
+
+    @classmethod
+    def desde_columnas(cls, columnas_crudas, encabezado=None, tipos=None,
+                       umbral_numerico=1.0, faltantes=FALTANTES):
+        """Igual que desde_filas, pero recibe los datos ya orientados por columnas."""
+        if encabezado is None:
+            encabezado = ["col_" + str(j + 1) for j in range(len(columnas_crudas))]
+        n = max((len(c) for c in columnas_crudas), default=0)
+
+        columnas = []
+        for j in range(len(encabezado)):
+            crudos = columnas_crudas[j] if j < len(columnas_crudas) else []
+            if len(crudos) < n:
+                crudos = list(crudos) + [None] * (n - len(crudos))
+            tipo = tipos[j] if tipos is not None else None
+            columnas.append(_construir_columna(encabezado[j], crudos, tipo,
+                                               umbral_numerico, faltantes))
+        return cls(encabezado, columnas)
+
+    def agregar_filas(self, filas, faltantes=FALTANTES):
+        """Agrega un lote de filas respetando los tipos ya fijados."""
+        for j, col in enumerate(self.columnas):
+            if col.tipo == "numerico":
+                for f in filas:
+                    x = a_numero(f[j], faltantes) if j < len(f) else None
+                    col.agregar(None if x is _NO_NUMERICO else x)
+            else:
+                for f in filas:
+                    col.agregar(a_texto(f[j], faltantes) if j < len(f) else None)
+
+    # --- Acceso ---
+
+    def indice(self, nombre):
+        """Índice de columna por nombre exacto o insensible a mayúsculas (None si no existe)."""
+        for j, nm in enumerate(self.encabezado):
+            if nm == nombre:
+                return j
+        bajo = str(nombre).lower()
+        for j, nm in enumerate(self.encabezado):
+            if str(nm).lower() == bajo:
+                return j
+        return None
+
+    def columna(self, j):
+        return self.columnas[j]
+
+    def fila(self, i):
+        """Fila i como lista de valores (float / str / None)."""
+        return [c.valor(i) for c in self.columnas]
+
+    def filas(self):
+        for i in range(self.n_filas):
+            yield self.fila(i)
+
+    def indices_numericos(self):
+        return [j for j, c in enumerate(self.columnas) if c.tipo == "numerico"]
+
+    def seleccionar_columnas(self, indices):
+        """Nueva tabla que comparte (no copia) las columnas elegidas."""
+        return TablaColumnar([self.encabezado[j] for j in indices],
+                             [self.columnas[j] for j in indices])
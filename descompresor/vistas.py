@@ -0,0 +1,77 @@
+"""
+Vistas de orientación sin copia.
+Una matriz se guarda UNA sola vez como lista de listas (por filas o por columnas,
+según la entregue el lector). Transpuesta la presenta en la orientación contraria:
+cada elemento es una VistaLinea que lee la posición k de todas las listas base,
+así que transponer cuesta O(1) en memoria en lugar de O(filas x columnas).
+Solo usa biblioteca estándar.
+"""
+
+
+class VistaLinea:
+    """Secuencia de solo lectura con el elemento k de cada lista de 'base'."""
+
+    __slots__ = ("base", "k")
+
+    def __init__(self, base, k):
+        self.base = base
+        self.k = k
+
+    def __len__(self):
+        return len(self.base)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            k = self.k
+            return [linea[k] for linea in self.base[i]]
+        return self.base[i][self.k]
+
+    def __iter__(self):
+        k = self.k
+        for linea in self.base:
+            yield linea[k]
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class Transpuesta:
+    """
+    Vista transpuesta de una matriz rectangular (lista de listas de igual largo).
+    t[k][i] == base[i][k]; no se copia ningún dato.
+    """
+
+    __slots__ = ("base",)
+
+    def __init__(self, base):
+        self.base = base
+
+    def __len__(self):
+        return len(self.base[0]) if self.base else 0
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            return [VistaLinea(self.base, j) for j in range(len(self))[k]]
+        if k < 0:
+            k += len(self)
+        if k < 0 or k >= len(self):
+            raise IndexError("índice fuera de rango")
+        return VistaLinea(self.base, k)
+
+    def __iter__(self):
+        for k in range(len(self)):
+            yield VistaLinea(self.base, k)
+
+    def __repr__(self):
+        return "Transpuesta({} x {})".format(len(self), len(self.base))
+
+
+def transponer(matriz):
+    """
+    Devuelve la matriz en la orientación contraria sin copiar:
+    la transpuesta de una Transpuesta es su matriz base original.
+    """
+    if isinstance(matriz, Transpuesta):
+        return matriz.base
+    return Transpuesta(matriz)
+